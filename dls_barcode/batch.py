@@ -0,0 +1,214 @@
+""" Headless batch scanning of stored images, e.g. to reprocess an archive of puck images after the
+scanning has been tuned. The images are scanned in parallel by a pool of worker processes, and the result
+for each one (in the order the images were given) is written as a line of JSON or CSV as soon as it is
+ready. Qt is not needed (or imported).
+
+    python -m dls_barcode.batch [-p PLATE_TYPE] [-s SIZE ...] [-j JOBS] [-f {json,csv}] [-o OUTPUT] PATH [PATH ...]
+
+Each PATH can be an image file, a directory of images, or a glob pattern (quote it so that the shell
+doesn't expand it).
+"""
+from __future__ import division, print_function
+
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from functools import partial
+
+# Required for multiprocessing to work under PyInstaller bundling in Windows
+from dls_util import multiprocessing_support
+
+from dls_barcode.datamatrix import DataMatrix
+from dls_barcode.datamatrix.locate.locate_contour import set_max_threads
+from dls_barcode.datamatrix.read import DatamatrixSizeTable
+from dls_barcode.geometry import Geometry
+from dls_barcode.scan import GeometryScanner, OpenScanner
+from dls_util.image import Image
+
+IMAGE_EXTENSIONS = [".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"]
+
+FORMAT_JSON = "json"
+FORMAT_CSV = "csv"
+
+# Columns of the CSV output; the barcodes of the slots (in slot order) are joined into one column
+CSV_COLUMNS = ["file", "plate_type", "valid", "empty", "unread", "barcodes", "geometry", "error", "load_time",
+               "scan_time"]
+CSV_BARCODE_SEPARATOR = ","
+
+
+def find_images(paths, recursive=False):
+    """ Get the image files that the paths refer to, in order and without duplicates. A path can be a
+    file (which is included whatever its extension), a directory (whose image files are included) or a
+    glob pattern (whose matching image files are included). """
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+        elif os.path.isdir(path):
+            files.extend(_images_in_directory(path, recursive))
+        else:
+            matches = sorted(glob.glob(path, recursive=recursive))
+            if not matches:
+                print("No images found for: {}".format(path), file=sys.stderr)
+            for match in matches:
+                if os.path.isdir(match):
+                    files.extend(_images_in_directory(match, recursive))
+                elif _is_image(match):
+                    files.append(match)
+
+    seen = set()
+    return [file for file in files if not (file in seen or seen.add(file))]
+
+
+def _images_in_directory(directory, recursive):
+    if recursive:
+        files = [os.path.join(root, name) for root, _, names in os.walk(directory) for name in names]
+    else:
+        files = [os.path.join(directory, name) for name in os.listdir(directory)]
+    return sorted(file for file in files if _is_image(file) and os.path.isfile(file))
+
+
+def _is_image(filename):
+    return os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS
+
+
+def scan_image(filename, plate_type, barcode_sizes):
+    """ Scan the image file with a new scanner (so that the result doesn't depend on any other image),
+    and return the result as a dictionary of plain values. """
+    result = {"file": filename, "plate_type": plate_type, "valid": 0, "empty": 0, "unread": 0, "barcodes": [],
+              "geometry": None, "error": None, "load_time": 0.0, "scan_time": 0.0}
+
+    start = time.time()
+    try:
+        image = Image.from_file(filename)
+    except Exception:
+        # OpenCV doesn't raise an error for an unreadable file, but the image can't be created without any data
+        result["error"] = "Could not read image"
+        return result
+    result["load_time"] = round(time.time() - start, 4)
+
+    if plate_type == Geometry.NO_GEOMETRY:
+        scanner = OpenScanner(barcode_sizes)
+    else:
+        scanner = GeometryScanner(plate_type, barcode_sizes)
+
+    try:
+        scan_result = scanner.scan_next_frame(image.to_grayscale(), is_single_image=True)
+    except Exception as ex:
+        result["error"] = "{}: {}".format(type(ex).__name__, ex)
+        return result
+    finally:
+        scanner.close()
+
+    result["scan_time"] = round(scan_result.scan_time(), 4)
+    result["error"] = scan_result.error()
+
+    plate = scan_result.plate()
+    if plate is not None:
+        result["valid"] = plate.num_valid_barcodes()
+        result["empty"] = plate.num_empty_slots()
+        result["unread"] = plate.num_unread_barcodes()
+        result["barcodes"] = plate.barcodes()
+        if plate.geometry() is not None:
+            result["geometry"] = plate.geometry().serialize()
+
+    return result
+
+
+def scan_images(files, plate_type, barcode_sizes, jobs):
+    """ Generator of the results of scanning the image files (in the same order as the files), which
+    are scanned by a pool of the specified number of worker processes (or in this process if it is 1). """
+    scan = partial(scan_image, plate_type=plate_type, barcode_sizes=barcode_sizes)
+    if jobs <= 1 or len(files) <= 1:
+        for file in files:
+            yield scan(file)
+        return
+
+    # Share the CPUs between the worker processes, rather than each locating with a thread per CPU
+    num_workers = min(jobs, len(files))
+    threads_per_worker = max((multiprocessing.cpu_count() or 1) // num_workers, 1)
+    pool = multiprocessing.Pool(num_workers, initializer=set_max_threads, initargs=(threads_per_worker,))
+    try:
+        for result in pool.imap(scan, files):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def write_results(results, output, output_format):
+    """ Write each of the results to the output as soon as it is available. Returns the number of
+    images for which a plate was found. """
+    writer = None
+    if output_format == FORMAT_CSV:
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(CSV_COLUMNS)
+
+    num_plates = 0
+    for result in results:
+        if result["barcodes"]:
+            num_plates += 1
+
+        if writer is not None:
+            row = dict(result, barcodes=CSV_BARCODE_SEPARATOR.join(result["barcodes"]))
+            writer.writerow(["" if row[column] is None else row[column] for column in CSV_COLUMNS])
+        else:
+            output.write(json.dumps(result) + "\n")
+        output.flush()
+
+    return num_plates
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m dls_barcode.batch",
+                                     description="Scan stored images for barcodes without the GUI.")
+    parser.add_argument("paths", nargs="+", metavar="PATH",
+                        help="Image files, directories of images, or glob patterns (quoted)")
+    parser.add_argument("-p", "--plate-type", default=Geometry.UNIPUCK, choices=Geometry.TYPES,
+                        help="The type of sample holder in the images (default=%(default)s)")
+    parser.add_argument("-s", "--barcode-sizes", type=int, nargs="+", default=[DataMatrix.DEFAULT_SIZE],
+                        choices=DatamatrixSizeTable.valid_sizes(), metavar="SIZE",
+                        help="The datamatrix sizes to read (default=%(default)s)")
+    parser.add_argument("-j", "--jobs", type=int, default=multiprocessing.cpu_count(),
+                        help="The number of images to scan in parallel (default=%(default)s)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Include images in subdirectories (and let '**' in patterns match them)")
+    parser.add_argument("-f", "--format", default=FORMAT_JSON, choices=[FORMAT_JSON, FORMAT_CSV],
+                        help="The format of the results: a JSON object or a CSV row per image (default=%(default)s)")
+    parser.add_argument("-o", "--output", help="The file to write the results to (default=standard output)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    files = find_images(args.paths, args.recursive)
+    if not files:
+        print("No images to scan", file=sys.stderr)
+        return 1
+
+    start = time.time()
+    results = scan_images(files, args.plate_type, args.barcode_sizes, args.jobs)
+    if args.output is None:
+        num_plates = write_results(results, sys.stdout, args.format)
+    else:
+        with open(args.output, "w") as output:
+            num_plates = write_results(results, output, args.format)
+
+    print("Scanned {} images ({} with a plate) in {:.1f} s".format(len(files), num_plates, time.time() - start),
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    # Multiprocessing support for PyInstaller bundling in Windows
+    if sys.platform.startswith('win'):
+        multiprocessing.freeze_support()
+
+    sys.exit(main())
@@ -8,6 +8,8 @@ from .scanner_worker import ScannerWorker
 from .camera_position import CameraPosition
 from .stream_action import StreamAction
 from .capture_command import CaptureCommand
+from .frame_ring import FrameRing
+from .frame_counters import FrameCounters
 
 
 class CameraScanner:
@@ -37,8 +39,14 @@ class CameraScanner:
         self._camera_configs = {CameraPosition.SIDE: self._config.get_side_camera_config(),
                                 CameraPosition.TOP: self._config.get_top_camera_config()}
 
-        capture_args = (self._task_q, self._view_q, self._overlay_q, self._capture_command_q, self._capture_kill_q,
-                        self._camera_configs)
+        # Frames are passed between the processes through shared memory; only references to them go on the queues
+        max_frame_bytes = max(self._frame_bytes(camera_config) for camera_config in self._camera_configs.values())
+        self._task_ring = FrameRing(max_frame_bytes)
+        self._view_ring = FrameRing(max_frame_bytes)
+        self._frame_counters = FrameCounters()
+
+        capture_args = (self._task_q, self._task_ring, self._view_q, self._view_ring, self._overlay_q,
+                        self._capture_command_q, self._capture_kill_q, self._camera_configs, self._frame_counters)
 
         # The capture process is always running: we initialise the cameras only once because it's time consuming
         self._capture_process = multiprocessing.Process(target=CameraScanner._capture_worker, args=capture_args)
@@ -50,7 +58,8 @@ class CameraScanner:
         """ Spawn the processes that will continuously capture and process images from the camera.
         """
         print("\nMAIN: start triggered")
-        scanner_args = (self._task_q, self._overlay_q, self._result_q, self._message_q, self._scanner_kill_q, self._config, cam_position)
+        scanner_args = (self._task_q, self._task_ring, self._overlay_q, self._result_q, self._message_q,
+                        self._scanner_kill_q, self._config, cam_position, self._frame_counters)
         self._scanner_process = multiprocessing.Process(target=CameraScanner._scanner_worker, args=scanner_args)
 
         self._capture_command_q.put(CaptureCommand(StreamAction.START, cam_position))
@@ -71,8 +80,36 @@ class CameraScanner:
         self._process_cleanup(self._capture_process, [self._task_q, self._view_q])
         self._capture_process.join()
         self._flush_queue(self._capture_kill_q)
+        self._task_ring.close()
+        self._view_ring.close()
         print("MAIN: KILL COMPLETED")
 
+    def view_frame(self, message):
+        """ Context manager that gives the frame for a message from the view queue, or None if the frame is
+        no longer available. The frame can only be used until the context exits. """
+        return self._view_ring.frame(message)
+
+    def frame_counts(self):
+        """ The numbers of frames captured, passed to the scanner, scanned and dropped so far (see FrameCounters). """
+        return self._frame_counters.counts()
+
+    def queue_depths(self):
+        """ The number of frames waiting to be scanned and of overlays waiting to be drawn (None if the
+        platform can't tell). """
+        return {"task": self._queue_size(self._task_q), "overlay": self._queue_size(self._overlay_q)}
+
+    @staticmethod
+    def _queue_size(q):
+        try:
+            return q.qsize()
+        except NotImplementedError:
+            # Not available on macOS
+            return None
+
+    @staticmethod
+    def _frame_bytes(camera_config):
+        return camera_config.width.value() * camera_config.height.value() * 3
+
     def _flush_queue(self, queue):
         while not queue.empty():
             queue.get()
@@ -118,13 +155,17 @@ class CameraScanner:
         print("MAIN: sub-process terminated!")
 
     @staticmethod
-    def _capture_worker(task_queue, view_queue, overlay_queue, command_queue, kill_queue, camera_configs):
+    def _capture_worker(task_queue, task_ring, view_queue, view_ring, overlay_queue, command_queue, kill_queue,
+                        camera_configs, frame_counters):
         """ Function used as the main loop of a worker process.
         """
-        CaptureWorker(camera_configs).run(task_queue, view_queue, overlay_queue, command_queue, kill_queue)
+        CaptureWorker(camera_configs, frame_counters).run(task_queue, task_ring, view_queue, view_ring, overlay_queue,
+                                                          command_queue, kill_queue)
 
     @staticmethod
-    def _scanner_worker(task_queue, overlay_queue, result_queue, message_queue, kill_queue, config, cam_position):
+    def _scanner_worker(task_queue, task_ring, overlay_queue, result_queue, message_queue, kill_queue, config,
+                        cam_position, frame_counters):
         """ Function used as the main loop of a worker process.
         """
-        ScannerWorker().run(task_queue, overlay_queue, result_queue, message_queue, kill_queue, config, cam_position)
+        ScannerWorker().run(task_queue, task_ring, overlay_queue, result_queue, message_queue, kill_queue, config,
+                            cam_position, frame_counters)
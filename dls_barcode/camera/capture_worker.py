@@ -3,8 +3,8 @@ import queue
 
 from dls_util.image import Overlay
 from .stream_action import StreamAction
-from dls_util.image import Image
-from dls_util.cv import CameraStream
+from .frame_counters import FrameCounters
+from dls_util.cv import CameraStream, ReplayStream
 
 Q_LIMIT = 1
 
@@ -12,6 +12,9 @@ Q_LIMIT = 1
 MAX_SAMPLE_RATE = 10.0
 INTERVAL = 1.0 / MAX_SAMPLE_RATE
 
+# Maximum time to wait for a command before checking whether the worker has been killed
+KILL_CHECK_INTERVAL = 0.1
+
 
 class CaptureWorker:
     """Continuously captures images from the camera and puts them on a queue to be processed. The images are displayed
@@ -19,22 +22,25 @@ class CaptureWorker:
     scanned and unscanned barcodes. Cameras are initialised at startup, then the stream is stopped and started to the
     correct camera by reading the command from a start/stop command queue.
     """
-    def __init__(self, camera_configs):
+    def __init__(self, camera_configs, frame_counters=None):
         print("CAPTURE init")
         self._streams = {}
         self._camera_configs = camera_configs
+        self._counters = frame_counters if frame_counters is not None else FrameCounters()
         for cam_position, cam_config in self._camera_configs.items():
             self._streams[cam_position] = self._initialise_stream(cam_config)
 
-    def run(self, task_queue, view_queue, overlay_queue, command_queue, kill_queue):
+    def run(self, task_queue, task_ring, view_queue, view_ring, overlay_queue, command_queue, kill_queue):
         while kill_queue.empty():
-            if command_queue.empty():
+            try:
+                command = command_queue.get(timeout=KILL_CHECK_INTERVAL)
+            except queue.Empty:
                 continue
 
-            command = command_queue.get()
             if command.get_action() == StreamAction.START:
                 print("CAPTURE start: " + str(command.get_camera_position()))
-                self._run_capture(self._streams[command.get_camera_position()], task_queue, view_queue, overlay_queue, command_queue)
+                self._run_capture(self._streams[command.get_camera_position()], task_queue, task_ring, view_queue,
+                                  view_ring, overlay_queue, command_queue)
 
         # Clean up
         print("CAPTURE kill & cleanup")
@@ -43,7 +49,7 @@ class CaptureWorker:
 
         print("- capture all cleaned")
 
-    def _run_capture(self, stream, task_queue, view_queue, overlay_queue, stop_queue):
+    def _run_capture(self, stream, task_queue, task_ring, view_queue, view_ring, overlay_queue, stop_queue):
         # Store the latest image overlay which highlights the puck
         latest_overlay = Overlay(0)
         last_time = time.time()
@@ -56,11 +62,18 @@ class CaptureWorker:
 
             # Capture the next frame from the camera
             frame = stream.get_frame()
+            if frame is None:
+                # The camera failed to deliver a frame, or the replay of a recording has finished
+                continue
+            self._counters.increment(FrameCounters.CAPTURED)
+
             # Add the frame to the task queue to be processed
             # NOTE: the rate at which frames are pushed to the task queue is lower than the rate at which frames are acquired
             if task_queue.qsize() < Q_LIMIT and (time.time() - last_time >= INTERVAL):
-                # Make a copy of image so the overlay doesn't overwrite it
-                task_queue.put(frame.copy())
+                # The frame is copied into the ring (before the overlay is drawn on it) and only a reference
+                # to it goes on the queue
+                queued = self._put_frame(task_queue, task_ring, frame)
+                self._counters.increment(FrameCounters.SCAN_QUEUED if queued else FrameCounters.SCAN_DROPPED)
                 last_time = time.time()
 
             # All frames (scanned or not) are pushed to the view queue for display
@@ -76,7 +89,8 @@ class CaptureWorker:
             # Draw the overlay on the frame
             latest_overlay.draw_on_image(frame)
 
-            view_queue.put(Image(frame))
+            if not self._put_frame(view_queue, view_ring, frame):
+                self._counters.increment(FrameCounters.VIEW_DROPPED)
 
         print("CAPTURE stop & flush queues")
         self._flush_queue(task_queue)
@@ -84,7 +98,20 @@ class CaptureWorker:
         self._flush_queue(view_queue)
         print("--- capture view Q flushed")
 
+    @staticmethod
+    def _put_frame(q, ring, frame):
+        """ Put the frame on the queue (through the ring). Returns False if it was dropped because the ring
+        had no free slot. """
+        message = ring.put(frame)
+        if message is not None:
+            q.put(message)
+        return message is not None
+
     def _initialise_stream(self, camera_config):
+        if camera_config.is_replay():
+            return ReplayStream(camera_config.replay_source.value(), camera_config.replay_fps.value(),
+                                camera_config.replay_jitter.value() / 100, camera_config.replay_loop.value())
+
         cam_number = camera_config.camera_number.value()
         width = camera_config.width.value()
         height = camera_config.height.value()
@@ -0,0 +1,56 @@
+from __future__ import division
+
+import cv2 as opencv
+import numpy as np
+
+
+class FrameChangeDetector:
+    """ Cheaply detects whether a camera frame differs from a reference frame (the last one that was
+    scanned), so that frames of a scene that is standing still needn't be scanned again.
+
+    Each frame is reduced to a small grayscale thumbnail, which also averages out most of the camera noise.
+    The thumbnail is compared with that of the reference frame in a grid of cells, and the frame has changed
+    if the mean absolute difference (in grey levels) of any cell exceeds the threshold. Comparing cells,
+    rather than the whole frame, means that a small change - such as a single pin being put into or taken
+    out of a puck - isn't lost in the average over a scene that is otherwise unchanged.
+    """
+    # The width of the thumbnail that frames are compared at, and the number of cells across it
+    THUMBNAIL_WIDTH = 160
+    GRID_WIDTH = 20
+
+    def __init__(self, threshold):
+        self._threshold = threshold
+        self._reference = None
+
+    def is_unchanged(self, frame):
+        """ True if the frame (a BGR or grayscale array) is the same as the reference frame, to within
+        the threshold. False if there is no reference frame yet or the frame is a different size. """
+        if self._reference is None:
+            return False
+
+        thumbnail = self._thumbnail(frame)
+        if thumbnail.shape != self._reference.shape:
+            return False
+
+        return self._max_cell_difference(thumbnail, self._reference) <= self._threshold
+
+    def set_reference(self, frame):
+        """ Compare future frames with this one. """
+        self._reference = self._thumbnail(frame)
+
+    def _thumbnail(self, frame):
+        height, width = frame.shape[:2]
+        thumb_width = min(self.THUMBNAIL_WIDTH, width)
+        thumb_height = max(int(round(height * thumb_width / width)), 1)
+        thumbnail = opencv.resize(frame, (thumb_width, thumb_height), interpolation=opencv.INTER_AREA)
+        if thumbnail.ndim == 3:
+            thumbnail = opencv.cvtColor(thumbnail, opencv.COLOR_BGR2GRAY)
+        return thumbnail
+
+    def _max_cell_difference(self, thumbnail, reference):
+        difference = opencv.absdiff(thumbnail, reference).astype(np.float32)
+        height, width = difference.shape
+        grid_width = min(self.GRID_WIDTH, width)
+        grid_height = max(int(round(height * grid_width / width)), 1)
+        cells = opencv.resize(difference, (grid_width, grid_height), interpolation=opencv.INTER_AREA)
+        return float(cells.max())
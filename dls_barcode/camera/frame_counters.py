@@ -0,0 +1,35 @@
+import multiprocessing
+from collections import OrderedDict
+
+
+class FrameCounters:
+    """ Counts of what has happened to the frames captured from the camera, in shared memory so that the
+    capture and scanner processes can each update their counts and the process that started them can
+    read them (e.g. to measure the throughput of the live scanning). Each count is only incremented by
+    one process, so no lock is needed.
+
+    Like a FrameRing, the counters must be created before the processes are started and passed to them.
+    """
+    # Frames read from the camera
+    CAPTURED = "captured"
+    # Frames passed to the scanner process, or dropped because the frame ring had no free slot
+    SCAN_QUEUED = "scan_queued"
+    SCAN_DROPPED = "scan_dropped"
+    # Frames for display that were dropped because the frame ring had no free slot
+    VIEW_DROPPED = "view_dropped"
+    # Frames scanned, skipped by the scanner because they were the same as the last frame scanned, or whose
+    # slot in the ring had been reused before the scanner got to them
+    SCANNED = "scanned"
+    SCAN_SKIPPED = "scan_skipped"
+    SCAN_STALE = "scan_stale"
+
+    NAMES = [CAPTURED, SCAN_QUEUED, SCAN_DROPPED, VIEW_DROPPED, SCANNED, SCAN_SKIPPED, SCAN_STALE]
+
+    def __init__(self):
+        self._counts = multiprocessing.RawArray("q", len(self.NAMES))
+
+    def increment(self, name):
+        self._counts[self.NAMES.index(name)] += 1
+
+    def counts(self):
+        return OrderedDict(zip(self.NAMES, self._counts[:]))
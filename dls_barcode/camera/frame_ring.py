@@ -0,0 +1,155 @@
+import multiprocessing
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8 - frames are put on the queues as they are
+    shared_memory = None
+
+# Number of frame slots in each ring
+NUM_SLOTS = 3
+
+# Value of a slot's sequence number while a frame is being written to it
+_WRITING = -1
+
+
+class FrameRef:
+    """ The message that is put on a queue in place of a frame that has been written to a FrameRing. """
+    def __init__(self, slot, seq, shape, dtype):
+        self.slot = slot
+        self.seq = seq
+        self.shape = shape
+        self.dtype = dtype
+
+
+class FrameRing:
+    """ A fixed number of preallocated frame slots in shared memory, used to pass camera frames from one
+    process to another without pickling them. The writer copies each frame into a free slot and puts the
+    small FrameRef that put() returns on a queue instead of the frame. The reader gets the frame back with
+    frame(), as an array which is a view of the slot itself.
+
+    Only the latest frames are kept: if the slot of a ref has been reused by the time it is read, the ref
+    is stale and there is no frame for it (the reader should just move on to the next, newer, frame). A
+    slot is never reused while a reader is using its frame; if every slot is in use, new frames are
+    dropped until one is released.
+
+    Frames that are too big for the slots (or all frames, if shared memory is not available) are put on
+    the queue as they are, so the reader doesn't need to know how the frame was sent.
+
+    The ring must be created before the writer and reader processes are started and passed to them.
+    """
+    def __init__(self, max_frame_bytes, num_slots=NUM_SLOTS):
+        self._num_slots = num_slots
+        self._slot_bytes = max_frame_bytes
+        self._lock = multiprocessing.Lock()
+        self._next_slot = 0
+        self._next_seq = 1
+
+        self._shm = None
+        if shared_memory is not None:
+            header_bytes = 2 * num_slots * np.dtype(np.int64).itemsize
+            self._shm = shared_memory.SharedMemory(create=True, size=header_bytes + num_slots * max_frame_bytes)
+        self._owner_pid = os.getpid()
+        self._attach()
+
+    def _attach(self):
+        self._seqs, self._readers, self._data = None, None, None
+        if self._shm is not None:
+            header = np.ndarray((2, self._num_slots), dtype=np.int64, buffer=self._shm.buf)
+            self._seqs, self._readers = header[0], header[1]
+            self._data = self._shm.buf[header.nbytes:]
+
+    def __getstate__(self):
+        # Only used when the ring is passed to a new process (which may not be forked from this one)
+        state = self.__dict__.copy()
+        state["_shm"] = None if self._shm is None else self._shm.name
+        for name in ["_seqs", "_readers", "_data"]:
+            state[name] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._shm is not None:
+            self._shm = shared_memory.SharedMemory(name=self._shm)
+        self._attach()
+
+    def close(self):
+        """ Detach from the shared memory, and free it if this is the process that created the ring. The ring
+        can't be used in any process once the process that created it has closed it. """
+        if self._shm is None:
+            return
+
+        self._seqs, self._readers, self._data = None, None, None
+        try:
+            self._shm.close()
+        except BufferError:
+            # A frame from the ring is still referenced somewhere; the memory is unmapped once that is collected
+            pass
+        if os.getpid() == self._owner_pid:
+            self._shm.unlink()
+        self._shm = None
+
+    def put(self, frame):
+        """ Copy the frame into the ring and return the message to put on the queue for it, or None if
+        every slot is in use (in which case the frame is dropped). """
+        if self._shm is None or frame.nbytes > self._slot_bytes:
+            # Copy the frame so that it can't be changed before the queue gets round to pickling it
+            return frame.copy()
+
+        with self._lock:
+            slot = self._free_slot()
+            if slot is None:
+                return None
+            self._seqs[slot] = _WRITING
+
+        self._slot_array(slot, frame.shape, frame.dtype)[:] = frame
+
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._seqs[slot] = seq
+            self._next_slot = (slot + 1) % self._num_slots
+
+        return FrameRef(slot, seq, frame.shape, frame.dtype.str)
+
+    @contextmanager
+    def frame(self, message):
+        """ Context manager that gives the frame (as an array) for a message taken from the queue, or None
+        if the frame is no longer available. If the frame is in the ring, the array is a view of its slot,
+        so it must not be used after the context exits (copy it if it needs to be kept). """
+        if not isinstance(message, FrameRef):
+            yield message
+            return
+
+        if not self._claim(message):
+            yield None
+            return
+
+        try:
+            yield self._slot_array(message.slot, message.shape, np.dtype(message.dtype))
+        finally:
+            with self._lock:
+                self._readers[message.slot] -= 1
+
+    def _claim(self, ref):
+        with self._lock:
+            if self._shm is None or self._seqs[ref.slot] != ref.seq:
+                return False
+            self._readers[ref.slot] += 1
+            return True
+
+    def _free_slot(self):
+        for i in range(self._num_slots):
+            slot = (self._next_slot + i) % self._num_slots
+            if self._readers[slot] == 0:
+                return slot
+        return None
+
+    def _slot_array(self, slot, shape, dtype):
+        start = slot * self._slot_bytes
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        return np.ndarray(shape, dtype=dtype, buffer=self._data[start:start + nbytes])
@@ -1,15 +1,25 @@
+import queue
 import time
 
 from dls_util.image import Image
 from dls_util import Beeper
-from dls_barcode.scan import GeometryScanner, SlotScanner, OpenScanner
-from dls_barcode.datamatrix import DataMatrix
+from dls_barcode.scan import GeometryScanner, SlotScanner, OpenScanner, KnownBarcodes, SpanWindow
+from dls_barcode.datamatrix import DataMatrix, Locator
 from .camera_position import CameraPosition
 from .plate_overlay import PlateOverlay
 from .scanner_message import NoNewBarcodeMessage, ScanErrorMessage
+from .frame_counters import FrameCounters
+from .frame_change_detector import FrameChangeDetector
 
 NO_PUCK_TIME = 2
 
+# Maximum time to wait for a frame before checking whether the worker has been killed
+KILL_CHECK_INTERVAL = 0.1
+
+# When the stages of the scan are timed, the number of frames that the timings are averaged over (and
+# printed after)
+STAGE_TIMINGS_WINDOW = 50
+
 
 class ScannerWorker:
     """ Scan images for barcodes, combining partial scans until a full puck is reached.
@@ -17,15 +27,29 @@ class ScannerWorker:
     and some barcodes scanned). For each new frame, we can attempt to merge the results with
     this previous plates so that we don't have to re-read any of the previously captured barcodes
     (because this is a relatively expensive operation).
+
+    Frames that are the same as the last frame scanned (e.g. while a puck is left under the camera, or
+    between pucks) aren't scanned again unless that could improve on the last result, which is reported
+    again instead.
     """
-    def run(self, task_queue, overlay_queue, result_queue, message_queue, kill_queue, config, cam_position):
+    def run(self, task_queue, task_ring, overlay_queue, result_queue, message_queue, kill_queue, config, cam_position,
+            frame_counters=None):
         print("SCANNER start")
+        counters = frame_counters if frame_counters is not None else FrameCounters()
         self._last_puck_time = time.time()
 
         SlotScanner.DEBUG = config.slot_images.value()
         SlotScanner.DEBUG_DIR = config.slot_image_directory.value()
+        Locator.PYRAMID_MODE = config.pyramid_locator.value()
 
         self._create_scanner(cam_position, config)
+        self._stage_timings = SpanWindow(STAGE_TIMINGS_WINDOW)
+        self._frames_since_timings = 0
+
+        self._last_result = None
+        self._change_detector = None
+        if config.skip_unchanged_frames.value():
+            self._change_detector = FrameChangeDetector(config.frame_change_threshold.value())
 
         display = True
         while kill_queue.empty():
@@ -33,12 +57,24 @@ class ScannerWorker:
                 print("--- scanner inside loop")
                 display = False
 
-            if task_queue.empty():
+            try:
+                message = task_queue.get(timeout=KILL_CHECK_INTERVAL)
+            except queue.Empty:
                 continue
 
-            frame = task_queue.get(True)
-            self._process_frame(frame, config, overlay_queue, result_queue, message_queue)
-
+            with task_ring.frame(message) as frame:
+                if frame is None:
+                    counters.increment(FrameCounters.SCAN_STALE)
+                elif self._is_redundant(frame):
+                    # Scanning the frame again would give the same result, so report that result again
+                    self._report_result(self._last_result, frame, config, overlay_queue, result_queue,
+                                        message_queue, is_repeat=True)
+                    counters.increment(FrameCounters.SCAN_SKIPPED)
+                else:
+                    self._process_frame(frame, config, overlay_queue, result_queue, message_queue)
+                    counters.increment(FrameCounters.SCANNED)
+
+        self._scanner.close()
         print("SCANNER stop & kill")
 
     def _process_frame(self, frame, config, overlay_queue, result_queue, message_queue):
@@ -50,8 +86,30 @@ class ScannerWorker:
         # barcode read is expensive.
         scan_result = self._scanner.scan_next_frame(gray_image)
 
-        if config.console_frame.value():
-            scan_result.print_summary()
+        self._last_result = scan_result
+        if self._change_detector is not None:
+            self._change_detector.set_reference(frame)
+
+        self._report_result(scan_result, frame, config, overlay_queue, result_queue, message_queue)
+
+    def _is_redundant(self, frame):
+        """ True if the frame needn't be scanned: it is the same as the last frame that was scanned, and
+        scanning that again couldn't give a better result. """
+        if self._change_detector is None or self._last_result is None:
+            return False
+
+        return not self._last_result.could_improve_on_same_image() and self._change_detector.is_unchanged(frame)
+
+    def _report_result(self, scan_result, frame, config, overlay_queue, result_queue, message_queue,
+                       is_repeat=False):
+        """ Pass on the result of a scan. A repeat of the result (for a frame that wasn't scanned because it
+        was the same as the one that gave the result) keeps the overlay and messages up to date, but the
+        barcodes that it read aren't new any more. """
+        if not is_repeat:
+            if config.console_frame.value():
+                scan_result.print_summary()
+
+            self._add_stage_timings(scan_result)
 
         if scan_result.success():
             # Record the time so we can see how long its been since we last saw a puck
@@ -62,8 +120,9 @@ class ScannerWorker:
                 overlay_queue.put(PlateOverlay(plate, config))
                 self._plate_beep(plate, config.scan_beep.value())
 
-            if scan_result.any_new_barcodes():
-                result_queue.put((plate, image))
+            if scan_result.any_new_barcodes() and not is_repeat:
+                # The frame belongs to the frame ring and will be reused, so send a copy of it
+                result_queue.put((plate, Image(frame.copy())))
         elif scan_result.any_valid_barcodes():
             # We have read valid barcodes but they are not new, so the scanner didn't even output a plate
             self._last_puck_time = time.time()
@@ -72,6 +131,19 @@ class ScannerWorker:
             #TODO use log
             message_queue.put(ScanErrorMessage(scan_result.error()))
 
+    def _add_stage_timings(self, scan_result):
+        """ Add the timings of the stages of the scan to the rolling window, and print the average over the
+        window each time it has filled up with new frames. """
+        spans = scan_result.spans()
+        if not spans.is_enabled():
+            return
+
+        self._stage_timings.add(spans)
+        self._frames_since_timings += 1
+        if self._frames_since_timings >= STAGE_TIMINGS_WINDOW:
+            self._frames_since_timings = 0
+            print("\n".join(self._stage_timings.summary()))
+
     def _create_scanner(self, cam_position, config):
         if cam_position == CameraPosition.SIDE:
             plate_type = "None"
@@ -80,10 +152,14 @@ class ScannerWorker:
             plate_type = config.plate_type.value()
             barcode_sizes = [config.top_barcode_size.value()]
 
+        record_spans = config.stage_timings.value()
         if plate_type == "None":
-            self._scanner = OpenScanner(barcode_sizes)
+            known_barcodes = KnownBarcodes(config.known_barcodes_capacity.value(), config.known_barcodes_policy.value(),
+                                           config.known_barcodes_lifetime.value())
+            self._scanner = OpenScanner(barcode_sizes, record_spans, known_barcodes)
         else:
-            self._scanner = GeometryScanner(plate_type, barcode_sizes)
+            self._scanner = GeometryScanner(plate_type, barcode_sizes, config.decode_processes.value(), record_spans,
+                                            config.track_puck.value())
 
     def _plate_beep(self, plate, do_beep):
         if not do_beep:
@@ -1,2 +1,7 @@
 from .barcode_config import BarcodeConfig
-from .barcode_config_dialog import BarcodeConfigDialog
+
+try:
+    from .barcode_config_dialog import BarcodeConfigDialog
+except ImportError:
+    # The dialog needs PyQt4; the config can be used without it (e.g. by the load test)
+    pass
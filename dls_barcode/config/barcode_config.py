@@ -3,6 +3,8 @@ import sys
 from dls_barcode.geometry import Geometry
 from dls_barcode.datamatrix import DataMatrix
 from dls_barcode.datamatrix.read import DatamatrixSizeTable
+from dls_barcode.data_store.image_writer import ImageEncoding
+from dls_barcode.scan.open.known_barcodes import KnownBarcodes
 from dls_util.image import Color
 from dls_util.config import Config, DirectoryConfigItem, ColorConfigItem, \
     IntConfigItem, BoolConfigItem, EnumConfigItem
@@ -37,6 +39,17 @@ class BarcodeConfig(Config):
 
         self.scan_beep = add(BoolConfigItem, "Beep While Scanning", default=True)
         self.scan_clipboard = add(BoolConfigItem, "Results to Clipboard", default=True)
+        self.decode_processes = add(IntConfigItem, "Decode Processes", default=1)
+        self.pyramid_locator = add(BoolConfigItem, "Coarse-to-fine Locator", default=False)
+        self.track_puck = add(BoolConfigItem, "Track Puck", default=True)
+        self.known_barcodes_capacity = add(IntConfigItem, "Known Barcodes Capacity",
+                                           default=KnownBarcodes.DEFAULT_CAPACITY)
+        self.known_barcodes_policy = add(EnumConfigItem, "Known Barcodes Eviction", default=KnownBarcodes.LRU,
+                                         extra_arg=KnownBarcodes.POLICIES)
+        self.known_barcodes_lifetime = add(IntConfigItem, "Known Barcodes Lifetime",
+                                           default=KnownBarcodes.DEFAULT_LIFETIME, extra_arg="s")
+        self.skip_unchanged_frames = add(BoolConfigItem, "Skip Unchanged Frames", default=True)
+        self.frame_change_threshold = add(IntConfigItem, "Frame Change Threshold", default=8)
 
         self.image_puck = add(BoolConfigItem, "Puck Highlight", default=True)
         self.image_pins = add(BoolConfigItem, "Slots Highlight", default=True)
@@ -44,18 +57,30 @@ class BarcodeConfig(Config):
 
         self.store_directory = add(DirectoryConfigItem, "Store Directory", default=default_store)
         self.store_capacity = add(IntConfigItem, "Results History Size", default=50)
+        self.store_image_format = add(EnumConfigItem, "Image Format", default=ImageEncoding.PNG,
+                                      extra_arg=ImageEncoding.FORMATS)
+        self.store_png_compression = add(IntConfigItem, "PNG Compression Level", default=3)
+        self.store_image_quality = add(IntConfigItem, "JPEG/WebP Quality", default=95, extra_arg="%")
+        self.store_image_scale = add(IntConfigItem, "Image Scale", default=100, extra_arg="%")
 
         self.console_frame = add(BoolConfigItem, "Print Frame Summary", default=False)
+        self.stage_timings = add(BoolConfigItem, "Print Stage Timings", default=False)
         self.slot_images = add(BoolConfigItem, "Save Debug Images", default=False)
         self.slot_image_directory = add(DirectoryConfigItem, "Debug Directory", default="../debug-output/")
 
         self.top_camera_number = add(IntConfigItem, "Top Camera Number", default=1)
         self.top_camera_width = add(IntConfigItem, "Top Camera Width", default=1600)
         self.top_camera_height = add(IntConfigItem, "Top Camera Height", default=1200)
+        self.top_camera_replay = add(DirectoryConfigItem, "Top Camera Replay Source", default="")
 
         self.side_camera_number = add(IntConfigItem, "Side Camera Number", default=2)
         self.side_camera_width = add(IntConfigItem, "Side Camera Width", default=1600)
         self.side_camera_height = add(IntConfigItem, "Side Camera Height", default=1200)
+        self.side_camera_replay = add(DirectoryConfigItem, "Side Camera Replay Source", default="")
+
+        self.replay_fps = add(IntConfigItem, "Replay Frame Rate", default=10, extra_arg="fps")
+        self.replay_jitter = add(IntConfigItem, "Replay Jitter", default=0, extra_arg="%")
+        self.replay_loop = add(BoolConfigItem, "Loop Replay", default=True)
 
         self.initialize_from_file()
 
@@ -72,10 +97,12 @@ class BarcodeConfig(Config):
         return self.color_empty.value()
 
     def get_top_camera_config(self):
-        return CameraConfig(self.top_camera_number, self.top_camera_width, self.top_camera_height)
+        return CameraConfig(self.top_camera_number, self.top_camera_width, self.top_camera_height,
+                            self.top_camera_replay, self.replay_fps, self.replay_jitter, self.replay_loop)
 
     def get_side_camera_config(self):
-        return CameraConfig(self.side_camera_number, self.side_camera_width, self.side_camera_height)
+        return CameraConfig(self.side_camera_number, self.side_camera_width, self.side_camera_height,
+                            self.side_camera_replay, self.replay_fps, self.replay_jitter, self.replay_loop)
 
 
 
@@ -47,6 +47,14 @@ class BarcodeConfigDialog(ConfigDialog):
         self.start_group("Scanning")
         add(cfg.scan_beep)
         add(cfg.scan_clipboard)
+        add(cfg.decode_processes)
+        add(cfg.pyramid_locator)
+        add(cfg.track_puck)
+        add(cfg.skip_unchanged_frames)
+        add(cfg.frame_change_threshold)
+        add(cfg.known_barcodes_capacity)
+        add(cfg.known_barcodes_policy)
+        add(cfg.known_barcodes_lifetime)
 
         self.start_group("Result Image")
         add(cfg.image_puck)
@@ -56,10 +64,22 @@ class BarcodeConfigDialog(ConfigDialog):
         self.start_group("Store")
         self._add_control(StoreDirectoryConfigControl(cfg.store_directory))
         add(cfg.store_capacity)
+        add(cfg.store_image_format)
+        add(cfg.store_png_compression)
+        add(cfg.store_image_quality)
+        add(cfg.store_image_scale)
 
         self.start_group("Debug")
         add(cfg.console_frame)
+        add(cfg.stage_timings)
         add(cfg.slot_images)
         add(cfg.slot_image_directory)
 
+        self.start_group("Replay")
+        add(cfg.top_camera_replay)
+        add(cfg.side_camera_replay)
+        add(cfg.replay_fps)
+        add(cfg.replay_jitter)
+        add(cfg.replay_loop)
+
 
@@ -1,8 +1,19 @@
 
 class CameraConfig:
-    """Class that groups the config items of a single camera"""
-    def __init__(self, camera_number, width, height):
+    """Class that groups the config items of a single camera. If the replay source (a video file or a directory
+    or pattern of images) is set, the recording is replayed, at the replay frame rate, instead of capturing from
+    the camera."""
+    def __init__(self, camera_number, width, height, replay_source=None, replay_fps=None, replay_jitter=None,
+                 replay_loop=None):
         self.camera_number = camera_number
         self.width = width
         self.height = height
 
+        self.replay_source = replay_source
+        self.replay_fps = replay_fps
+        self.replay_jitter = replay_jitter
+        self.replay_loop = replay_loop
+
+    def is_replay(self):
+        return self.replay_source is not None and bool(self.replay_source.value())
+
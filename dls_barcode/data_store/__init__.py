@@ -1 +1,2 @@
 from .store import Store
+from .image_writer import ImageWriter
@@ -0,0 +1,127 @@
+from __future__ import division
+
+import atexit
+import queue
+import threading
+import traceback
+
+import cv2 as opencv
+
+# Maximum number of images waiting to be written; adding another one waits until there is room
+QUEUE_SIZE = 8
+
+
+class ImageEncoding:
+    """ The file format (and its compression/quality setting) and the scale that a record image is written
+    with. """
+    PNG = "png"
+    JPEG = "jpg"
+    WEBP = "webp"
+    FORMATS = [PNG, JPEG, WEBP]
+
+    def __init__(self, format=PNG, png_compression=3, quality=95, scale=100):
+        """
+        :param format: one of FORMATS
+        :param png_compression: zlib compression level of PNG images (0-9)
+        :param quality: quality of JPEG and WebP images (1-100)
+        :param scale: the percentage of the original size that the image is scaled to (1-100)
+        """
+        self.format = format if format in self.FORMATS else self.PNG
+        self.png_compression = min(max(int(png_compression), 0), 9)
+        self.quality = min(max(int(quality), 1), 100)
+        self.scale = min(max(int(scale), 1), 100) / 100
+
+    @staticmethod
+    def from_config(config):
+        return ImageEncoding(config.store_image_format.value(), config.store_png_compression.value(),
+                             config.store_image_quality.value(), config.store_image_scale.value())
+
+    def extension(self):
+        return "." + self.format
+
+    def params(self):
+        """ The OpenCV encoding options for the format. """
+        if self.format == self.JPEG:
+            return [opencv.IMWRITE_JPEG_QUALITY, self.quality]
+        elif self.format == self.WEBP:
+            return [opencv.IMWRITE_WEBP_QUALITY, self.quality]
+        return [opencv.IMWRITE_PNG_COMPRESSION, self.png_compression]
+
+    def write(self, image, filename):
+        """ Scale the image and write it to the file (whose extension should match the format). """
+        if self.scale < 1:
+            image = image.rescale(self.scale)
+        image.save_as(filename, params=self.params())
+
+
+class ImageWriter:
+    """ Writes images to file on a background thread, in the order that they are queued, so that the
+    caller doesn't have to wait for them to be encoded. The queue is bounded: if the writer falls behind,
+    write() waits until there is room for the image. Any queued images are written before the program
+    exits.
+    """
+    def __init__(self, file_manager, queue_size=QUEUE_SIZE):
+        self._file_manager = file_manager
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="ImageWriter")
+        self._thread.daemon = True
+        self._thread.start()
+        atexit.register(self.close)
+
+    def write(self, image, filename, encoding, callback=None):
+        """ Queue the image to be written to the file. The image must not be changed after it is queued.
+        When it has been written, callback(filename, error) is called (on the writer thread), where error
+        is None or the exception that stopped the image from being written. """
+        self._queue.put((self._write, (image, filename, encoding, callback)))
+
+    def remove(self, filename):
+        """ Queue the removal of the file, once any images that are queued before it have been written. """
+        self._queue.put((self._remove, (filename,)))
+
+    def write_lines(self, filename, get_lines):
+        """ Queue the (text) file to be rewritten with the list of lines returned by get_lines(), which is
+        called on the writer thread when the file is written, so the lines can be built from the latest
+        state then rather than by the caller. """
+        self._queue.put((self._write_lines, (filename, get_lines)))
+
+    def flush(self):
+        """ Wait until all of the images queued so far have been written. """
+        self._queue.join()
+
+    def close(self):
+        """ Write any queued images and stop the writer thread. """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                function, args = job
+                function(*args)
+            except Exception:
+                # Keep the writer running for the rest of the queue
+                traceback.print_exc()
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _write(image, filename, encoding, callback):
+        error = None
+        try:
+            encoding.write(image, filename)
+        except Exception as ex:
+            error = ex
+
+        if callback is not None:
+            callback(filename, error)
+
+    def _write_lines(self, filename, get_lines):
+        self._file_manager.write_lines(filename, get_lines())
+
+    def _remove(self, filename):
+        if self._file_manager.is_file(filename):
+            self._file_manager.remove(filename)
@@ -20,7 +20,8 @@ class Record:
     IND_PLATE = 3
     IND_BARCODES = 4
     IND_GEOMETRY = 5
-    NUM_RECORD_ITEMS = 6
+    IND_IMAGE_SCALE = 6
+    NUM_RECORD_ITEMS = 7
 
     # Constants
     ITEM_SEPARATOR = ";"
@@ -29,7 +30,8 @@ class Record:
 
     BAD_SYMBOLS = [EMPTY_SLOT_SYMBOL, NOT_FOUND_SLOT_SYMBOL]
 
-    def __init__(self, plate_type, holder_barcode, barcodes, image_path, geometry, timestamp=0.0, id=0):
+    def __init__(self, plate_type, holder_barcode, barcodes, image_path, geometry, timestamp=0.0, id=0,
+                 image_scale=1.0):
         """
         :param plate_type: the type of the sample holder plate (string)
         :param holder_barcode: the barcode of the holder plate
@@ -39,6 +41,8 @@ class Record:
         :param timestamp: number of seconds since the epoch (use time.time(); generated
             automatically if a value isn't supplied
         :param id: uid for the record; one will be generated if not supplied
+        :param image_scale: the scale that the image was saved at, relative to the scan (the geometry is
+            in the coordinates of the scan)
         """
         try:
             self.timestamp = float(timestamp)
@@ -52,6 +56,11 @@ class Record:
         self.geometry = geometry
         self.id = str(id)
 
+        try:
+            self.image_scale = float(image_scale)
+        except ValueError:
+            self.image_scale = 1.0
+
         # todo: find a work around for this (i.e. encode the semi colons)
         # Remove ";" from barcode data
         for i, bc in enumerate(self.barcodes):
@@ -76,9 +85,9 @@ class Record:
         self.num_valid_barcodes = self.num_slots - self.num_unread_slots - self.num_empty_slots
 
     @staticmethod
-    def from_plate(holder_barcode, plate, image_path):
+    def from_plate(holder_barcode, plate, image_path, image_scale=1.0):
         return Record(plate_type=plate.type, holder_barcode=holder_barcode, barcodes=plate.barcodes(),
-                      image_path=image_path, geometry=plate.geometry())
+                      image_path=image_path, geometry=plate.geometry(), image_scale=image_scale)
 
     @staticmethod
     def from_string(string):
@@ -97,8 +106,11 @@ class Record:
         geo_class = Geometry.get_class(plate_type)
         geometry = geo_class.deserialize(items[Record.IND_GEOMETRY])
 
+        # Records written by older versions don't have an image scale
+        image_scale = items[Record.IND_IMAGE_SCALE] if len(items) > Record.IND_IMAGE_SCALE else 1.0
+
         return Record(plate_type=plate_type, holder_barcode=holder_barcode, barcodes=pin_barcodes, timestamp=timestamp,
-                      image_path=image, id=id, geometry=geometry)
+                      image_path=image, id=id, geometry=geometry, image_scale=image_scale)
 
     def to_csv_string(self):
         """ Converts a scan record object into a string that can be stored in a csv file.
@@ -121,6 +133,7 @@ class Record:
         items[Record.IND_PLATE] = self.plate_type
         items[Record.IND_BARCODES] = Record.BC_SEPARATOR.join(self._all_barcodes())
         items[Record.IND_GEOMETRY] = self.geometry.serialize()
+        items[Record.IND_IMAGE_SCALE] = str(self.image_scale)
         return Record.ITEM_SEPARATOR.join(items)
 
     def _all_barcodes(self):
@@ -128,11 +141,16 @@ class Record:
 
     def _image(self):
         image = Image.from_file(self.image_path)
+        if self.image_scale != 1.0:
+            # Back to the size of the scan, so that the geometry can be drawn on it
+            image = image.rescale(1.0 / self.image_scale)
         return image
 
-    def marked_image(self, options):
+    def marked_image(self, options, image=None):
+        """ Get the image of the scan with the puck and pins marked on it as set in the options. If the image
+        is supplied (because it has already been loaded), a copy of it is marked instead of loading it again. """
         geo = self.geometry
-        image = self._image()
+        image = self._image() if image is None else image.copy()
 
         if options.image_puck.value():
             geo.draw_plate(image, Color.Blue())
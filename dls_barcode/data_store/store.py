@@ -1,14 +1,38 @@
 import uuid
 import os
 
+from .image_writer import ImageEncoding
 from .record import Record
+from .thumbnail_cache import ThumbnailCache
+
+# Prefix of a line in the store file that marks the record with the following id as deleted
+TOMBSTONE = "DELETED" + Record.ITEM_SEPARATOR
+
+# The store file is compacted once it has more than this many lines per live record (plus the minimum)
+COMPACTION_FACTOR = 2
+COMPACTION_MIN_LINES = 20
 
 
 class Store:
     """ Maintains a list of records of previous barcodes scans. Any changes (additions
     or deletions) are automatically written to the backing file.
+
+    The backing file is a journal: new records are appended to it, and deleted records are marked by
+    appending a tombstone line, so a change doesn't have to rewrite the whole file. When the file has
+    built up enough deleted or replaced lines, it is compacted (rewritten with just the current records).
+    A store file that is just a list of records (as written by older versions) is read as it is. The csv
+    file is not a journal: it lists the current records (most recent first), as it is exported by users.
+    Rewriting it takes time in proportion to the number of records, so with an ImageWriter it is rewritten
+    by the writer in the background after a change (changes made before the rewrite has started share
+    it); without one, it is only rewritten when the store is compacted.
+
+    Display-sized thumbnails of the marked images of the records are kept in a ThumbnailCache, in the
+    thumb_dir directory next to img_dir.
+
+    If an ImageWriter is supplied, the images of new records are written by it in the background: the
+    record is added straight away, and its image is kept in memory until it has been written.
     """
-    def __init__(self, directory, store_capacity, file_manager):
+    def __init__(self, directory, store_capacity, file_manager, image_writer=None):
         """ Initializes a new instance of Store.
         """
         self._store_capacity = store_capacity
@@ -17,31 +41,53 @@ class Store:
         self._file = os.path.join(directory, "store.txt")
         self._csv_file = os.path.join(directory, "store.csv")
         self._img_dir = os.path.join(directory, "img_dir")
+        self._thumbnails = ThumbnailCache(os.path.join(directory, "thumb_dir"), file_manager,
+                                          image_writer=image_writer)
+        self._image_writer = image_writer
+
+        # The images of new records that are waiting to be written, by filename
+        self._pending_images = {}
 
         if not self._file_manager.is_dir(self._img_dir):
             self._file_manager.make_dir(self._img_dir)
 
         self.records = []
+        self._records_by_id = {}
+        self._records_by_holder = {}
+        self._journal_length = 0
+        self._csv_write_queued = False
         self._load_records_from_file()
-        self._sort_records()
 
     def _load_records_from_file(self):
         """ Clear the current record store and load a new set of records from the specified file. """
-        self.records = []
+        self._set_records([])
+        self._journal_length = 0
 
         if not self._file_manager.is_file(self._file):
             return
 
+        # Replay the journal
+        records_by_id = {}
         lines = self._file_manager.read_lines(self._file)
         for line in lines:
+            if line.startswith(TOMBSTONE):
+                records_by_id.pop(line[len(TOMBSTONE):].strip(), None)
+                continue
+
             try:
                 record = Record.from_string(line)
-                self.records.append(record)
+                records_by_id.pop(record.id, None)
+                records_by_id[record.id] = record
             except Exception:
                 print("Failed to parse store Record: {}".format(line))
 
+        self._set_records(list(records_by_id.values()))
+        self._journal_length = len(lines)
         self._truncate_record_list()
 
+        if self._journal_length > len(self.records):
+            self._compact()
+
     def size(self):
         """ Returns the number of records in the store
         """
@@ -52,37 +98,73 @@ class Store:
         """
         return self.records[index] if self.records else None
 
-    def _add_record(self, holder_barcode, plate, holder_img, pins_img):
+    def get_record_by_id(self, id):
+        """ Get the record with the specified id, or None if there isn't one. """
+        return self._records_by_id.get(id)
+
+    def records_for_holder(self, holder_barcode):
+        """ Get all of the records of the holder with the specified barcode, most recent first. """
+        return list(self._records_by_holder.get(holder_barcode, []))
+
+    def marked_image(self, record, options):
+        """ Get a display-sized version of the record's marked image (see Record.marked_image). """
+        return self._thumbnails.marked_image(record, options, self._pending_images.get(record.image_path))
+
+    def _add_record(self, holder_barcode, plate, holder_img, pins_img, options):
         """ Add a new record to the store and save to the backing file.
         """
+        encoding = ImageEncoding() if options is None else ImageEncoding.from_config(options)
         merged_img = self._merge_holder_image_into_pins_image(holder_img, pins_img)
         guid = str(uuid.uuid4())
-        filename = os.path.abspath(os.path.join(self._img_dir, guid + '.png'))
-        merged_img.save_as(filename)
+        filename = os.path.abspath(os.path.join(self._img_dir, guid + encoding.extension()))
+        self._save_image(merged_img, filename, encoding)
 
-        record = Record.from_plate(holder_barcode, plate, filename)
+        record = Record.from_plate(holder_barcode, plate, filename, encoding.scale)
+        if options is not None:
+            self._thumbnails.add(record, merged_img, options)
 
-        self.records.append(record)
-        self._process_change()
+        if self.records and record.timestamp < self.records[0].timestamp:
+            self._set_records(self.records + [record])
+        else:
+            self.records.insert(0, record)
+            self._index_record(record)
 
-    def merge_record(self, holder_barcode, plate, holder_img, pins_img):
+        self._append_to_journal([record.to_string() + "\n"])
+
+    def merge_record(self, holder_barcode, plate, holder_img, pins_img, options=None):
         """ Create new record or replace existing record if it has the same holder barcode as the most
-        recent record. Save to backing store. """
+        recent record. Save to backing store. If the options are given, the image is saved with the image
+        encoding that they specify, and the thumbnail of the new record's marked image is created for their
+        display options straight away. """
         if self.records and self.records[0].holder_barcode == holder_barcode:
-            self.delete_records([self.records[0]])
+            self._remove_records([self.records[0]])
 
-        self._add_record(holder_barcode, plate, holder_img, pins_img)
+        self._add_record(holder_barcode, plate, holder_img, pins_img, options)
+        self._process_change()
 
     def delete_records(self, records_to_delete):
         """ Remove all of the records in the supplied list from the store and
         save changes to the backing file.
         """
-        for record in records_to_delete:
-            self.records.remove(record)
-            if self._file_manager.is_file(record.image_path):
+        self._remove_records(records_to_delete)
+        self._process_change()
+
+    def _remove_records(self, records_to_delete):
+        """ Remove the records from the store and mark them as deleted in the backing file. """
+        ids_to_delete = set(record.id for record in records_to_delete)
+        deleted = [record for record in self.records if record.id in ids_to_delete]
+        self.records = [record for record in self.records if record.id not in ids_to_delete]
+
+        for record in deleted:
+            self._unindex_record(record)
+            self._thumbnails.remove(record)
+            if record.image_path in self._pending_images:
+                self._image_writer.remove(record.image_path)
+            elif self._file_manager.is_file(record.image_path):
                 self._file_manager.remove(record.image_path)
 
-        self._process_change()
+        if deleted:
+            self._append_to_journal([TOMBSTONE + record.id + "\n" for record in deleted])
 
     def _truncate_record_list(self):
         min_store_capacity = 2
@@ -90,32 +172,96 @@ class Store:
 
         if len(self.records) > actual_store_capacity:
             to_delete = self.records[actual_store_capacity:]
-            self.delete_records(to_delete)
+            self._remove_records(to_delete)
 
     def _process_change(self):
-        """ Sort the records and save to file.
+        """ Truncate the records, queue the rewrite of the csv file, and compact the backing file if it has
+        grown too large.
         """
-        self._sort_records()
         self._truncate_record_list()
-        self._to_file()
-        self._to_csv_file()
+        self._queue_csv_write()
+
+        if self._journal_length > COMPACTION_FACTOR * len(self.records) + COMPACTION_MIN_LINES:
+            self._compact()
+
+    def _set_records(self, records):
+        """ Replace the records with the list (in any order) and rebuild the indexes. """
+        self.records = records
+        self._sort_records()
+
+        self._records_by_id = {}
+        self._records_by_holder = {}
+        for record in reversed(self.records):
+            self._index_record(record)
+
+    def _index_record(self, record):
+        """ Add a record that is more recent than any other in the store to the indexes. """
+        self._records_by_id[record.id] = record
+        self._records_by_holder.setdefault(record.holder_barcode, []).insert(0, record)
+
+    def _unindex_record(self, record):
+        del self._records_by_id[record.id]
+        holder_records = self._records_by_holder[record.holder_barcode]
+        holder_records.remove(record)
+        if not holder_records:
+            del self._records_by_holder[record.holder_barcode]
 
     def _sort_records(self):
         """ Sort the records in descending date order (most recent first).
         """
         self.records.sort(reverse=True, key=lambda record: record.timestamp)
 
+    def _append_to_journal(self, lines):
+        self._file_manager.append_lines(self._file, lines)
+        self._journal_length += len(lines)
+
+    def _compact(self):
+        """ Rewrite the backing file so that it only contains the current records (and the csv file, if it
+        isn't rewritten in the background). """
+        self._to_file()
+        if self._image_writer is None:
+            self._to_csv_file()
+        self._journal_length = len(self.records)
+
     def _to_file(self):
         """ Save the contents of the store to the backing file
         """
-        record_lines = [rec.to_string() + "\n" for rec in self.records]
+        record_lines = [rec.to_string() + "\n" for rec in reversed(self.records)]
         self._file_manager.write_lines(self._file, record_lines)
 
     def _to_csv_file(self):
         """ Save the contents of the store to the backing csv file
         """
-        record_lines = [rec.to_csv_string() + "\n" for rec in self.records]
-        self._file_manager.write_lines(self._csv_file, record_lines)
+        self._file_manager.write_lines(self._csv_file, self._csv_lines())
+
+    def _queue_csv_write(self):
+        """ Have the image writer rewrite the csv file, unless a rewrite is already queued (and not yet
+        started), which will include the latest changes. """
+        if self._image_writer is not None and not self._csv_write_queued:
+            self._csv_write_queued = True
+            self._image_writer.write_lines(self._csv_file, self._queued_csv_lines)
+
+    def _queued_csv_lines(self):
+        """ Called by the image writer (on its own thread) when it rewrites the csv file. """
+        # Clear the flag before the records are read, so any later change queues another rewrite
+        self._csv_write_queued = False
+        return self._csv_lines()
+
+    def _csv_lines(self):
+        return [rec.to_csv_string() + "\n" for rec in list(self.records)]
+
+    def _save_image(self, image, filename, encoding):
+        if self._image_writer is None:
+            encoding.write(image, filename)
+        else:
+            self._pending_images[filename] = image
+            self._image_writer.write(image, filename, encoding, self._image_written)
+
+    def _image_written(self, filename, error):
+        """ Called by the image writer (on its own thread) when the image of a record has been written. """
+        self._pending_images.pop(filename, None)
+        if error is not None:
+            print("Failed to write store image {}: {}".format(filename, error))
 
     def _merge_holder_image_into_pins_image(self, holder_img, pins_img):
         factor = 0.22 * pins_img.width / holder_img.width
@@ -0,0 +1,104 @@
+from __future__ import division
+
+import os
+from collections import OrderedDict
+
+from dls_util.image import Image
+from .image_writer import ImageEncoding
+
+# Thumbnails are scaled down so that neither side is larger than this (in pixels)
+THUMBNAIL_SIZE = 800
+
+# Number of thumbnails that are kept in memory
+CACHE_CAPACITY = 50
+
+
+class ThumbnailCache:
+    """ Display-sized versions of the marked images of the records in a Store (see Record.marked_image). The
+    marks depend on the display options, so there is a thumbnail for each combination of record and options
+    that has been displayed. The most recently used thumbnails are kept in memory; all of them are written
+    to files in the thumbnail directory, so that a record's full sized image only has to be loaded the
+    first time it is displayed with a given set of options. If an ImageWriter is supplied, the files are
+    written (and removed) by it in the background.
+    """
+    def __init__(self, directory, file_manager, capacity=CACHE_CAPACITY, image_writer=None):
+        self._directory = directory
+        self._file_manager = file_manager
+        self._capacity = capacity
+        self._image_writer = image_writer
+        self._thumbnails = OrderedDict()
+
+        # The options keys that there may be thumbnail files for (found when first needed)
+        self._options_keys = None
+
+    def add(self, record, image, options):
+        """ Create the thumbnail of a new record from its (already loaded) image. """
+        self.marked_image(record, options, image)
+
+    def marked_image(self, record, options, image=None):
+        """ Get the thumbnail of the record's image, marked as set in the options. """
+        key = (record.id, self._options_key(options))
+        thumbnail = self._thumbnails.pop(key, None)
+        if thumbnail is None:
+            self._known_options_keys().add(key[1])
+            thumbnail = self._load_or_render(record, options, key, image)
+
+        self._thumbnails[key] = thumbnail
+        while len(self._thumbnails) > self._capacity:
+            self._thumbnails.popitem(last=False)
+        return thumbnail
+
+    def remove(self, record):
+        """ Remove all of the thumbnails of the record, from memory and from disk. """
+        for key in [key for key in self._thumbnails if key[0] == record.id]:
+            del self._thumbnails[key]
+
+        for options_key in self._known_options_keys():
+            filename = self._filename((record.id, options_key))
+            if self._image_writer is not None:
+                # The file might still be waiting to be written
+                self._image_writer.remove(filename)
+            elif self._file_manager.is_file(filename):
+                self._file_manager.remove(filename)
+
+    def _known_options_keys(self):
+        """ The options keys of all of the thumbnail files, so that the files of a record can be found without
+        listing the directory each time. It is listed once, for the files written by earlier runs; the keys
+        of the files written since are added as they are rendered. """
+        if self._options_keys is None:
+            self._options_keys = set()
+            if self._file_manager.is_dir(self._directory):
+                for filename in self._file_manager.list_dir(self._directory):
+                    _, separator, options_key = filename.partition("_")
+                    if separator and options_key.endswith(".png"):
+                        self._options_keys.add(options_key[:-len(".png")])
+        return self._options_keys
+
+    def _filename(self, key):
+        return os.path.join(self._directory, "{}_{}.png".format(*key))
+
+    def _load_or_render(self, record, options, key, image):
+        filename = self._filename(key)
+        if image is None and self._file_manager.is_file(filename):
+            return Image.from_file(filename)
+
+        thumbnail = record.marked_image(options, image)
+        largest_side = max(thumbnail.width, thumbnail.height)
+        if largest_side > THUMBNAIL_SIZE:
+            thumbnail = thumbnail.rescale(THUMBNAIL_SIZE / largest_side)
+
+        if not self._file_manager.is_dir(self._directory):
+            self._file_manager.make_dir(self._directory)
+        if self._image_writer is not None:
+            self._image_writer.write(thumbnail, filename, ImageEncoding())
+        else:
+            thumbnail.save_as(filename)
+        return thumbnail
+
+    @staticmethod
+    def _options_key(options):
+        """ A string that identifies the display options that affect the marked image (it is used in the
+        thumbnail filenames). """
+        flags = [options.image_puck.value(), options.image_pins.value(), options.image_crop.value()]
+        colors = [options.col_ok(), options.col_bad(), options.col_empty()]
+        return "".join(str(int(bool(flag))) for flag in flags) + "".join(color.to_hex()[1:] for color in colors)
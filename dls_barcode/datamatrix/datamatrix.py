@@ -1,4 +1,5 @@
 from .locate import Locator
+from .finder_pattern import FinderPattern
 from .read import DatamatrixSizeTable
 from .read import DatamatrixReaderError, ReedSolomonError
 from .read import DatamatrixBitReader
@@ -41,7 +42,7 @@ class DataMatrix:
         error correction bytes).
         """
         self._finder_pattern = finder_pattern
-        self._image = image.img
+        self._image = image
         self._matrix_sizes = [self.DEFAULT_SIZE]
 
         self._data = None
@@ -50,9 +51,19 @@ class DataMatrix:
         self._damaged_symbol = False
         self._is_read_performed = False
 
+        # How many sample positions (offsets) were tried, and how many symbols had to be corrected
+        self._read_attempts = 0
+        self._num_corrections = 0
+
     def set_matrix_sizes(self, matrix_sizes):
         self._matrix_sizes = [int(v) for v in matrix_sizes]
 
+    def matrix_sizes(self):
+        return self._matrix_sizes
+
+    def finder_pattern(self):
+        return self._finder_pattern
+
     def perform_read(self, offsets=wiggle_offsets, force_read=False):
         """ Attempt to read the DataMatrix from the image supplied in the constructor at the position
         given by the finder pattern. This is not performed automatically upon construction because the
@@ -63,6 +74,21 @@ class DataMatrix:
             self._read(self._image, offsets)
             self._is_read_performed = True
 
+    def read_result(self):
+        """ The outcome of the read operation as a tuple that can be passed to set_read_result() of another
+        DataMatrix with the same finder pattern (e.g. to return a read performed in another process). """
+        if not self._is_read_performed:
+            raise BarcodeReadNotPerformedException()
+
+        return self._data, self._read_ok, self._damaged_symbol, self._error_message, self._read_attempts, \
+            self._num_corrections
+
+    def set_read_result(self, result):
+        """ Set the outcome of a read that was performed elsewhere (see read_result()). """
+        self._data, self._read_ok, self._damaged_symbol, self._error_message, self._read_attempts, \
+            self._num_corrections = result
+        self._is_read_performed = True
+
     def is_read(self):
         """ True if the read operation has been performed (whether successful or not) """
         return self._is_read_performed
@@ -81,6 +107,15 @@ class DataMatrix:
 
         return self._damaged_symbol
 
+    def read_attempts(self):
+        """ The number of times the bits of the data matrix were sampled (once for each offset of the sample
+        positions and matrix size tried) by the read operation. """
+        return self._read_attempts
+
+    def num_corrections(self):
+        """ The number of symbols that the error correction had to fix for the successful read. """
+        return self._num_corrections
+
     def data(self):
         """ String representation of the barcode data. """
         if not self._is_read_performed:
@@ -107,6 +142,9 @@ class DataMatrix:
         """ From the supplied grayscale image, attempt to read the barcode at the location
         given by the datamatrix finder pattern.
         """
+        self._read_attempts = 0
+        self._num_corrections = 0
+
         for matrix_size in self._matrix_sizes:
             bit_reader = DatamatrixBitReader(matrix_size)
             extractor = DatamatrixByteExtractor()
@@ -119,6 +157,7 @@ class DataMatrix:
             for offset in offsets:
                 # Read the bit array at the target location (with offset)
                 # If the bit array is valid, decode it and create a datamatrix object
+                self._read_attempts += 1
                 try:
                     bit_array = bit_reader.read_bit_array(self._finder_pattern, offset, gray_image)
                     encoded_bytes = extractor.extract_bytes(bit_array)
@@ -126,6 +165,7 @@ class DataMatrix:
                     data = interpreter.interpret_bytes(decoded_bytes)
 
                     self._data = data
+                    self._num_corrections = decoder.num_corrections()
                     self._read_ok = True
                     self._error_message = ""
                     break
@@ -153,6 +193,17 @@ class DataMatrix:
         unread_barcodes = DataMatrix._fps_to_barcodes(grayscale_img, finder_patterns, matrix_sizes)
         return unread_barcodes
 
+    @staticmethod
+    def locate_all_barcodes_in_region(grayscale_img, region_img, offset, matrix_sizes=[DEFAULT_SIZE]):
+        """ Searches a region of the image (a sub image of it, whose top left corner is at the offset) for all
+        datamatrix finder patterns. The barcodes are positioned in (and read from) the whole image.
+        """
+        locator = Locator()
+        finder_patterns = [FinderPattern(fp.corner + offset, fp.baseVector, fp.sideVector)
+                           for fp in locator.locate_shallow(region_img)]
+        unread_barcodes = DataMatrix._fps_to_barcodes(grayscale_img, finder_patterns, matrix_sizes)
+        return unread_barcodes
+
     @staticmethod
     def locate_all_barcodes_in_image_deep(grayscale_img, matrix_sizes=[DEFAULT_SIZE]):
         """ Searches the image for all datamatrix finder patterns
@@ -12,6 +12,12 @@ class Locator:
     """ Provides access to several different algorithms for locating (not reading) datamatrix
     finder patterns in an image.
     """
+    # If enabled, images at least PYRAMID_MIN_WIDTH wide are searched by the contour algorithm coarse-to-fine:
+    # in a copy downscaled by PYRAMID_SCALE and then at full resolution only around the candidates found
+    PYRAMID_MODE = False
+    PYRAMID_MIN_WIDTH = 800
+    PYRAMID_SCALE = 0.5
+
     def __init__(self):
         self._median_radius_tolerance = 0.3
         self._median_radius = 0
@@ -93,12 +99,7 @@ class Locator:
         block_size = 35
 
         # Use a couple of different values of C as much more likely to locate the finder patterns
-        finder_patterns = []
-        for C in c_values:
-            fps = ContourLocator().locate_datamatrices(img, block_size, C, morph_size)
-            finder_patterns.extend(fps)
-
-        return finder_patterns
+        return Locator._contour_sweep(img, block_size, c_values, [morph_size])
 
     @staticmethod
     def _contours_deep(img):
@@ -108,10 +109,20 @@ class Locator:
         block_size = 35
 
         # Use a couple of different values of C as much more likely to locate the finder patterns
+        return Locator._contour_sweep(img, block_size, c_values, morph_sizes)
+
+    @staticmethod
+    def _contour_sweep(img, block_size, c_values, morph_sizes):
+        """ Run the contour locating algorithm for every combination of morph size and C (in that order),
+        using the coarse-to-fine algorithm if pyramid mode applies to the image. """
+        contour_locator = ContourLocator()
+        if not Locator.PYRAMID_MODE or img.width < Locator.PYRAMID_MIN_WIDTH:
+            return contour_locator.locate_datamatrices_sweep(img, block_size, c_values, morph_sizes)
+
         finder_patterns = []
         for ms in morph_sizes:
             for C in c_values:
-                fps = ContourLocator().locate_datamatrices(img, block_size, C, ms)
+                fps = contour_locator.locate_datamatrices_pyramid(img, block_size, C, ms, Locator.PYRAMID_SCALE)
                 finder_patterns.extend(fps)
 
         return finder_patterns
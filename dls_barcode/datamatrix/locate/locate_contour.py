@@ -1,4 +1,6 @@
 import math
+import os
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial, reduce
 from operator import add
 
@@ -16,21 +18,85 @@ class ContourLocator:
     """ Utility for finding the positions of all of the datamatrix barcodes
     in an image """
 
+    # Polygons with this many edges or fewer are too simple to be a datamatrix perimeter
+    MIN_EDGES = 6
+
+    # Margin (as a multiple of the candidate's radius) around each candidate found in the downscaled image
+    # that is searched again at full resolution by the coarse-to-fine locator
+    PYRAMID_ROI_FACTOR = 1.2
+
+    # Contours in those regions that span less than this fraction of the candidate's side length are ignored
+    PYRAMID_MIN_SIZE_FACTOR = 0.5
+
     def __init__(self):
-        pass
+        self._downscaled = None
 
     def locate_datamatrices(self, gray_image, blocksize, C, close_size):
         """Get the positions of (hopefully all) datamatrices within an image.
         """
+        return self._locate(gray_image, blocksize, C, close_size)
+
+    def locate_datamatrices_sweep(self, gray_image, blocksize, c_values, close_sizes):
+        """Get the positions of the datamatrices within an image, running the algorithm once for every
+        combination of morph size and C (ordered by morph size then C). The local mean used by the adaptive
+        threshold only depends on the block size, so it is calculated once and each value of C is then just
+        a comparison against it. The morph and contour passes for the different parameter sets are
+        independent, so are run on a pool of threads.
+        """
+        thresholds = self._do_thresholds(gray_image, blocksize, c_values)
+        passes = [(thresholds[C], close_size) for close_size in close_sizes for C in c_values]
+        results = _map_in_threads(lambda p: self._locate_in_threshold(*p), passes)
+        return [fp for fps in results for fp in fps]
+
+    def locate_datamatrices_pyramid(self, gray_image, blocksize, C, close_size, scale=0.5):
+        """Get the positions of the datamatrices within a large image, coarse-to-fine. Candidates are first
+        located in a copy of the image that is downscaled by the scale factor, using a threshold block size,
+        morph size and polygon smoothing scaled to match (C is an intensity offset so is left the same). Each
+        candidate is then located again with the full resolution parameters, but only within a small region
+        of the full image around it, and the results are mapped back to full image coordinates.
+        """
+        small_image = self._downscale(gray_image, scale)
+        small_blocksize = max(int(blocksize * scale) // 2 * 2 + 1, 3)
+        small_close_size = max(int(round(close_size * scale)), 1)
+        candidates = self._locate(small_image, small_blocksize, C, small_close_size, epsilon=6.0 * scale)
+
+        fps = []
+        for candidate in candidates:
+            center = candidate.center / scale
+            radius = candidate.radius / scale
+
+            # Include enough of the surroundings that the adaptive threshold sees the same neighbourhood
+            roi_radius = radius * self.PYRAMID_ROI_FACTOR + blocksize // 2 + 1
+            roi_image, roi = gray_image.sub_image(center, roi_radius)
+            offset = Point(roi[0], roi[1])
+
+            # The perimeter of the datamatrix spans at least its side length, so ignore any smaller contours
+            min_size = radius * math.sqrt(2) * self.PYRAMID_MIN_SIZE_FACTOR
+            for fp in self._locate(roi_image, blocksize, C, close_size, min_size=min_size):
+                fp = FinderPattern(fp.corner + offset, fp.baseVector, fp.sideVector)
+                is_new = not any(_is_same_pattern(fp, ex) for ex in fps)
+                if is_new and fp.center.distance_to(center) < radius:
+                    fps.append(fp)
+
+        return fps
+
+    def _locate(self, gray_image, blocksize, C, close_size, epsilon=6.0, min_size=0):
         # Perform adaptive threshold, reducing to a binary image
         threshold_image = self._do_threshold(gray_image, blocksize, C)
+        return self._locate_in_threshold(threshold_image, close_size, epsilon, min_size)
 
+    def _locate_in_threshold(self, threshold_image, close_size, epsilon=6.0, min_size=0):
         # Perform a morphological close, removing noise and closing some gaps
         morphed_image = self._do_close_morph(threshold_image, close_size)
 
-        # Find a bunch of contours in the image.
+        # Find a bunch of contours in the image. The polygons are made from a subset of the contour vertices so
+        # a contour without enough of them can never pass the non-trivial filter below; skip these early.
         contours = self._get_contours(morphed_image)
-        polygons = self._contours_to_polygons(contours)
+        contours = [c for c in contours if len(c) > self.MIN_EDGES]
+        if min_size > 0:
+            contours = [c for c in contours if max(cv2.boundingRect(c)[2:]) >= min_size]
+        polygons = self._contours_to_polygons(contours, epsilon)
+        polygons = [p for p in polygons if len(p) > self.MIN_EDGES]
 
         # Convert lists of vertices to lists of edges (easier to work with).
         edge_sets = map(self._polygons_to_edges, polygons)
@@ -46,6 +112,16 @@ class ContourLocator:
 
         return fps
 
+    def _downscale(self, gray_image, scale):
+        """ Downscaled copy of the image; kept so that it is only made once when the same image is searched
+        with several parameter sets. """
+        if self._downscaled is None or self._downscaled[0] is not gray_image or self._downscaled[1] != scale:
+            size = (int(gray_image.width * scale), int(gray_image.height * scale))
+            small = cv2.resize(gray_image.img, size, interpolation=cv2.INTER_AREA)
+            self._downscaled = (gray_image, scale, Image(small))
+
+        return self._downscaled[2]
+
     @staticmethod
     def _do_threshold(gray_image, block_size, c):
         """ Perform an adaptive threshold operation on the image. """
@@ -53,6 +129,22 @@ class ContourLocator:
         thresh = cv2.adaptiveThreshold(raw, 255.0, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, block_size, c)
         return Image(thresh)
 
+    @staticmethod
+    def _do_thresholds(gray_image, block_size, c_values):
+        """ Perform the adaptive threshold operation on the image for each of the values of C, returning a
+        dictionary of the thresholded images by C. This gives exactly the same result as _do_threshold(): a
+        pixel is white if it is brighter than the (rounded) mean of its neighbourhood minus C. """
+        raw = gray_image.img
+        mean = cv2.boxFilter(raw, -1, (block_size, block_size), normalize=True,
+                             borderType=cv2.BORDER_REPLICATE | cv2.BORDER_ISOLATED)
+        difference = cv2.subtract(raw, mean, dtype=cv2.CV_16S)
+
+        thresholds = {}
+        for c in c_values:
+            thresh = (difference > -math.ceil(c)).view(np.uint8) * np.uint8(255)
+            thresholds[c] = Image(thresh)
+        return thresholds
+
     @staticmethod
     def _do_close_morph(threshold_image, morph_size):
         """ Perform a generic morphological operation on an image. """
@@ -113,7 +205,7 @@ class ContourLocator:
     def _filter_non_trivial(edge_set):
         """Return True iff the number of edges is non-small.
         """
-        return len(edge_set) > 6
+        return len(edge_set) > ContourLocator.MIN_EDGES
 
     @staticmethod
     def _filter_longest_adjacent(edges):
@@ -142,8 +234,9 @@ class ContourLocator:
     def _longest_pair_indices(edges):
         """Return the indices of the two longest edges in a list of edges.
         """
-        lengths = list(map(_length, edges))
-        return np.asarray(lengths).argsort()[-2:][::-1]
+        vectors = np.subtract(*np.array(edges).transpose(1, 0, 2))
+        lengths = np.sqrt(np.sum(vectors * vectors, axis=1).astype(float))
+        return lengths.argsort()[-2:][::-1]
 
     @staticmethod
     def _get_finder_pattern(edges):
@@ -201,6 +294,47 @@ class ContourLocator:
                 return vertex_a
 
 
+# The maximum number of threads used to run independent contour passes (None for one per CPU)
+_max_threads = None
+
+# Threads used to run independent contour passes; recreated if used in a new (forked) process
+_thread_pool = None
+_thread_pool_pid = None
+
+
+def set_max_threads(max_threads):
+    """ Set the maximum number of threads that the contour passes are run in (None for one per CPU). A
+    process that is one of a pool of workers should use fewer (or just 1, so that the passes are run
+    serially), as the pool already keeps the CPUs busy. """
+    global _max_threads, _thread_pool
+
+    _max_threads = None if max_threads is None else max(int(max_threads), 1)
+    if _thread_pool is not None and _thread_pool_pid == os.getpid():
+        _thread_pool.shutdown(wait=False)
+    _thread_pool = None
+
+
+def _map_in_threads(function, items):
+    """ Return the list of the results of applying the function to each item, using a pool of threads if
+    there is more than one item. This is worthwhile because OpenCV releases the GIL. """
+    global _thread_pool, _thread_pool_pid
+
+    max_threads = _max_threads if _max_threads is not None else (os.cpu_count() or 1)
+    if min(len(items), max_threads) <= 1:
+        return list(map(function, items))
+
+    if _thread_pool is None or _thread_pool_pid != os.getpid():
+        _thread_pool = ThreadPoolExecutor(max_workers=max_threads)
+        _thread_pool_pid = os.getpid()
+
+    return list(_thread_pool.map(function, items))
+
+
+def _is_same_pattern(fp_a, fp_b):
+    return all(a.tuple() == b.tuple() for a, b in zip([fp_a.corner, fp_a.baseVector, fp_a.sideVector],
+                                                       [fp_b.corner, fp_b.baseVector, fp_b.sideVector]))
+
+
 def _length(edge):
     return _distance(*edge)
 
@@ -169,15 +169,20 @@ class SquareLocator:
         angle = transform.rot
 
         # Create cache key
-        key = (angle, (center.x, center.y))
+        key = (angle, (center.x, center.y), size)
 
         # If this x,y,angle combination has been seen before, retrieve the previous cached result
         if key in self.metric_cache:
             brightness = self.metric_cache[key]
 
         else:
-            rotated = binary_image.rotate(angle, center)
-            brightness = rotated.calculate_brightness(center, size, size)
+            # Same area as calculate_brightness(center, size, size) of the rotated image
+            x1, y1 = int(round(center.x - size / 2)), int(round(center.y - size / 2))
+            x2, y2 = int(round(x1 + size)), int(round(y1 + size))
+
+            rotated, corner = _rotate_for_region(binary_image, angle, center, x1, y1, x2, y2)
+            total = rotated.rectangle_sums(x1 - corner.x, y1 - corner.y, x2 - corner.x, y2 - corner.y)
+            brightness = total / (size * size)
 
             # Store in dictionary
             self.metric_cache[key] = brightness
@@ -229,35 +234,11 @@ class SquareLocator:
         up the finder pattern.
         """
         self.count += 1
-        radius = int(round(size/2))
         center = transform.trans
         angle = transform.rot
 
-        rotated = image.rotate(angle, center)
-
-        sx1, sy1 = center.x - radius, center.y - radius
-        sx2, sy2 = center.x + radius, center.y + radius
-        thick = int(round(size / 14))
-
-        # Top
-        x1, y1 = sx1, sy1
-        x2, y2 = sx2, sy1 + thick
-        top = np.sum(rotated.img[y1:y2, x1:x2]) / (size * thick)
-
-        # Left
-        x1, y1 = sx1, sy1
-        x2, y2 = sx1 + thick, sy2
-        left = np.sum(rotated.img[y1:y2, x1:x2]) / (size * thick)
-
-        # Bottom
-        x1, y1 = sx1, sy2 - thick
-        x2, y2 = sx2, sy2
-        bottom = np.sum(rotated.img[y1:y2, x1:x2]) / (size * thick)
-
-        # Right
-        x1, y1 = sx2 - thick, sy1
-        x2, y2 = sx2, sy2
-        right = np.sum(rotated.img[y1:y2, x1:x2]) / (size * thick)
+        rotated, corner = _rotate_square(image, angle, center, size)
+        top, left, bottom, right = _square_edge_brightness(rotated, center - corner, size)
 
         # Identify finder edges
         if top < bottom and left < right:
@@ -282,31 +263,11 @@ class SquareLocator:
         center = transform.trans
         angle = transform.rot
 
-        rotated = image.rotate(angle, center)
+        rotated, corner = _rotate_square(image, angle, center, size)
+        top, left, bottom, right = _square_edge_brightness(rotated, center - corner, size)
 
         sx1, sy1 = center.x-radius, center.y-radius
         sx2, sy2 = center.x+radius, center.y+radius
-        thick = int(round(size / 14))
-
-        # Top
-        x1, y1 = sx1, sy1
-        x2, y2 = sx2, sy1 + thick
-        top = np.sum(rotated.img[y1:y2, x1:x2]) / (size * thick)
-
-        # Left
-        x1, y1 = sx1, sy1
-        x2, y2 = sx1 + thick, sy2
-        left = np.sum(rotated.img[y1:y2, x1:x2]) / (size * thick)
-
-        # Bottom
-        x1, y1 = sx1, sy2 - thick
-        x2, y2 = sx2, sy2
-        bottom = np.sum(rotated.img[y1:y2, x1:x2]) / (size * thick)
-
-        # Right
-        x1, y1 = sx2 - thick, sy1
-        x2, y2 = sx2, sy2
-        right = np.sum(rotated.img[y1:y2, x1:x2]) / (size * thick)
 
         # Identify finder edges
         if top < bottom and left < right:
@@ -342,6 +303,41 @@ class SquareLocator:
         return fp
 
 
+def _rotate_for_region(image, angle, center, x1, y1, x2, y2):
+    """ Return an image that is the same as image.rotate(angle, center) within the region (x1, y1) to
+    (x2, y2), and the position of the region's corner in it. Only the region itself is rotated, unless it
+    extends beyond the edges of the image. """
+    if 0 <= x1 and 0 <= y1 and x2 <= image.width and y2 <= image.height:
+        return image.rotate_region(angle, center, x1, y1, x2, y2), Point(x1, y1)
+    else:
+        return image.rotate(angle, center), Point(0, 0)
+
+
+def _rotate_square(image, angle, center, size):
+    """ As _rotate_for_region() for the square that _square_edge_brightness() looks at. """
+    radius = int(round(size/2))
+    return _rotate_for_region(image, angle, center, center.x - radius, center.y - radius,
+                              center.x + radius, center.y + radius)
+
+
+def _square_edge_brightness(image, center, size):
+    """ Return the average brightness of a thin strip along each of the four edges (top, left, bottom, right)
+    of the axis-aligned square of the specified size centered on the point. """
+    radius = int(round(size/2))
+    thick = int(round(size / 14))
+
+    sx1, sy1 = center.x - radius, center.y - radius
+    sx2, sy2 = center.x + radius, center.y + radius
+
+    # Rectangles for the top, left, bottom and right edges
+    x1 = np.array([sx1, sx1, sx1, sx2 - thick])
+    y1 = np.array([sy1, sy1, sy2 - thick, sy1])
+    x2 = np.array([sx2, sx1 + thick, sx2, sx2])
+    y2 = np.array([sy1 + thick, sy2, sy2, sy2])
+
+    return image.rectangle_sums(x1, y1, x2, y2) / (size * thick)
+
+
 def _rotate_around_point(point, angle, center):
     """ Rotate the point about the center position """
     x = point.x - center.x
@@ -1,7 +1,6 @@
 from __future__ import division
 
 import numpy as np
-import itertools
 
 
 class DatamatrixReaderError(Exception):
@@ -15,8 +14,8 @@ class DatamatrixBitReader:
     def __init__(self, matrix_size):
         self._matrix_size = matrix_size
 
-    def read_bit_array(self, finder_pattern, offset, cv_img):
-        """ Return a datamatrix boolean array by sampling points in the image array.
+    def read_bit_array(self, finder_pattern, offset, image):
+        """ Return a datamatrix boolean array by sampling points in the (grayscale) image.
 
         After extracting the samples, this function performs a threshold on each ([0, 255] -> [0, 1])
         based on what it perceives as the optimal threshold value. To find this optimum, it gets the
@@ -31,14 +30,12 @@ class DatamatrixBitReader:
         n = self._matrix_size
 
         try:
-            # Determine the pixel locations to sample
-            datamatrix_samples = np.empty((n, n))
-            grid = self._datamatrix_sample_points(finder_pattern, offset, matrix_size=n)
-            for ((x, y), point) in grid:
-                datamatrix_samples[y, x] = int(self._window_average(cv_img, point))
-
-            thresholds = [self._threshold(datamatrix_samples, val) for val in range(256)]
-            b_errors = [self._border_errors(t) for t in thresholds]
+            # Determine the pixel locations to sample and average the brightness around each of them
+            points = self._datamatrix_sample_points(finder_pattern, offset, matrix_size=n)
+            datamatrix_samples = self._window_averages(image, points)
+
+            # Count the border defects for every possible threshold value at once
+            b_errors = self._border_errors(datamatrix_samples)
             best_threshold_value, badness = self._smart_minimum(b_errors)
 
             _ = badness  # Throw this away (for now).
@@ -60,21 +57,24 @@ class DatamatrixBitReader:
         """ Get pixel positions corresponding to individual bits in a datamatrix. This is done based on the
         position of a datamatrix.
 
-        Each returned pixel position comes also with an (x, y) pair which denotes the position of the
-        corresponding bit in the datamatrix, starting at (0, 0) in the bottom left corner and up to (n-1, n-1)
-        at the top right.
+        The positions are returned as an (n, n, 2) integer array of (x, y) pixel coordinates, indexed by the
+        [y, x] position of the corresponding bit in the datamatrix, starting at (0, 0) in the bottom left
+        corner and up to (n-1, n-1) at the top right.
 
         The base and side vectors are free to be non-orthogonal, so any skew of the datamatrix (because of lens
         distortion, say) is already accounted for (to first order).
         """
         n = matrix_size
-        corner = finder_pattern.corner.tuple()
+        corner = np.asarray(finder_pattern.corner.tuple())
         base_vec = np.asarray(finder_pattern.baseVector.tuple())
         side_vec = np.asarray(finder_pattern.sideVector.tuple())
 
-        return (((x, y),
-                 list(map(int, corner + ((2*x+1+offset[0])*base_vec + (2*y+1+offset[1])*side_vec)/(2*n))))
-                for x, y in itertools.product(range(n), range(n)))
+        y, x = np.mgrid[0:n, 0:n]
+        base_steps = (2*x+1+offset[0])[:, :, np.newaxis]
+        side_steps = (2*y+1+offset[1])[:, :, np.newaxis]
+
+        points = corner + (base_steps*base_vec + side_steps*side_vec)/(2*n)
+        return points.astype(int)
 
     @staticmethod
     def _smart_minimum(data):
@@ -89,54 +89,57 @@ class DatamatrixBitReader:
 
         The returned index is at the position of the pipe.
         """
-        least_y = min(data)
-        leftmost = data.index(least_y)
-        rightmost = len(data) - list(reversed(data)).index(least_y)
-        return int((leftmost + rightmost)/2), least_y
+        least_y = np.min(data)
+        minimising = np.flatnonzero(data == least_y)
+        leftmost = minimising[0]
+        rightmost = minimising[-1] + 1
+        return int((leftmost + rightmost)/2), int(least_y)
 
     @staticmethod
-    def _window_average(arr, point, side=3):
-        """Return the average brightness over a small region surrounding a point.
+    def _window_averages(image, points, side=3):
+        """Return the average brightness over a small region surrounding each of the points.
+
+        The sum for every window is read from the summed-area table of the image, so the whole grid
+        is sampled in a single pass. Windows that overlap the edge of the image are clipped in exactly
+        the same way as a slice img[y1:y2, x1:x2] would be.
         """
-        x1, y1 = point[0] - (side // 2), point[1] - (side // 2)
-        x2, y2 = x1 + side, y1 + side
-        brightness = int(np.sum(arr[y1:y2, x1:x2]) / (side * side))
-        return brightness
+        x1, y1 = points[..., 0] - (side // 2), points[..., 1] - (side // 2)
+        sums = image.rectangle_sums(x1, y1, x1 + side, y1 + side)
+        return (sums / (side * side)).astype(int)
 
     @staticmethod
     def _threshold(matrix, value):
         """Return a thresholded matrix, with low values corresponding to True.
         """
-        value_matrix = np.empty_like(matrix)
-        value_matrix.fill(value)
-        return matrix < value_matrix
+        return matrix < value
 
     @staticmethod
-    def _border_errors(datamatrix_candidate):
-        """Return the number of border bits not matching datamatrix specification.
+    def _border_errors(datamatrix_samples):
+        """Return the number of border bits not matching datamatrix specification for each of the
+        threshold values 0-255.
         """
-        n, m = datamatrix_candidate.shape
+        n, m = datamatrix_samples.shape
         # Could extend to non-square datamatrices (which do exist)...
         assert n == m and n % 2 == 0
-        errors_in_base = datamatrix_candidate[:1, :] != np.ones((1, n))
-        errors_in_side = datamatrix_candidate[:, :1] != np.ones((n, 1))
-        errors_in_timing = (  # ("Timing pattern".)
-            [[datamatrix_candidate[i, -1:]] != [(i+1) % 2] for i in range(n)] +
-            [[datamatrix_candidate[-1:, i]] != [(i+1) % 2] for i in range(n)])
-        return sum(map(np.sum, (errors_in_base, errors_in_side, errors_in_timing)))
+        timing = np.arange(n) % 2 == 0
+        border = np.concatenate((
+            datamatrix_samples[0, :],  # Base
+            datamatrix_samples[:, 0],  # Side
+            datamatrix_samples[:, -1],  # Timing pattern
+            datamatrix_samples[-1, :]))
+        expected = np.concatenate((np.ones(2*n, dtype=bool), timing, timing))
+
+        thresholds = np.arange(256)[:, np.newaxis]
+        errors = (border < thresholds) != expected
+        return np.count_nonzero(errors, axis=1)
 
     @staticmethod
     def _perform_sanity_check(bit_array):
         """ Do some simple checks on the array of datamatrix bits to make sure that it looks
         sensible. This weeds out any patterns that are obviously not datamatricies.
         """
-        width = len(bit_array)
-        height = len(bit_array[0])
-        num_bits = width * height
-        true_bits = 0
-
-        for row in bit_array:
-            true_bits = true_bits + sum(bool(x) for x in row)
+        num_bits = bit_array.size
+        true_bits = np.count_nonzero(bit_array)
 
         # We assume that if almost all of the bits are True or False then its not likely to be a valid datamatrix
         too_dark = true_bits > 0.9 * num_bits
@@ -144,3 +147,4 @@ class DatamatrixBitReader:
 
         if too_dark or too_light:
             raise DatamatrixReaderError("Area doesn't look like a Datamatrix (too many/too few bits)")
+
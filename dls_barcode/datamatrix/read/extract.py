@@ -2,6 +2,8 @@ from functools import partial
 
 import numpy as np
 
+from .size_table import DatamatrixSizeTable
+
 
 class DatamatrixByteExtractor:
     """Class for decoding a datamatrix from an array of bits retrieving the data that is
@@ -11,43 +13,69 @@ class DatamatrixByteExtractor:
     def extract_bytes(bits):
         """Convert the array of bits into a set of raw bytes according to the datamatrix standard.
         The bytes require further processing before the actual message is retrieved.
+
+        The position of each bit of each byte depends only on the size of the array, so the bits are
+        gathered using a precomputed placement map and then packed into bytes.
         """
-        n, m = bits.shape
-        i, j = 4, 0
-        read = np.zeros((n, m), dtype=np.int8)  # "Have we read this bit yet?"
-        corner_read = 0  # "Which corner case was found?"
-        data_bytes = []
-        while True:
-            if i == n and j == 0 and corner_read != 1:
-                data_bytes.append(read_corner_case_1(bits, read, n, m))
-                i -= 2;  j += 2;  corner_read = 1
-            elif i == n - 2 and j == 0 and m & 0x03 != 0 and corner_read != 2:
-                data_bytes.append(read_corner_case_2(bits, read, n, m))
-                i -= 2;  j += 2;  corner_read = 2
-            elif i == n + 4 and j == 2 and m & 0x07 != 0 and corner_read != 3:
-                data_bytes.append(read_corner_case_3(bits, read, n, m))
-                i -= 2;  j += 2;  corner_read = 3
-            elif i == n - 2 and j == 0 and m & 0x07 != 4 and corner_read != 4:
-                data_bytes.append(read_corner_case_4(bits, read, n, m))
-                i -= 2;  j += 2;  corner_read = 4
-            else:
-                while True:
-                    if i < n and j >= 0 and not read[i, j]:
-                        data_bytes.append(read_utah(i, j, bits, read, n, m))
-                    i -= 2;  j += 2
-                    if not(i >= 0 and j < m):
-                        break
-                i += 1;  j += 3
-                while True:
-                    if i >= 0 and j < m and not read[i, j]:
-                        data_bytes.append(read_utah(i, j, bits, read, n, m))
-                    i += 2;  j -= 2
-                    if not (i < n and j >= 0):
-                        break
-                i += 3;  j += 1
-            if not(i < n or j < m):
-                break
-        return data_bytes
+        rows, cols = placement_map(bits.shape)
+        codeword_bits = bits[rows, cols].astype(bool)
+        return np.packbits(codeword_bits, axis=1).ravel().tolist()
+
+
+# Placement maps for each shape of bit array, keyed by (n, m)
+_placement_maps = {}
+
+
+def placement_map(shape):
+    """Return arrays (rows, cols), each of size (number of bytes, 8), that give the position in the
+    bit array of each bit of each byte (msb to lsb) for a bit array of the specified shape.
+    """
+    if shape not in _placement_maps:
+        positions = np.array(_walk_placement(*shape), dtype=int).reshape(-1, 8, 2)
+        _placement_maps[shape] = (positions[:, :, 0], positions[:, :, 1])
+
+    return _placement_maps[shape]
+
+
+def _walk_placement(n, m):
+    """Follow the ECC200 placement algorithm over an n x m bit array, returning the list of the
+    (i, j) positions of every bit of every byte in order.
+    """
+    i, j = 4, 0
+    read = np.zeros((n, m), dtype=np.int8)  # "Have we read this bit yet?"
+    corner_read = 0  # "Which corner case was found?"
+    positions = []
+    while True:
+        if i == n and j == 0 and corner_read != 1:
+            positions.extend(read_corner_case_1(read, n, m))
+            i -= 2;  j += 2;  corner_read = 1
+        elif i == n - 2 and j == 0 and m & 0x03 != 0 and corner_read != 2:
+            positions.extend(read_corner_case_2(read, n, m))
+            i -= 2;  j += 2;  corner_read = 2
+        elif i == n + 4 and j == 2 and m & 0x07 != 0 and corner_read != 3:
+            positions.extend(read_corner_case_3(read, n, m))
+            i -= 2;  j += 2;  corner_read = 3
+        elif i == n - 2 and j == 0 and m & 0x07 != 4 and corner_read != 4:
+            positions.extend(read_corner_case_4(read, n, m))
+            i -= 2;  j += 2;  corner_read = 4
+        else:
+            while True:
+                if i < n and j >= 0 and not read[i, j]:
+                    positions.extend(read_utah(i, j, read, n, m))
+                i -= 2;  j += 2
+                if not(i >= 0 and j < m):
+                    break
+            i += 1;  j += 3
+            while True:
+                if i >= 0 and j < m and not read[i, j]:
+                    positions.extend(read_utah(i, j, read, n, m))
+                i += 2;  j -= 2
+                if not (i < n and j >= 0):
+                    break
+            i += 3;  j += 1
+        if not(i < n or j < m):
+            break
+    return positions
 
 
 utah = lambda _, __: [  # (i, j), msb to lsb
@@ -106,14 +134,9 @@ corner_case_4 = lambda n, m: [
 ]
 
 
-def read_shape(shape, i, j, bits, read, n, m):
-    return sum(1 << s
-               for s, b
-               # `reversed` flips endianness.
-               in enumerate(reversed(list(
-                   read_bit(i+r, j+c, bits, read, n, m)
-                   for r, c in shape(n, m))))
-               if b)
+def read_shape(shape, i, j, read, n, m):
+    """Return the positions of the 8 bits (msb to lsb) of the byte with the specified shape at (i, j)."""
+    return [read_bit(i+r, j+c, read, n, m) for r, c in shape(n, m)]
 
 read_utah = partial(read_shape, utah)
 read_corner_case_1 = partial(read_shape, corner_case_1, 0, 0)
@@ -122,7 +145,7 @@ read_corner_case_3 = partial(read_shape, corner_case_3, 0, 0)
 read_corner_case_4 = partial(read_shape, corner_case_4, 0, 0)
 
 
-def read_bit(i, j, bits, read, n, m):
+def read_bit(i, j, read, n, m):
     if i < 0:
         i += n
         j += 4 - ((n + 4) & 0x07)
@@ -130,4 +153,9 @@ def read_bit(i, j, bits, read, n, m):
         i += 4 - ((m + 4) & 0x07)
         j += m
     read[i, j] = 1
-    return bits[i, j]
\ No newline at end of file
+    return i, j
+
+
+# The bit arrays read from each of the supported datamatrix sizes exclude the 1-module border
+for _size in DatamatrixSizeTable.valid_sizes():
+    placement_map((_size - 2, _size - 2))
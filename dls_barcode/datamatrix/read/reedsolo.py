@@ -32,13 +32,23 @@ The following is the header from the original author:
 """
 
 
+import numpy as np
+
+from .size_table import DatamatrixSizeTable
+
+
 class ReedSolomonError(Exception):
     pass
 
 
 class ReedSolomonDecoder:
     def __init__(self):
-        self.gf = GaloisField(GaloisField.DATAMATRIX)
+        self.gf = DATAMATRIX_FIELD
+        self._num_corrections = 0
+
+    def num_corrections(self):
+        """ The number of symbols (errors and erasures) that were corrected in the last message decoded. """
+        return self._num_corrections
 
     def decode(self, encoded_msg, num_data_bytes):
         num_error_bytes = len(encoded_msg) - num_data_bytes
@@ -51,25 +61,23 @@ class ReedSolomonDecoder:
         return decoded
 
     def _correct_msg(self, msg_in, num_symbols):
+        self._num_corrections = 0
         if len(msg_in) > 255:
             raise ReedSolomonError("Message too long")
 
-        msg_out = list(msg_in)  # copy of message
-
         # find erasures
-        erase_pos = []
-        for i in range(0, len(msg_out)):
-            if msg_out[i] < 0:
-                msg_out[i] = 0
-                erase_pos.append(i)
-
+        erase_pos = [i for i, value in enumerate(msg_in) if value < 0]
         if len(erase_pos) > num_symbols:
             raise ReedSolomonError("Too many erasures to correct")
 
+        msg_out = bytearray(max(value, 0) for value in msg_in)  # copy of message
+
+        # Most messages are read cleanly, so check for that first with a single vectorized calculation
         syndromes = self._calculate_syndromes(msg_out, num_symbols)
-        if max(syndromes) == 0:
-            return msg_out[:-num_symbols]  # no errors
+        if not syndromes.any():
+            return list(msg_out[:-num_symbols])  # no errors
 
+        syndromes = syndromes.tolist()
         forney_syndromes = self._forney_syndromes(syndromes, erase_pos, len(msg_out))
         err_pos = self._find_errors(forney_syndromes, len(msg_out))
         if err_pos is None:
@@ -78,13 +86,14 @@ class ReedSolomonDecoder:
         self._correct_errata(msg_out, syndromes, erase_pos + err_pos)
         syndromes = self._calculate_syndromes(msg_out, num_symbols)
 
-        if max(syndromes) > 0:
+        if syndromes.any():
             raise ReedSolomonError("Could not correct message")
 
-        return msg_out[:-num_symbols]
+        self._num_corrections = len(erase_pos) + len(err_pos)
+        return list(msg_out[:-num_symbols])
 
     def _calculate_syndromes(self, msg, num_symbols):
-        return [self.gf.poly_eval(msg, self.gf.exp(i + self.gf.base())) for i in range(num_symbols)]
+        return self.gf.syndromes(msg, num_symbols)
 
     def _forney_syndromes(self, syndromes, erase_positions, nmess):
         fsynd = list(syndromes)  # make a copy
@@ -115,11 +124,10 @@ class ReedSolomonDecoder:
         if errs * 2 > len(syndromes):
             raise ReedSolomonError("Too many errors to correct")
 
-        # find zeros of error polynomial
-        err_pos = []
-        for i in range(0, nmess):
-            if self.gf.poly_eval(err_poly, self.gf.exp(255 - i)) == 0:
-                err_pos.append(nmess - 1 - i)
+        # find zeros of error polynomial (evaluated at every message position at once)
+        positions = np.arange(nmess)
+        values = self.gf.poly_eval_many(err_poly, self.gf.exp_table()[255 - positions])
+        err_pos = (nmess - 1 - positions[values == 0]).tolist()
         if len(err_pos) != errs:
             return None  # couldn't find error locations
         return err_pos
@@ -164,13 +172,14 @@ class ReedSolomonDecoder:
         return msg_out
 
     def _generator_poly(self, num_symbols):
-        g = [1]
-        for i in range(0, num_symbols):
-            g = self.gf.poly_mul(g, [1, self.gf.exp(i + self.gf.base())])
-        return g
+        return self.gf.generator_poly(num_symbols)
 
 
 class GaloisField:
+    """ Arithmetic in GF(256) for a particular primitive polynomial. All of the multiplications are
+    done by lookup in tables that are generated once when the field is created. Generator polynomials
+    and the tables used to calculate the syndromes of a message are cached for each message size.
+    """
     DATAMATRIX = "datamatrix"
     QR_CODE = "qr code"
 
@@ -190,11 +199,18 @@ class GaloisField:
         else:
             raise ReedSolomonError("Unknown Galois Field type")
 
-        # Generate the exponential and logarithm tables
+        # Generate the exponential, logarithm and multiplication tables
         self._exp = [1] * 512
         self._log = [0] * 256
         self._generate_tables()
 
+        self._exp_table = np.array(self._exp, dtype=np.uint8)
+        self._mul_table = self._generate_mul_table()
+        self._mul_rows = [bytes(row) for row in self._mul_table]
+
+        self._generator_polys = {}
+        self._syndrome_powers = {}
+
     def _generate_tables(self):
         x = 1
         for i in range(1, 255):
@@ -208,16 +224,25 @@ class GaloisField:
         for i in range(255, 512):
             self._exp[i] = self._exp[i - 255]
 
+    def _generate_mul_table(self):
+        """ Full 256x256 table of products; row/column 0 are zero. """
+        log = np.array(self._log)
+        table = self._exp_table[log[:, np.newaxis] + log[np.newaxis, :]]
+        table[0, :] = 0
+        table[:, 0] = 0
+        return table
+
     def base(self):
         return self._generator_base
 
     def exp(self, i):
         return self._exp[i]
 
+    def exp_table(self):
+        return self._exp_table
+
     def mul(self, x, y):
-        if x == 0 or y == 0:
-            return 0
-        return self._exp[self._log[x] + self._log[y]]
+        return self._mul_rows[x][y]
 
     def div(self, x, y):
         if y == 0:
@@ -227,7 +252,8 @@ class GaloisField:
         return self._exp[self._log[x] + 255 - self._log[y]]
 
     def poly_scale(self, p, x):
-        return [self.mul(p[i], x) for i in range(0, len(p))]
+        row = self._mul_rows[x]
+        return [row[c] for c in p]
 
     def poly_add(self, p, q):
         r = [0] * max(len(p), len(q))
@@ -240,12 +266,64 @@ class GaloisField:
     def poly_mul(self, p, q):
         r = [0] * (len(p) + len(q) - 1)
         for j in range(0, len(q)):
+            row = self._mul_rows[q[j]]
             for i in range(0, len(p)):
-                r[i + j] ^= self.mul(p[i], q[j])
+                r[i + j] ^= row[p[i]]
         return r
 
     def poly_eval(self, p, x):
+        row = self._mul_rows[x]
         y = p[0]
         for i in range(1, len(p)):
-            y = self.mul(y, x) ^ p[i]
+            y = row[y] ^ p[i]
         return y
+
+    def poly_eval_many(self, p, xs):
+        """ Evaluate the polynomial at each of the points in the array xs. """
+        y = np.full(len(xs), p[0], dtype=np.uint8)
+        for coef in p[1:]:
+            y = self._mul_table[y, xs] ^ coef
+        return y
+
+    def generator_poly(self, num_symbols):
+        """ The (cached) generator polynomial for a code with the specified number of ECC symbols. """
+        if num_symbols not in self._generator_polys:
+            g = [1]
+            for i in range(0, num_symbols):
+                g = self.poly_mul(g, [1, self.exp(i + self.base())])
+            self._generator_polys[num_symbols] = g
+
+        return self._generator_polys[num_symbols]
+
+    def syndromes(self, msg, num_symbols):
+        """ Calculate the syndromes of the message, i.e. the message polynomial evaluated at each of the
+        roots of the generator polynomial. Returned as an array that is all zeros if the message is
+        uncorrupted.
+        """
+        powers = self._get_syndrome_powers(len(msg), num_symbols)
+        msg = np.frombuffer(bytes(msg), dtype=np.uint8)
+        return np.bitwise_xor.reduce(self._mul_table[powers, msg], axis=1)
+
+    def _get_syndrome_powers(self, length, num_symbols):
+        """ Table of alpha^((i + base) * (length - 1 - j)) for each syndrome i and message position j, such
+        that the message byte at position j contributes msg[j] * powers[i, j] to syndrome i. """
+        key = (length, num_symbols)
+        if key not in self._syndrome_powers:
+            roots = np.arange(num_symbols)[:, np.newaxis] + self.base()
+            degrees = length - 1 - np.arange(length)[np.newaxis, :]
+            self._syndrome_powers[key] = self._exp_table[(roots * degrees) % 255]
+
+        return self._syndrome_powers[key]
+
+
+def _create_datamatrix_field():
+    """ Create the Galois Field used for datamatrix decoding, with the generator polynomials and syndrome
+    tables for each of the datamatrix sizes already calculated. """
+    field = GaloisField(GaloisField.DATAMATRIX)
+    for num_data, num_error in DatamatrixSizeTable.CAPACITY.values():
+        field.generator_poly(num_error)
+        field._get_syndrome_powers(num_data + num_error, num_error)
+    return field
+
+
+DATAMATRIX_FIELD = _create_datamatrix_field()
@@ -2,6 +2,8 @@ from __future__ import division
 
 import math
 
+import numpy as np
+
 from dls_util.shape import Point, Circle
 from .unipuck_template import UnipuckTemplate as Template
 
@@ -83,6 +85,17 @@ class Unipuck:
     def set_feature_boarder(self, feature_boarder):
         self._feature_boarder = feature_boarder
 
+    def translate(self, offset):
+        """ Move the puck (and its feature) by the offset, e.g. from the coordinates of a region of an image
+        into those of the whole image. Recalculate the positions of the slots. """
+        self._center = self._center + offset
+        if self._feature_center is not None:
+            self._feature_center = self._feature_center + offset
+        if self._feature_boarder is not None:
+            shift = np.array([offset.x, offset.y], dtype=self._feature_boarder.dtype)
+            self._feature_boarder = self._feature_boarder + shift
+        self._reset_slot_bounds()
+
     def _reset_slot_bounds(self):
         self._slot_bounds = self.calculate_slot_bounds(self._center, self._radius, self._rotation)
 
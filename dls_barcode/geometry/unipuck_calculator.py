@@ -3,7 +3,6 @@ from __future__ import division
 import math
 
 import numpy as np
-from scipy.optimize import fmin
 
 from dls_util.shape import Point
 from .exception import GeometryAlignmentError
@@ -12,6 +11,10 @@ from .unipuck_template import UnipuckTemplate
 
 MIN_POINTS_FOR_ALIGNMENT = 6
 
+# Angular increments (in degrees) of the coarse and fine puck orientation searches
+ORIENTATION_STEP = 2
+REFINE_STEP = 0.1
+
 
 class UnipuckCalculator:
     """ Creates a Unipuck object, determining its size, position, and orientation. This is all
@@ -60,7 +63,7 @@ class UnipuckCalculator:
             raise GeometryAlignmentError("Unipuck alignment failed")
 
     @staticmethod
-    def _find_puck_center(pin_centers):
+    def _find_puck_center(pin_centers, refine=True):
         """ Calculate approximate center point of the puck from positions of the center points
         of the pin slots.
 
@@ -69,22 +72,22 @@ class UnipuckCalculator:
         be a bit out. Instead, we use the average center position (the centroid) as a starting
         point and divide the slots into two groups based on how close they are to the centroid.
         As long as not too many slots are missing, the division into groups should work well.
-        We then iterate over different values for the puck center position, attempting to find
-        a location that is equidistant from all of the slot centers.
+        We then solve for the location that is equidistant from all of the slot centers in each
+        layer (see _fit_layers_center). If refine is set, the slots are divided into groups again
+        by their distance from that location and, if this changes the groups, the fit is repeated.
         """
+        points = np.array([p.tuple() for p in pin_centers], dtype=float)
         centroid = calculate_centroid(pin_centers)
 
-        # Calculate distance from center to each pin-center
-        distances = [[point, point.distance_to(centroid)] for point in pin_centers]
-        distances = sorted(distances, key=lambda distance: distance[1])
-
         # Sort the points into two layers based on their distance from the centroid
-        layer_break = _partition([d for p, d in distances])
-        first_layer = [p for p, d in distances[:layer_break]]
-        second_layer = [p for p, d in distances[layer_break:]]
+        layers = _layer_labels(points, centroid.tuple())
+        center = _fit_layers_center(points, layers)
+
+        if refine:
+            refined_layers = _layer_labels(points, center)
+            if not np.array_equal(refined_layers, layers):
+                center = _fit_layers_center(points, refined_layers)
 
-        # Optimise for the puck center by finding the point that is equidistant from every point in each layer
-        center = fmin(func=_center_minimiser, x0=centroid.tuple(), args=tuple([[first_layer, second_layer]]), xtol=1, disp=False)
         center = Point(center[0], center[1]).intify()
 
         return center
@@ -109,53 +112,29 @@ class UnipuckCalculator:
     def _determine_puck_orientation(puck, pin_centers):
         """ Using the known size and position of the puck in the image, determine the correct
         orientation of puck. Try the template at a set of incremental rotations and determine
-        which is the best orientation by looking at sum of squared errors. This algorithm can
-        definitely be improved upon but this does the job
+        which is the best orientation by looking at sum of squared errors, then refine the best
+        angle by trying the rotations around it at a finer increment. The errors for every
+        rotation in each stage are calculated at once from the template slot positions.
         """
-        # TODO: finding orientation takes 80-90% of the alignment time; find a better algorithm
-
-        errors = []
-        best_sse = 10000000
-        best_angle = 0
-        original_angle = puck.angle()
+        offsets = np.array([(p - puck.center()).tuple() for p in pin_centers], dtype=float)
+        radius = puck.radius()
 
         # For each angular increment, calculate the sum of squared errors in slot center position
-        for a in range(0, 360, 2):
-            angle = a / (180 / math.pi)
-            puck.set_rotation(angle)
-            sse = 0
-            for p in pin_centers:
-                sse += UnipuckCalculator._shortest_sq_distance(puck, p)
-            if sse < best_sse:
-                best_sse = sse
-                best_angle = angle
-            errors.append([angle, sse])
-
-        # Set the puck back to its original angle
-        puck.set_rotation(original_angle)
-
-        average_error = best_sse / puck.radius() ** 2 / len(pin_centers)
+        angles = np.radians(np.arange(0, 360, ORIENTATION_STEP))
+        errors = _orientation_errors(offsets, radius, angles)
+        best = np.argmin(errors)
+
+        average_error = errors[best] / radius ** 2 / len(pin_centers)
         if average_error > 0.003:
             raise GeometryAlignmentError("Unable to determine Unipuck orientation")
 
-        return best_angle
-
-    @staticmethod
-    def _shortest_sq_distance(puck, point):
-        """ Returns the distance from the specified point to the closest slot in the puck. """
-        low_l_sq = 100000000
-        slot_sq = puck.slot_radius()**2
+        # Refine the angle to within the fine increment
+        steps = np.arange(-ORIENTATION_STEP, ORIENTATION_STEP + REFINE_STEP / 2, REFINE_STEP)
+        angles = angles[best] + np.radians(steps)
+        errors = _orientation_errors(offsets, radius, angles)
+        best_angle = angles[np.argmin(errors)] % (2 * math.pi)
 
-        for num in range(puck.num_slots()):
-            center = puck.slot_center(num+1)
-            length_sq = point.distance_to_sq(center)
-            if length_sq < low_l_sq:
-                low_l_sq = length_sq
-                # Slots are non-overlapping so if its in the slot radius, it must be the closest
-                if length_sq < slot_sq:
-                    return length_sq
-
-        return low_l_sq
+        return float(best_angle)
 
 
 def calculate_centroid(points):
@@ -166,11 +145,65 @@ def calculate_centroid(points):
     return Point((sum(x) / len(points)), (sum(y) / len(points))).intify()
 
 
+def _template_slot_offsets(radius, angles):
+    """ Return the positions of the slot centers (relative to the puck center) of a puck of the given radius
+    at each of the rotation angles, as an array of shape (angles, slots, 2). The slots are laid out as in
+    Unipuck.calculate_slot_bounds() but without rounding to whole pixels. """
+    slot_angles = []
+    slot_radii = []
+    for layer_count, layer_radius in zip(UnipuckTemplate.N, UnipuckTemplate.LAYER_RADII):
+        for j in range(layer_count):
+            slot_angles.append((2.0 * math.pi * -j / layer_count) - (math.pi / 2.0))
+            slot_radii.append(layer_radius * radius)
+
+    angles = np.asarray(angles)[:, np.newaxis] + np.array(slot_angles)
+    slot_radii = np.array(slot_radii)
+    return np.stack((slot_radii * np.cos(angles), slot_radii * np.sin(angles)), axis=-1)
+
+
+def _orientation_errors(offsets, radius, angles):
+    """ For a puck at each of the rotation angles, return the sum over the points (given relative to the
+    puck center) of the squared distance from the point to the closest slot center. """
+    slots = _template_slot_offsets(radius, angles)
+    diff = offsets[np.newaxis, :, np.newaxis, :] - slots[:, np.newaxis, :, :]
+    sq_distances = np.sum(diff ** 2, axis=-1)
+    return np.sum(np.min(sq_distances, axis=2), axis=1)
+
+
+def _layer_labels(points, center):
+    """ Split the points into the inner (0) and outer (1) layer of slots by their distance from the center. """
+    distances = np.hypot(points[:, 0] - center[0], points[:, 1] - center[1])
+    order = np.argsort(distances, kind='stable')
+    layer_break = _partition(distances[order].tolist())
+
+    labels = np.zeros(len(points), dtype=int)
+    labels[order[layer_break:]] = 1
+    return labels
+
+
+def _fit_layers_center(points, layers):
+    """ Return the position that is the common center of the circles (one per layer) through the points
+    of each layer. This is the position that minimises the cost in _center_minimiser. For a center (a, b),
+    each point (x, y) in layer k satisfies x^2 + y^2 = 2ax + 2by + c_k, where c_k = r_k^2 - a^2 - b^2,
+    which is linear in (a, b, c_0, c_1) and so is solved in one least squares step (a Kasa circle fit
+    with a radius per layer). """
+    origin = np.mean(points, axis=0)
+    points = points - origin
+
+    num_layers = UnipuckTemplate.LAYERS
+    a = np.column_stack([2 * points] + [layers == k for k in range(num_layers)]).astype(float)
+    b = np.sum(points ** 2, axis=1)
+    solution = np.linalg.lstsq(a, b, rcond=None)[0]
+
+    return solution[:2] + origin
+
+
 def _center_minimiser(center, layers):
-    """ Used as the cost function in an optimisation routine. The puck consists of 2 layers of slots.
-    Within a given layer, each slot is the same distance from the center point of the puck. Therefore
-    for a trial center point, we calculate an error that is the sum of the squares of the deviation
-    of the distance of each slot from the mean distance of all the slots in the layer.
+    """ The least-squares cost that _fit_layers_center minimises (in closed form, so this is not called
+    when fitting). The puck consists of 2 layers of slots. Within a given layer, each slot is the same
+    distance from the center point of the puck. Therefore for a trial center point, we calculate an error
+    that is the sum of the squares of the deviation of the distance of each slot from the mean distance
+    of all the slots in the layer.
     """
     errors = []
     center = Point.from_array(center)
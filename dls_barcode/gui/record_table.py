@@ -1,11 +1,11 @@
 from __future__ import division
 
 from PyQt4 import QtGui
-from PyQt4.QtCore import Qt
-from PyQt4.QtGui import QGroupBox, QVBoxLayout, QHBoxLayout, QTableWidget
+from PyQt4.QtGui import QGroupBox, QVBoxLayout, QHBoxLayout, QTableView
 
-from dls_barcode.data_store import Store
+from dls_barcode.data_store import Store, ImageWriter
 from dls_util.file import FileManager
+from .record_table_model import RecordTableModel
 
 # todo: allow delete key to be used for deletion
 # todo: allow record selection with arrow keys
@@ -15,15 +15,19 @@ class ScanRecordTable(QGroupBox):
     """ GUI component. Displays a list of previous scan results. Selecting a scan causes
     details of the scan to appear in other GUI components (list of barcodes in the barcode
     table and image of the puck in the image frame).
-    """
-    COLUMNS = ['Date', 'Time', 'Plate Barcode', 'Plate Type', 'Valid', 'Invalid', 'Empty']
 
+    The table is a view of a RecordTableModel, so only the rows that are scrolled to are loaded, and adding
+    or deleting records only updates the rows of those records.
+    """
     def __init__(self, barcode_table, image_frame, options):
         super(ScanRecordTable, self).__init__()
 
-        # Read the store from file
-        self._store = Store(options.store_directory.value(), options.store_capacity, FileManager())
+        # Read the store from file; the images of new records are written in the background
+        file_manager = FileManager()
+        self._store = Store(options.store_directory.value(), options.store_capacity, file_manager,
+                            ImageWriter(file_manager))
         self._options = options
+        self._model = RecordTableModel(self._store, options)
 
         self._barcodeTable = barcode_table
         self._imageFrame = image_frame
@@ -35,11 +39,10 @@ class ScanRecordTable(QGroupBox):
 
     def _init_ui(self):
         # Create record table - lists all the records in the store
-        self._table = QTableWidget()
+        self._table = QTableView()
+        self._table.setModel(self._model)
         self._table.setMinimumWidth(440)
         self._table.setMinimumHeight(600)
-        self._table.setColumnCount(len(self.COLUMNS))
-        self._table.setHorizontalHeaderLabels(self.COLUMNS)
         self._table.setColumnWidth(0, 70)
         self._table.setColumnWidth(1, 55)
         self._table.setColumnWidth(2, 85)
@@ -49,7 +52,6 @@ class ScanRecordTable(QGroupBox):
         self._table.setColumnWidth(6, 45)
         self._table.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
 
-
         # Delete button - deletes selected records
         btn_delete = QtGui.QPushButton('Delete')
         btn_delete.setToolTip('Delete selected scan/s')
@@ -68,13 +70,13 @@ class ScanRecordTable(QGroupBox):
         self.setLayout(vbox)
 
     def cell_pressed_action_triggered(self, to_run_on_table_clicked):
-        self._table.cellPressed.connect(to_run_on_table_clicked)
-        self._table.cellPressed.connect(self._record_selected)
+        self._table.pressed.connect(to_run_on_table_clicked)
+        self._table.pressed.connect(self._record_selected)
 
 
     def add_record_frame(self, holder_barcode, plate, holder_img, pins_img):
         """ Add a new scan frame - creates a new record if its a new puck, else merges with previous record"""
-        self._store.merge_record(holder_barcode, plate, holder_img, pins_img)
+        self._store.merge_record(holder_barcode, plate, holder_img, pins_img, self._options)
         self._load_store_records()
         if self._options.scan_clipboard.value():
             self._barcodeTable.copy_to_clipboard()
@@ -82,29 +84,12 @@ class ScanRecordTable(QGroupBox):
     def _load_store_records(self):
         """ Populate the record table with all of the records in the store.
         """
-        self._table.clearContents()
-        self._table.setRowCount(self._store.size())
-
-        for n, record in enumerate(self._store.records):
-            items = [record.date, record.time, record.holder_barcode, record.plate_type, record.num_valid_barcodes,
-                     record.num_unread_slots, record.num_empty_slots]
-            valid_empty = record.num_valid_barcodes + record.num_empty_slots
-            if valid_empty == record.num_slots:
-                color = self._options.col_ok()
-            elif valid_empty < record.num_slots and record.num_valid_barcodes > 0:
-                color = self._options.col_accept()
-            else:
-                color = self._options.col_bad()
-
-            color.a = 192
-            for m, item in enumerate(items):
-                new_item = QtGui.QTableWidgetItem(str(item))
-                new_item.setBackgroundColor(color.to_qt())
-                new_item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-                self._table.setItem(n, m, new_item)
-
-        # Display the first (most recent) record
-        self._table.setCurrentCell(0, 0)
+        self._model.refresh()
+        self._select_latest_record()
+
+    def _select_latest_record(self):
+        """ Display the first (most recent) record. """
+        self._table.selectRow(0)
         self._record_selected()
 
     def _record_selected(self):
@@ -114,9 +99,9 @@ class ScanRecordTable(QGroupBox):
         """
         try:
             row = self._table.selectionModel().selectedRows()[0].row()
-            record = self._store.get_record(row)
+            record = self._model.record(row)
             self._barcodeTable.populate(record.holder_barcode, record.barcodes)
-            marked_image = record.marked_image(self._options)
+            marked_image = self._store.marked_image(record, self._options)
             self._imageFrame.display_puck_image(marked_image)
         except IndexError:
             self._barcodeTable.clear()
@@ -134,11 +119,7 @@ class ScanRecordTable(QGroupBox):
         # If yes, find the appropriate records and delete them
         if reply == QtGui.QMessageBox.Yes:
             rows = self._table.selectionModel().selectedRows()
-            records_to_delete = []
-            for row in rows:
-                index = row.row()
-                record = self._store.get_record(index)
-                records_to_delete.append(record)
+            records_to_delete = [self._model.record(row.row()) for row in rows]
 
             self._store.delete_records(records_to_delete)
             self._load_store_records()
@@ -0,0 +1,129 @@
+from PyQt4.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt4.QtGui import QBrush
+
+# Number of rows that are added to the table each time the view scrolls down to the last of the loaded rows
+FETCH_BATCH_SIZE = 100
+
+
+class RecordTableModel(QAbstractTableModel):
+    """ Table model of the records in a Store (one row per record, most recent first), for display in a
+    QTableView. Rows are only loaded as the view scrolls down to them. When the store changes, refresh()
+    removes and inserts just the rows of the records that have been deleted or added, so the view only
+    updates those rows.
+    """
+    COLUMNS = ['Date', 'Time', 'Plate Barcode', 'Plate Type', 'Valid', 'Invalid', 'Empty']
+
+    def __init__(self, store, options):
+        super(RecordTableModel, self).__init__()
+        self._store = store
+        self._options = options
+
+        # The records as of the last refresh, and the number of them that have been loaded as rows
+        self._records = list(store.records)
+        self._num_fetched = min(len(self._records), FETCH_BATCH_SIZE)
+
+    def record(self, row):
+        """ Get the record shown in the specified row, or None if there isn't one. """
+        return self._records[row] if 0 <= row < self._num_fetched else None
+
+    def refresh(self):
+        """ Update the rows to match the current records of the store. The order of the records in the
+        store doesn't change, so it is enough to remove the rows of deleted records and insert rows for
+        the new ones. """
+        current_ids = set(record.id for record in self._store.records)
+        removed_rows = [row for row, record in enumerate(self._records) if record.id not in current_ids]
+        # From the bottom up so that the row numbers of the rest don't change
+        for first, last in reversed(_contiguous_ranges(removed_rows)):
+            self._remove_rows(first, last)
+
+        existing_ids = set(record.id for record in self._records)
+        for row, record in enumerate(self._store.records):
+            if record.id not in existing_ids:
+                self._insert_row(row, record)
+
+    def _remove_rows(self, first, last):
+        if first < self._num_fetched:
+            last_fetched = min(last, self._num_fetched - 1)
+            self.beginRemoveRows(QModelIndex(), first, last_fetched)
+            del self._records[first:last + 1]
+            self._num_fetched -= last_fetched - first + 1
+            self.endRemoveRows()
+        else:
+            del self._records[first:last + 1]
+
+    def _insert_row(self, row, record):
+        if row <= self._num_fetched:
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._records.insert(row, record)
+            self._num_fetched += 1
+            self.endInsertRows()
+        else:
+            self._records.insert(row, record)
+
+    ############################
+    # QAbstractTableModel
+    ############################
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._num_fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._num_fetched < len(self._records)
+
+    def fetchMore(self, parent=QModelIndex()):
+        num_to_fetch = min(FETCH_BATCH_SIZE, len(self._records) - self._num_fetched)
+        if parent.isValid() or num_to_fetch <= 0:
+            return
+
+        self.beginInsertRows(QModelIndex(), self._num_fetched, self._num_fetched + num_to_fetch - 1)
+        self._num_fetched += num_to_fetch
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+    def data(self, index, role=Qt.DisplayRole):
+        record = self.record(index.row()) if index.isValid() else None
+        if record is None:
+            return None
+
+        if role == Qt.DisplayRole:
+            return str(self._row_items(record)[index.column()])
+        elif role == Qt.BackgroundRole:
+            return QBrush(self._row_color(record).to_qt())
+        return None
+
+    @staticmethod
+    def _row_items(record):
+        return [record.date, record.time, record.holder_barcode, record.plate_type, record.num_valid_barcodes,
+                record.num_unread_slots, record.num_empty_slots]
+
+    def _row_color(self, record):
+        valid_empty = record.num_valid_barcodes + record.num_empty_slots
+        if valid_empty == record.num_slots:
+            color = self._options.col_ok()
+        elif valid_empty < record.num_slots and record.num_valid_barcodes > 0:
+            color = self._options.col_accept()
+        else:
+            color = self._options.col_bad()
+
+        color.a = 192
+        return color
+
+
+def _contiguous_ranges(rows):
+    """ Group a sorted list of row numbers into (first, last) ranges of consecutive rows. """
+    ranges = []
+    for row in rows:
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1] = (ranges[-1][0], row)
+        else:
+            ranges.append((row, row))
+    return ranges
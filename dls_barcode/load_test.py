@@ -0,0 +1,302 @@
+""" Headless load test of the live scanning: a recorded session (a video file, or a directory or pattern of
+images) is replayed through the same capture and scanner processes that scan the camera feed in the
+application, in place of the camera, while this process stands in for the GUI - it takes the frames for
+display, the results and the messages off their queues. Reports the sustained rate at which frames were
+captured and scanned, how many frames were never scanned (and why), the depths of the queues, and how long
+each puck took to be completely read.
+
+    python -m dls_barcode.load_test [-c {top,side}] [--fps FPS] [--jitter %] [--loop -d SECONDS] SOURCE
+
+Without --loop, the test ends once the whole recording has been replayed and the scanner has caught up.
+"""
+from __future__ import division, print_function
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+# Required for multiprocessing to work under PyInstaller bundling in Windows
+from dls_util import multiprocessing_support
+
+from dls_barcode.camera import CameraScanner
+from dls_barcode.camera.camera_position import CameraPosition
+from dls_barcode.camera.frame_counters import FrameCounters
+from dls_barcode.camera.scanner_message import NoNewBarcodeMessage, ScanErrorMessage
+from dls_barcode.config import BarcodeConfig
+from dls_barcode.datamatrix import DataMatrix
+from dls_barcode.datamatrix.read import DatamatrixSizeTable
+from dls_barcode.geometry import Geometry
+from dls_util.cv import ReplayStream
+from dls_util.file import FileManager
+
+CAMERAS = {"top": CameraPosition.TOP, "side": CameraPosition.SIDE}
+
+# How often the queues are read (and their depths sampled)
+POLL_INTERVAL = 0.05
+
+# Once the whole recording has been captured, how long the scanner must have been idle for the test to end
+SETTLE_TIME = 1.0
+
+
+class SessionStats:
+    """ The measurements taken while a session is replayed, at times relative to the start of the replay. """
+    def __init__(self):
+        self._depths = OrderedDict()
+        self._view_frames = 0
+        self._messages = OrderedDict([("no_new_barcode", 0), ("scan_error", 0)])
+        self._pucks = OrderedDict()
+
+    def add_depths(self, depths):
+        for name, depth in depths.items():
+            if depth is not None:
+                self._depths.setdefault(name, []).append(depth)
+
+    def add_view_frames(self, num_frames):
+        self._view_frames += num_frames
+
+    def add_message(self, message):
+        if isinstance(message, NoNewBarcodeMessage):
+            self._messages["no_new_barcode"] += 1
+        elif isinstance(message, ScanErrorMessage):
+            self._messages["scan_error"] += 1
+
+    def add_result(self, plate, elapsed):
+        """ Record a result from the scanner: the plate, whenever new barcodes have been read from it. """
+        puck = self._pucks.get(plate.id)
+        if puck is None:
+            puck = OrderedDict([("id", str(plate.id)), ("slots", plate.num_slots), ("valid", 0),
+                                ("first_result", round(elapsed, 3)), ("completed", None), ("time_to_complete", None)])
+            self._pucks[plate.id] = puck
+
+        puck["valid"] = plate.num_valid_barcodes()
+        if plate.is_full_valid() and puck["completed"] is None:
+            puck["completed"] = round(elapsed, 3)
+            puck["time_to_complete"] = round(elapsed - puck["first_result"], 3)
+
+    def report(self, counts, elapsed):
+        frames = OrderedDict(counts)
+        frames["not_scanned"] = counts[FrameCounters.CAPTURED] - counts[FrameCounters.SCANNED] \
+            - counts[FrameCounters.SCAN_SKIPPED]
+
+        elapsed = max(elapsed, 1e-9)
+        rates = OrderedDict([("captured_fps", round(counts[FrameCounters.CAPTURED] / elapsed, 2)),
+                             ("scanned_fps", round(counts[FrameCounters.SCANNED] / elapsed, 2)),
+                             ("skipped_fps", round(counts[FrameCounters.SCAN_SKIPPED] / elapsed, 2)),
+                             ("displayed_fps", round(self._view_frames / elapsed, 2))])
+
+        queues = OrderedDict()
+        for name, depths in self._depths.items():
+            queues[name] = OrderedDict([("mean", round(sum(depths) / len(depths), 2)), ("max", max(depths))])
+
+        pucks = list(self._pucks.values())
+        completed = [puck["time_to_complete"] for puck in pucks if puck["time_to_complete"] is not None]
+        return OrderedDict([
+            ("duration", round(elapsed, 3)),
+            ("frames", frames),
+            ("rates", rates),
+            ("queues", queues),
+            ("messages", self._messages),
+            ("pucks_completed", len(completed)),
+            ("mean_time_to_complete", round(sum(completed) / len(completed), 3) if completed else None),
+            ("pucks", pucks)])
+
+
+def create_config(directory, source, args):
+    """ Create a config (with its file in the directory) that replays the source in place of both cameras,
+    with the camera size set to the size of the recorded frames. """
+    config = BarcodeConfig(os.path.join(directory, "config.ini"), FileManager())
+
+    stream = ReplayStream(source)
+    width, height = stream.get_width(), stream.get_height()
+    num_frames = stream.num_frames()
+    stream.release_resources()
+
+    for prefix in ["top", "side"]:
+        getattr(config, prefix + "_camera_replay").set(source)
+        getattr(config, prefix + "_camera_width").set(width)
+        getattr(config, prefix + "_camera_height").set(height)
+
+    config.replay_fps.set(args.fps)
+    config.replay_jitter.set(args.jitter)
+    config.replay_loop.set(args.loop)
+
+    config.plate_type.set(args.plate_type)
+    config.top_barcode_size.set(args.barcode_size)
+    config.decode_processes.set(args.decode_processes)
+    config.stage_timings.set(args.stage_timings)
+    config.skip_unchanged_frames.set(not args.no_skip)
+    if args.change_threshold is not None:
+        config.frame_change_threshold.set(args.change_threshold)
+    config.scan_beep.set(False)
+    return config, num_frames
+
+
+def run_session(config, camera, num_frames, duration):
+    """ Replay the session through the live scanning, and return the report of it. The session lasts for
+    the duration (in seconds) if one is given, otherwise until all of the frames have been captured and the
+    scanner has finished with them. """
+    result_queue = multiprocessing.Queue()
+    view_queue = multiprocessing.Queue()
+    message_queue = multiprocessing.Queue()
+
+    scanner = CameraScanner(result_queue, view_queue, message_queue, config)
+    stats = SessionStats()
+    start, end = None, None
+    try:
+        scanner.start_scan(camera)
+        start = time.time()
+        last_handled, last_scan_time = 0, start
+
+        while True:
+            depths = scanner.queue_depths()
+            depths.update(view=_queue_size(view_queue), result=_queue_size(result_queue))
+            stats.add_depths(depths)
+
+            _read_view_queue(scanner, view_queue, stats)
+            for plate, _ in _get_all(result_queue):
+                stats.add_result(plate, time.time() - start)
+            for message in _get_all(message_queue):
+                stats.add_message(message)
+
+            now = time.time()
+            counts = scanner.frame_counts()
+            handled = counts[FrameCounters.SCANNED] + counts[FrameCounters.SCAN_SKIPPED]
+            if handled != last_handled:
+                last_handled, last_scan_time = handled, now
+
+            if duration is not None:
+                if now - start >= duration:
+                    break
+            elif counts[FrameCounters.CAPTURED] >= num_frames and depths["task"] in (0, None) \
+                    and now - last_scan_time >= SETTLE_TIME:
+                # The time spent waiting to be sure that the scanner had finished isn't part of the session
+                end = last_scan_time
+                break
+
+            time.sleep(POLL_INTERVAL)
+    finally:
+        end = end if end is not None else time.time()
+        elapsed = end - start if start is not None else 0
+        counts = scanner.frame_counts()
+        scanner.kill()
+
+    return stats.report(counts, elapsed)
+
+
+def _read_view_queue(scanner, view_queue, stats):
+    # As in the GUI, only the latest frame would be displayed
+    messages = _get_all(view_queue)
+    stats.add_view_frames(len(messages))
+    if messages:
+        with scanner.view_frame(messages[-1]):
+            pass
+
+
+def _get_all(q):
+    items = []
+    try:
+        while True:
+            items.append(q.get(False))
+    except queue.Empty:
+        pass
+    return items
+
+
+def _queue_size(q):
+    try:
+        return q.qsize()
+    except NotImplementedError:
+        return None
+
+
+def print_report(report, out=sys.stdout):
+    frames, rates = report["frames"], report["rates"]
+    print("\n------- Load test: {:.1f} s -------".format(report["duration"]), file=out)
+    print("Frames: {captured} captured; {scan_queued} passed to the scanner; {scanned} scanned; {scan_skipped} "
+          "skipped as unchanged".format(**frames), file=out)
+    print("Not scanned: {not_scanned} (ring full: {scan_dropped}; stale: {scan_stale}); display dropped: "
+          "{view_dropped}".format(**frames), file=out)
+    print("Rates: {captured_fps} fps captured; {scanned_fps} fps scanned; {skipped_fps} fps skipped; "
+          "{displayed_fps} fps displayed".format(**rates), file=out)
+    for name, depths in report["queues"].items():
+        print("Queue '{}': mean depth {}, max {}".format(name, depths["mean"], depths["max"]), file=out)
+    print("Messages: {no_new_barcode} no new barcodes; {scan_error} scan errors".format(**report["messages"]),
+          file=out)
+    print("Pucks completed: {} (mean time to complete {} s)".format(report["pucks_completed"],
+                                                                      report["mean_time_to_complete"]), file=out)
+    for puck in report["pucks"]:
+        completed = "not completed" if puck["completed"] is None else "completed at {} s".format(puck["completed"])
+        print("* {}: {} of {} slots read; first result at {} s; {}".format(
+            puck["id"], puck["valid"], puck["slots"], puck["first_result"], completed), file=out)
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m dls_barcode.load_test",
+                                     description="Replay a recorded session through the live scanning and "
+                                                 "measure its throughput.")
+    parser.add_argument("source", help="A video file, or a directory or (quoted) glob pattern of images")
+    parser.add_argument("-c", "--camera", default="top", choices=sorted(CAMERAS.keys()),
+                        help="The camera that the recording replaces (default=%(default)s)")
+    parser.add_argument("-p", "--plate-type", default=Geometry.UNIPUCK, choices=Geometry.TYPES,
+                        help="The type of sample holder seen by the top camera (default=%(default)s)")
+    parser.add_argument("-s", "--barcode-size", type=int, default=DataMatrix.DEFAULT_SIZE,
+                        choices=DatamatrixSizeTable.valid_sizes(),
+                        help="The datamatrix size seen by the top camera (default=%(default)s)")
+    parser.add_argument("--fps", type=int, default=10, help="The rate to replay frames at (default=%(default)s)")
+    parser.add_argument("--jitter", type=int, default=0,
+                        help="The percentage by which the time between frames varies (default=%(default)s)")
+    parser.add_argument("-l", "--loop", action="store_true", help="Loop the recording (use with --duration)")
+    parser.add_argument("-d", "--duration", type=float,
+                        help="How long to run for in seconds (default=until the recording has been replayed)")
+    parser.add_argument("-j", "--decode-processes", type=int, default=1,
+                        help="The number of processes that decode barcodes (default=%(default)s)")
+    parser.add_argument("--no-skip", action="store_true",
+                        help="Scan every frame, even those that are unchanged since the last frame scanned")
+    parser.add_argument("-t", "--change-threshold", type=int,
+                        help="How much a frame must differ from the last frame scanned (in grey levels) not to be "
+                             "skipped as unchanged (default=the default of the Frame Change Threshold option)")
+    parser.add_argument("--stage-timings", action="store_true",
+                        help="Have the scanner print the timings of the stages of the scan")
+    parser.add_argument("-o", "--output", help="Also write the report to this file, as JSON")
+    args = parser.parse_args(argv)
+
+    if args.loop and args.duration is None:
+        parser.error("--duration is needed with --loop")
+    return args
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+
+    directory = tempfile.mkdtemp()
+    try:
+        try:
+            config, num_frames = create_config(directory, args.source, args)
+        except IOError as ex:
+            print(str(ex), file=sys.stderr)
+            return 1
+        report = run_session(config, CAMERAS[args.camera], num_frames, args.duration)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print_report(report)
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+    return 0
+
+
+if __name__ == '__main__':
+    # Multiprocessing support for PyInstaller bundling in Windows
+    if sys.platform.startswith('win'):
+        multiprocessing.freeze_support()
+
+    sys.exit(main())
@@ -6,6 +6,7 @@ from PyQt4 import QtCore
 from dls_barcode.camera import CameraScanner, CameraSwitch, NoNewBarcodeMessage, ScanErrorMessage
 
 from dls_util import Beeper
+from dls_util.image import Image
 
 RESULT_TIMER_PERIOD = 1000  # ms
 VIEW_TIMER_PERIOD = 1  # ms
@@ -103,15 +104,23 @@ class MainManager:
         return self._msg_timer_is_running() and time.time() - self._record_msg_timer > timeout
 
     def _read_view_queue(self):
-        if self._view_queue.empty():
+        if self._view_queue.empty() or not self._camera_capture_alive():
             return
 
+        # Only the latest frame is displayed, any older ones are skipped
+        message = None
         try:
-            image = self._view_queue.get(False)
+            while True:
+                message = self._view_queue.get(False)
         except queue.Empty:
+            pass
+
+        if message is None:
             return
 
-        self._ui.displayPuckImage(image)
+        with self._camera_scanner.view_frame(message) as frame:
+            if frame is not None:
+                self._ui.displayPuckImage(Image(frame))
 
     def _read_result_queue(self):
         """ Called every second; read any new results from the scan results queue, store them and display them.
@@ -1,2 +1,3 @@
 from .with_geometry import GeometryScanner, SlotScanner
-from .open import OpenScanner
+from .open import OpenScanner, KnownBarcodes
+from .span_recorder import SpanRecorder, SpanWindow
@@ -1 +1,3 @@
 from .open_scanner import OpenScanner
+from .known_barcodes import KnownBarcodes
+from .decode_cache import DecodeCache
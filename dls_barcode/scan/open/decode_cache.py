@@ -0,0 +1,106 @@
+from __future__ import division
+
+import cv2 as opencv
+import numpy as np
+
+
+class DecodeCache:
+    """ Remembers the barcodes that have been read in recent frames, by where they were in the frame, so that
+    a barcode that is still in the same place needn't be read again: a barcode located at (about) the same
+    center, with (about) the same radius, is given the result of the earlier read, as long as the image of it
+    is still the same - which is checked by the correlation of small, downsampled patches of the two images.
+    The correlation (of patches normalised for brightness and contrast) is at least 0.89 for a barcode that
+    has moved by up to a pixel, with camera noise, but at most 0.75 for two different barcodes in the test
+    images.
+
+    Only successful reads are remembered, and each is forgotten once it is a set number of frames old, so
+    the barcode is then read again.
+    """
+    # How far a barcode can have moved (or changed in radius) and still match, as a fraction of its radius,
+    # but at least a few pixels
+    POSITION_TOLERANCE = 0.1
+    MIN_POSITION_TOLERANCE = 2
+
+    # The size (pixels across) that the images of the barcode are reduced to, and the minimum correlation
+    # between them for the barcode to be unchanged
+    PATCH_SIZE = 16
+    MIN_CORRELATION = 0.82
+
+    DEFAULT_MAX_AGE = 25
+
+    def __init__(self, max_age=DEFAULT_MAX_AGE):
+        """ The maximum age is the number of frames that a read can be reused for. """
+        self._max_age = max_age
+        self._frame_number = 0
+        self._entries = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def new_frame(self):
+        """ Start a new frame, forgetting the reads that are too old to be used for it. """
+        self._frame_number += 1
+        self._entries = [entry for entry in self._entries
+                         if self._frame_number - entry.frame_number < self._max_age]
+
+    def read(self, barcode, image):
+        """ If the (unread) barcode is one that was read recently, in the same place in the image and looking
+        the same, set the result of that read on it and return True. Otherwise return False. """
+        entry = self._find(barcode)
+        if entry is None:
+            return False
+
+        patch = self._patch(barcode, image)
+        if patch is None or np.mean(patch * entry.patch) < self.MIN_CORRELATION:
+            return False
+
+        barcode.set_read_result(entry.read_result)
+        return True
+
+    def add(self, barcode, image):
+        """ Remember the read of the barcode, if it was read successfully. """
+        if not barcode.is_valid():
+            return
+
+        patch = self._patch(barcode, image)
+        if patch is None:
+            return
+
+        self._entries = [entry for entry in self._entries if not self._matches(entry, barcode)]
+        self._entries.append(_CacheEntry(barcode, patch, self._frame_number))
+
+    def _find(self, barcode):
+        for entry in self._entries:
+            if self._matches(entry, barcode):
+                return entry
+        return None
+
+    def _matches(self, entry, barcode):
+        tolerance = max(entry.radius * self.POSITION_TOLERANCE, self.MIN_POSITION_TOLERANCE)
+        return abs(barcode.radius() - entry.radius) <= tolerance and \
+            barcode.center().distance_to(entry.center) <= tolerance
+
+    def _patch(self, barcode, image):
+        region, _ = image.sub_image(barcode.center(), barcode.radius())
+        if not region.is_valid():
+            return None
+
+        size = (self.PATCH_SIZE, self.PATCH_SIZE)
+        patch = opencv.resize(region.img, size, interpolation=opencv.INTER_AREA).astype(np.float32)
+
+        # Normalise the patch so that the mean of its product with another is their correlation
+        deviation = patch.std()
+        if deviation == 0:
+            return None
+        return (patch - patch.mean()) / deviation
+
+
+class _CacheEntry:
+    def __init__(self, barcode, patch, frame_number):
+        self.center = barcode.center()
+        self.radius = barcode.radius()
+        self.patch = patch
+        self.frame_number = frame_number
+
+        # The barcode wasn't sampled or corrected when the result is reused
+        self.read_result = barcode.read_result()[:4] + (0, 0)
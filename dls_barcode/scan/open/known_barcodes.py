@@ -0,0 +1,63 @@
+import time
+from collections import OrderedDict
+
+
+class KnownBarcodes:
+    """ The data of the barcodes that have already been read (and reported) by an open scanner, so that they
+    aren't reported as new each time they are seen again. The set is bounded: once it holds its capacity,
+    the barcode that was seen least recently is forgotten to make room for a new one. With the TTL policy,
+    a barcode is also forgotten once it hasn't been seen for the lifetime (in seconds).
+
+    Each barcode added is stamped with a new version of the set, so that a scan result can share the set
+    rather than copying it: the barcodes that were known when the result's frame was started are those
+    added at or before the version at that time.
+    """
+    LRU = "Least Recently Used"
+    TTL = "Time To Live"
+    POLICIES = [LRU, TTL]
+
+    DEFAULT_CAPACITY = 1000
+    DEFAULT_LIFETIME = 600
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, policy=LRU, lifetime=DEFAULT_LIFETIME):
+        self._capacity = max(capacity, 1)
+        self._lifetime = lifetime if policy == self.TTL else None
+
+        # Barcode data -> [version when added, time last seen], in the order they were last seen
+        self._entries = OrderedDict()
+        self._version = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def version(self):
+        return self._version
+
+    def contains(self, data, version=None):
+        """ True if the barcode is known (or was already known at the version, if one is given). """
+        entry = self._entries.get(data)
+        return entry is not None and (version is None or entry[0] <= version)
+
+    def add(self, data):
+        """ Record that the barcode has been seen. Return True if it wasn't already known. """
+        now = time.time()
+        entry = self._entries.get(data)
+        if entry is not None:
+            entry[1] = now
+            self._entries.move_to_end(data)
+            return False
+
+        self._version += 1
+        self._entries[data] = [self._version, now]
+        while len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
+        return True
+
+    def expire(self):
+        """ Forget the barcodes that haven't been seen for the lifetime (if there is one). """
+        if self._lifetime is None:
+            return
+
+        oldest = time.time() - self._lifetime
+        while self._entries and next(iter(self._entries.values()))[1] < oldest:
+            self._entries.popitem(last=False)
@@ -5,15 +5,27 @@ class OpenScanResult(ScanResult):
     def __init__(self, frame_number):
         ScanResult.__init__(self, frame_number)
 
-        self._old_barcode_data = []
+        self._known_barcodes = None
+        self._known_version = 0
 
     def new_barcodes(self):
         new = []
         for barcode in self._barcodes:
-            if barcode.is_valid() and barcode.data() not in self._old_barcode_data:
+            if barcode.is_valid() and not self._is_known(barcode.data()):
                     new.append(barcode)
 
         return new
 
-    def set_old_barcode_data(self, barcode_data):
-        self._old_barcode_data = barcode_data[:]
+    def could_improve_on_same_image(self):
+        """ There is no plate to complete, but a barcode that was found and not read might be read from
+        the same image with different camera noise. """
+        return any(not (barcode.is_read() and barcode.is_valid()) for barcode in self._barcodes)
+
+    def set_known_barcodes(self, known_barcodes):
+        """ The set of known barcodes is shared with the scanner, which goes on adding to it, so only those
+        that it held at its current version (before this frame was scanned) count as known. """
+        self._known_barcodes = known_barcodes
+        self._known_version = known_barcodes.version()
+
+    def _is_known(self, data):
+        return self._known_barcodes is not None and self._known_barcodes.contains(data, self._known_version)
@@ -3,26 +3,40 @@ from dls_barcode.datamatrix import DataMatrix
 from dls_barcode.plate import Plate
 from dls_barcode.geometry import Geometry
 from ..no_barcodes_detected_error import NoBarcodesDetectedError
+from ..span_recorder import SpanRecorder, NULL_RECORDER
 from .open_scan_result import OpenScanResult
+from .known_barcodes import KnownBarcodes
+from .decode_cache import DecodeCache
 
 
 class OpenScanner:
-    def __init__(self, barcode_sizes):
+    def __init__(self, barcode_sizes, record_spans=False, known_barcodes=None, decode_cache=None):
+        """ The known barcodes are those that have already been read, which aren't new when they are seen
+        again; by default they are held in a KnownBarcodes set of the default capacity. The decode cache
+        holds the reads of recent frames, which are reused for barcodes that haven't moved (by default, a
+        DecodeCache that reuses a read for its default number of frames). """
         self.plate_type = Geometry.NO_GEOMETRY
         self.barcode_sizes = barcode_sizes
+        self._record_spans = record_spans
+        self._spans = NULL_RECORDER
 
         self._frame_number = 0
         self._frame_img = None
         self._is_single_image = False
 
-        self._old_barcode_data = []
+        self._known_barcodes = known_barcodes if known_barcodes is not None else KnownBarcodes()
+        self._decode_cache = decode_cache if decode_cache is not None else DecodeCache()
 
     def scan_next_frame(self, frame_img, is_single_image=False):
         self._frame_img = frame_img
         self._frame_number += 1
         self._is_single_image = is_single_image
+        self._spans = SpanRecorder() if self._record_spans else NULL_RECORDER
+        self._known_barcodes.expire()
+        self._decode_cache.new_frame()
         result = OpenScanResult(self._frame_number)
-        result.set_old_barcode_data(self._old_barcode_data)
+        result.set_known_barcodes(self._known_barcodes)
+        result.set_spans(self._spans)
         result.start_timer()
 
         # Read all the barcodes in the image
@@ -36,7 +50,8 @@ class OpenScanner:
         # Create a 'blank' geometry object to store the barcode locations
         new_barcodes = result.new_barcodes()
         num_new_barcodes = len(new_barcodes)
-        geometry = self._create_geometry(new_barcodes)
+        with self._spans.span("geometry"):
+            geometry = self._create_geometry(new_barcodes)
 
         # Create the plate
         if any(new_barcodes):
@@ -49,18 +64,35 @@ class OpenScanner:
         result.end_timer()
         return result
 
+    def close(self):
+        """ Nothing to clean up; barcodes are decoded in the scanning process. """
+        pass
+
     def _perform_frame_scan(self):
-        barcodes = self._locate_all_barcodes_in_image()
+        with self._spans.span("locate"):
+            barcodes = self._locate_all_barcodes_in_image()
 
-        for barcode in barcodes:
-            barcode.perform_read(DataMatrix.DIAG_WIGGLES)
+        with self._spans.span("read"):
+            for barcode in barcodes:
+                self._read_barcode(barcode)
 
-            if self._is_barcode_new(barcode):
-                # todo: limit number of previous barcodes stored
-                self._old_barcode_data.append(barcode.data())
+                if barcode.is_valid():
+                    self._known_barcodes.add(barcode.data())
 
         return barcodes
 
+    def _read_barcode(self, barcode):
+        """ Read the barcode, unless it was read in a recent frame and hasn't changed since. A single image
+        has nothing in common with the previous one, so all of its barcodes are read. """
+        if not self._is_single_image and self._decode_cache.read(barcode, self._frame_img):
+            self._spans.count("cached reads")
+            return
+
+        barcode.perform_read(DataMatrix.DIAG_WIGGLES)
+        self._spans.count_read(barcode)
+        if not self._is_single_image:
+            self._decode_cache.add(barcode, self._frame_img)
+
     def _create_geometry(self, barcodes):
         """ Create the blank geometry object which just stores the locations of all the barcodes. """
         geometry = Geometry.calculate_geometry(self.plate_type, barcodes)
@@ -76,6 +108,3 @@ class OpenScanner:
         if len(barcodes) == 0:
             raise NoBarcodesDetectedError()
         return barcodes
-
-    def _is_barcode_new(self, barcode):
-        return barcode.is_valid() and barcode.data() not in self._old_barcode_data
@@ -1,5 +1,7 @@
 import time
 
+from .span_recorder import NULL_RECORDER
+
 
 class ScanResult:
     def __init__(self, frame_number):
@@ -15,6 +17,7 @@ class ScanResult:
 
         self._start_time = 0
         self._scan_time = 0
+        self._spans = NULL_RECORDER
 
     def start_timer(self):
         self._start_time = time.time()
@@ -44,6 +47,11 @@ class ScanResult:
     def error(self):
         return self._error
 
+    def spans(self):
+        """ The recorder of the time taken by each stage of the scan (which records nothing unless the
+        scanner was asked to record the stages). """
+        return self._spans
+
     def set_barcodes(self, value):
         self._barcodes = value
 
@@ -56,6 +64,9 @@ class ScanResult:
     def set_error(self, value):
         self._error = value
 
+    def set_spans(self, value):
+        self._spans = value
+
     ############################
     # Status Functions
     ############################
@@ -88,9 +99,17 @@ class ScanResult:
     def already_scanned(self):
         return self.is_full_valid() and not self.any_new_barcodes()
 
+    def could_improve_on_same_image(self):
+        """ Whether scanning the same image again might give a better result than this scan (camera noise can
+        make the difference between a barcode being read or not). It can't once the plate is complete, or
+        if nothing that looked like a barcode was found. """
+        return not self.is_full_valid() and self.any_finder_patterns()
+
     def print_summary(self):
         print('\n------- Frame {} -------'.format(self._frame_number))
         print("Scan Duration: {0:.3f} secs".format(self.scan_time()))
+        for line in self._spans.summary():
+            print("* " + line)
 
         if self.any_finder_patterns():
             print("Barcodes Located: {}".format(len(self._barcodes)))
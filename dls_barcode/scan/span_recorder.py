@@ -0,0 +1,159 @@
+from __future__ import division
+
+import time
+from collections import OrderedDict, deque
+
+
+class SpanRecorder:
+    """ Records how long each stage of the scan of a frame takes, as a hierarchy of named spans: a span
+    started inside another one is recorded under the path of both (e.g. 'plate/read' is the 'read' span
+    inside the 'plate' span). The durations and numbers of calls of the spans with the same path are
+    summed. Counts of events (e.g. barcode reads) can be recorded alongside.
+
+        with recorder.span("locate"):
+            ...
+    """
+    SEPARATOR = "/"
+
+    def __init__(self):
+        self._path = []
+        self._durations = OrderedDict()
+        self._calls = OrderedDict()
+        self._counts = OrderedDict()
+
+    def is_enabled(self):
+        return True
+
+    def span(self, name):
+        """ A context manager that records the time spent inside it as the named span. """
+        return _Span(self, name)
+
+    def count(self, name, amount=1):
+        self._counts[name] = self._counts.get(name, 0) + amount
+
+    def count_read(self, barcode):
+        """ Count a read that has been performed of the barcode: the read itself, any wiggles (extra sample
+        offsets that were tried) and the symbols that the Reed-Solomon error correction fixed. """
+        self.count("reads")
+        self.count("wiggles", max(barcode.read_attempts() - 1, 0))
+        self.count("corrections", barcode.num_corrections())
+
+    def durations(self):
+        """ The total time (in seconds) of each span, by path, in the order the spans were first started. """
+        return self._durations
+
+    def calls(self):
+        """ The number of times each span was started, by path. """
+        return self._calls
+
+    def counts(self):
+        return self._counts
+
+    def add(self, other):
+        """ Add the durations, calls and counts recorded by another recorder to those of this one. """
+        for path, duration in other.durations().items():
+            self._durations[path] = self._durations.get(path, 0) + duration
+            self._calls[path] = self._calls.get(path, 0) + other.calls()[path]
+        for name, amount in other.counts().items():
+            self.count(name, amount)
+
+    def summary(self, num_frames=1):
+        """ Lines describing the (average per frame) time of each span and the counts. """
+        lines = []
+        for path, duration in self._durations.items():
+            depth = path.count(self.SEPARATOR)
+            name = path.rsplit(self.SEPARATOR, 1)[-1]
+            lines.append("{}{}: {:.1f} ms ({:g} calls)".format(
+                "  " * depth, name, 1000 * duration / num_frames, self._calls[path] / num_frames))
+
+        if self._counts:
+            lines.append(", ".join("{}: {:g}".format(name, count / num_frames) for name, count in self._counts.items()))
+        return lines
+
+    def _start(self, name):
+        self._path.append(name)
+        path = self.SEPARATOR.join(self._path)
+
+        # Add the span when it starts, so that it comes before any spans inside it
+        if path not in self._durations:
+            self._durations[path] = 0
+            self._calls[path] = 0
+        return path
+
+    def _end(self, path, duration):
+        self._path.pop()
+        self._durations[path] += duration
+        self._calls[path] += 1
+
+
+class _Span:
+    def __init__(self, recorder, name):
+        self._recorder = recorder
+        self._name = name
+        self._path = None
+        self._start = 0
+
+    def __enter__(self):
+        self._path = self._recorder._start(self._name)
+        self._start = time.time()
+        return self
+
+    def __exit__(self, *args):
+        self._recorder._end(self._path, time.time() - self._start)
+        return False
+
+
+class NullSpanRecorder(SpanRecorder):
+    """ A recorder that doesn't record anything, used when the stages aren't being timed so that the
+    scanners don't need to check whether they are. """
+    def is_enabled(self):
+        return False
+
+    def span(self, name):
+        return _NULL_SPAN
+
+    def count(self, name, amount=1):
+        pass
+
+    def count_read(self, barcode):
+        pass
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+NULL_RECORDER = NullSpanRecorder()
+
+
+class SpanWindow:
+    """ Combines the spans recorded for the most recent frames, to give the average time of each stage
+    over a rolling window of frames. """
+    def __init__(self, size=50):
+        self._recorders = deque(maxlen=size)
+
+    def add(self, recorder):
+        if recorder.is_enabled():
+            self._recorders.append(recorder)
+
+    def num_frames(self):
+        return len(self._recorders)
+
+    def combined(self):
+        """ A recorder with the total durations, calls and counts of the frames in the window. """
+        combined = SpanRecorder()
+        for recorder in self._recorders:
+            combined.add(recorder)
+        return combined
+
+    def summary(self):
+        """ Lines describing the average time per frame of each stage over the window. """
+        num_frames = max(self.num_frames(), 1)
+        return ["Stage timings (average of the last {} frames):".format(self.num_frames())] + \
+            ["  " + line for line in self.combined().summary(num_frames)]
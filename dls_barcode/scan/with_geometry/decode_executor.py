@@ -0,0 +1,184 @@
+from __future__ import division
+
+import multiprocessing
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8 - frames are pickled and sent along with each task instead
+    shared_memory = None
+
+from dls_barcode.datamatrix import DataMatrix
+from dls_barcode.datamatrix.locate import locate_contour
+from dls_util.image import Image
+from .plate_scanner import PlateScanner
+from .slot_scanner import SlotScanner
+from ..span_recorder import NULL_RECORDER
+
+
+class DecodeExecutor:
+    """ Fans out the expensive per-barcode work of a frame - reading the located barcodes and the deep
+    contour/square scans of slots that are still unresolved - across a pool of worker processes, and
+    hands the results back so that they can be merged into the plate.
+
+    The frame is copied into shared memory (once per frame, and only if some work is actually sent to
+    the pool) so that each task only carries a description of what to read. With a single worker,
+    everything is done serially in the calling process, exactly as it would be without an executor.
+    """
+    def __init__(self, num_workers=1):
+        self._num_workers = max(int(num_workers), 1)
+        self._pool = None
+
+        self._frame_img = None
+        self._shared_frame = None
+
+    def num_workers(self):
+        return self._num_workers
+
+    def is_parallel(self):
+        return self._num_workers > 1
+
+    def new_frame(self, frame_img):
+        """ Set the (grayscale) frame that the barcodes and slot scanners passed to this executor belong to. """
+        self._release_shared_frame()
+        self._frame_img = frame_img
+
+    def close(self):
+        """ Stop the worker processes and free the shared frame. """
+        self._release_shared_frame()
+        self._frame_img = None
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def read_barcodes(self, barcodes, spans=NULL_RECORDER):
+        """ Perform the read of each of the barcodes that hasn't already been read (counting the reads
+        with the spans recorder). """
+        unread = [bc for bc in barcodes if not bc.is_read()]
+        if not self._use_pool(unread):
+            for bc in unread:
+                bc.perform_read()
+                spans.count_read(bc)
+            return
+
+        frame = self._frame_handle()
+        tasks = [(frame, bc.finder_pattern(), bc.matrix_sizes()) for bc in unread]
+        results = self._get_pool().map(_read_barcode_task, tasks)
+
+        for bc, result in zip(unread, results):
+            bc.set_read_result(result)
+            spans.count_read(bc)
+
+    def scan_slots(self, slots, slot_scanner, force_all):
+        """ Perform the deep contour and square scans of each of the slots, returning (in the same order
+        as the slots) the valid barcode that was found for each one or None.
+        """
+        if not self._use_pool(slots):
+            return [PlateScanner.deep_slot_scan(slot, slot_scanner, force_all) for slot in slots]
+
+        frame = self._frame_handle()
+        tasks = [(frame, slot_scanner.radius_avg, slot, force_all) for slot in slots]
+        return self._get_pool().map(_scan_slot_task, tasks)
+
+    def _use_pool(self, items):
+        return self.is_parallel() and self._frame_img is not None and len(items) > 1
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self._num_workers, initializer=_init_worker,
+                                              initargs=(SlotScanner.DEBUG, SlotScanner.DEBUG_DIR))
+        return self._pool
+
+    def _frame_handle(self):
+        if shared_memory is None:
+            return self._frame_img.img
+
+        if self._shared_frame is None:
+            self._shared_frame = _SharedFrame(self._frame_img.img)
+        return self._shared_frame.handle()
+
+    def _release_shared_frame(self):
+        if self._shared_frame is not None:
+            self._shared_frame.release()
+            self._shared_frame = None
+
+
+class _SharedFrame:
+    """ A copy of a frame held in a block of shared memory that the worker processes can attach to. """
+    def __init__(self, img):
+        self._shm = shared_memory.SharedMemory(create=True, size=max(img.nbytes, 1))
+        self._shape = img.shape
+        self._dtype = img.dtype.str
+
+        shared = np.ndarray(img.shape, dtype=img.dtype, buffer=self._shm.buf)
+        shared[:] = img
+        del shared
+
+    def handle(self):
+        return self._shm.name, self._shape, self._dtype
+
+    def release(self):
+        self._shm.close()
+        self._shm.unlink()
+
+
+############################
+# Worker Process Functions
+############################
+# The shared frame that the worker is currently attached to: (name, SharedMemory, Image)
+_attached_frame = None
+
+
+def _init_worker(debug, debug_dir):
+    SlotScanner.DEBUG = debug
+    SlotScanner.DEBUG_DIR = debug_dir
+
+    # The pool already keeps the CPUs busy, so each worker locates serially (and doesn't use the thread
+    # pool that may have been running in the process it was forked from)
+    locate_contour.set_max_threads(1)
+
+
+def _frame_image(frame):
+    global _attached_frame
+
+    if isinstance(frame, np.ndarray):
+        return Image(frame)
+
+    name, shape, dtype = frame
+    if _attached_frame is None or _attached_frame[0] != name:
+        _detach_frame()
+        shm = shared_memory.SharedMemory(name=name)
+        img = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        _attached_frame = (name, shm, Image(img))
+
+    return _attached_frame[2]
+
+
+def _detach_frame():
+    global _attached_frame
+
+    if _attached_frame is not None:
+        shm = _attached_frame[1]
+        _attached_frame = None
+        try:
+            shm.close()
+        except BufferError:
+            # Something still holds a view of the old frame; the block is freed once that is collected
+            pass
+
+
+def _read_barcode_task(task):
+    frame, finder_pattern, matrix_sizes = task
+    barcode = DataMatrix(finder_pattern, _frame_image(frame))
+    barcode.set_matrix_sizes(matrix_sizes)
+    barcode.perform_read()
+    return barcode.read_result()
+
+
+def _scan_slot_task(task):
+    frame, radius_avg, slot, force_all = task
+    slot_scanner = SlotScanner(_frame_image(frame), [], radius_avg)
+    return PlateScanner.deep_slot_scan(slot, slot_scanner, force_all)
@@ -1,21 +1,44 @@
 from __future__ import division
 
-from dls_barcode.datamatrix import DataMatrix
+from dls_barcode.datamatrix import DataMatrix, Locator
+from dls_barcode.datamatrix.finder_pattern import FinderPattern
 from dls_barcode.geometry.exception import GeometryAlignmentError
 from dls_barcode.geometry.unipuck_locator import UnipuckLocator
 from dls_barcode.plate import Plate, Slot
 from dls_barcode.plate.geometry_adjuster import UnipuckGeometryAdjuster, GeometryAdjustmentError
 from dls_barcode.geometry import Geometry, GeometryException
+from dls_util.shape import Point
+from .decode_executor import DecodeExecutor
 from .empty_detector import EmptySlotDetector
 from .plate_scanner import PlateScanner
 from .slot_scanner import SlotScanner
 from ..scan_result import ScanResult
+from ..span_recorder import SpanRecorder, NULL_RECORDER
 from ..no_barcodes_detected_error import NoBarcodesDetectedError
 
 class GeometryScanner:
-    def __init__(self, plate_type, barcode_sizes):
+    # When the previous plate is complete, the number of its slots that are read to confirm that the same
+    # plate is still in view, before falling back to a full scan of the frame
+    VERIFY_SLOTS = 2
+
+    # When the puck is tracked, the size of the region that is searched for it, relative to the puck as it
+    # was last seen, and the number of frames that can be searched like this before the whole frame is
+    # searched again (to find anything that has come into view elsewhere)
+    TRACKING_MARGIN = 1.3
+    TRACKING_FRAMES = 10
+
+    def __init__(self, plate_type, barcode_sizes, decode_workers=1, record_spans=False, track_puck=False):
+        """ If the puck is tracked, each frame is only searched for the barcodes and the puck in the region
+        around where the puck was seen in the previous frame, rather than all over. """
         self.plate_type = plate_type
         self.barcode_sizes = barcode_sizes
+        self._executor = DecodeExecutor(decode_workers)
+        self._record_spans = record_spans
+        self._spans = NULL_RECORDER
+
+        self._track_puck = track_puck and plate_type == Geometry.UNIPUCK
+        self._track_bounds = None
+        self._tracked_frames = 0
 
         self._frame_number = 0
         self._plate = None
@@ -32,17 +55,24 @@ class GeometryScanner:
 
         self._frame_img = frame_img
         self._is_single_image = is_single_image
+        self._executor.new_frame(frame_img)
 
         try:
             self._perform_frame_scan()
             self._frame_result.set_plate(self._plate)
+            self._update_tracking(self._geometry)
         #TODO: use logs
         except (NoBarcodesDetectedError, GeometryException, GeometryAdjustmentError) as ex:
             self._frame_result.set_error(str(ex))
+            self._update_tracking(None)
 
         self._frame_result.end_timer()
         return self._frame_result
 
+    def close(self):
+        """ Stop any worker processes used to decode barcodes. """
+        self._executor.close()
+
     def _new_frame(self):
         self._frame_img = None
         self._geometry = None
@@ -51,38 +81,163 @@ class GeometryScanner:
 
         self._frame_number += 1
 
+        self._spans = SpanRecorder() if self._record_spans else NULL_RECORDER
+
         self._frame_result = ScanResult(self._frame_number)
         self._frame_result.set_previous_plate(self._plate)
+        self._frame_result.set_spans(self._spans)
         self._frame_result.start_timer()
 
     def _perform_frame_scan(self):
-        self._barcodes = self._locate_all_barcodes_in_image()
-        self._frame_result.set_barcodes(self._barcodes)
-        if self.plate_type == Geometry.UNIPUCK:
-            self._geometry = UnipuckLocator(self._frame_img).find_location()
-        if self._geometry == None:
-            self._geometry = self._calculate_geometry()
+        spans = self._spans
+        with spans.span("confirm"):
+            if self._is_previous_plate_confirmed():
+                return
 
-        self._frame_result.set_geometry(self._geometry)
+        self._locate_puck()
 
         # Determine if the previous plate scan has any barcodes in common with this one.
-        has_common_barcodes, is_same_align = self._find_common_barcode(self._geometry, self._barcodes)
+        with spans.span("common"):
+            has_common_barcodes, is_same_align = self._find_common_barcode(self._geometry, self._barcodes)
 
         if has_common_barcodes and self._plate.is_full_valid():
             return
 
         elif not has_common_barcodes:
-            self._initialize_plate_from_barcodes()
+            with spans.span("plate"):
+                self._initialize_plate_from_barcodes()
 
         elif has_common_barcodes and not is_same_align:
-            self._geometry = self._adjust_geometry(self._barcodes)
+            with spans.span("adjust"):
+                self._geometry = self._adjust_geometry(self._barcodes)
 
         # Merge with old plate
         if has_common_barcodes:
-            self._merge_frame_into_plate()
+            with spans.span("plate"):
+                self._merge_frame_into_plate()
+
+    def _is_previous_plate_confirmed(self):
+        """ If the previous plate is complete, we only need to know whether it is still in view. Rather than
+        locating every barcode in the frame and working out the geometry again, look for the barcodes of a
+        couple of its slots at the positions they were last seen. The plate is confirmed if any of these
+        reads match and none of them has different data.
+        """
+        if self._plate is None or not self._plate.is_full_valid():
+            return False
+
+        valid_slots = [slot for slot in self._plate.slots() if slot.state() == Slot.VALID]
+        step = max(len(valid_slots) // self.VERIFY_SLOTS, 1)
+
+        confirmed = []
+        for slot in valid_slots[::step][:self.VERIFY_SLOTS]:
+            barcode = self._read_barcode_at_slot(slot)
+            if barcode is None:
+                continue
+            elif barcode.data() != slot.barcode_data():
+                return False
+            confirmed.append(barcode)
+
+        if not confirmed:
+            return False
+
+        self._barcodes = confirmed
+        self._geometry = self._plate.geometry()
+        self._frame_result.set_barcodes(self._barcodes)
+        self._frame_result.set_geometry(self._geometry)
+        return True
+
+    def _read_barcode_at_slot(self, slot):
+        """ Locate and read a barcode in the area of the frame where the slot's barcode was last seen. """
+        radius = slot.barcode().radius() * 2
+        slot_img, roi = self._frame_img.sub_image(slot.barcode_position(), radius)
+        if not slot_img.is_valid():
+            return None
+
+        offset = Point(roi[0], roi[1])
+        for fp in Locator().locate_shallow(slot_img):
+            frame_fp = FinderPattern(fp.corner + offset, fp.baseVector, fp.sideVector)
+            barcode = DataMatrix(frame_fp, self._frame_img)
+            barcode.set_matrix_sizes(self.barcode_sizes)
+            barcode.perform_read()
+            self._spans.count_read(barcode)
+            if barcode.is_valid():
+                return barcode
+
+        return None
+
+    def _locate_puck(self):
+        """ Locate the barcodes and work out the geometry of the puck: in the region around where the puck was
+        last seen if it is being tracked, otherwise (or if it isn't found in that region) in the whole frame.
+        """
+        region = self._tracking_region()
+        if region is not None:
+            try:
+                self._locate_puck_in(region)
+                if self._is_puck_inside(region[1]):
+                    self._tracked_frames += 1
+                    self._spans.count("tracked")
+                    return
+            except (NoBarcodesDetectedError, GeometryException):
+                pass
+            self._spans.count("track lost")
+
+        self._tracked_frames = 0
+        self._locate_puck_in(None)
+
+    def _locate_puck_in(self, region):
+        self._geometry = None
+        with self._spans.span("locate"):
+            self._barcodes = self._locate_all_barcodes_in_image(region)
+        self._frame_result.set_barcodes(self._barcodes)
+        with self._spans.span("geometry"):
+            if self.plate_type == Geometry.UNIPUCK:
+                self._geometry = self._find_unipuck(region)
+            if self._geometry == None:
+                self._geometry = self._calculate_geometry()
+
+        self._frame_result.set_geometry(self._geometry)
 
-    def _locate_all_barcodes_in_image(self):
-        barcodes = DataMatrix.locate_all_barcodes_in_image(self._frame_img, self.barcode_sizes)
+    def _tracking_region(self):
+        """ The region of the frame to search for the puck - a sub image and its bounds (x1, y1, x2, y2) in
+        the frame - or None to search all of it. """
+        if self._track_bounds is None or self._is_single_image or self._tracked_frames >= self.TRACKING_FRAMES:
+            return None
+
+        radius = self._track_bounds.radius() * self.TRACKING_MARGIN
+        return self._frame_img.sub_image(self._track_bounds.center(), radius)
+
+    def _is_puck_inside(self, roi):
+        """ True if the puck that was found lies inside the region that was searched (apart from where the
+        region is cut off by the edge of the frame), so nothing was missed by only searching the region. """
+        x1, y1, x2, y2 = roi
+        center, radius = self._geometry.center(), self._geometry.radius()
+        return (x1 == 0 or center.x - radius >= x1) and (y1 == 0 or center.y - radius >= y1) and \
+               (x2 == self._frame_img.width or center.x + radius <= x2) and \
+               (y2 == self._frame_img.height or center.y + radius <= y2)
+
+    def _update_tracking(self, geometry):
+        if self._track_puck and geometry is not None:
+            self._track_bounds = geometry.bounds()
+        else:
+            self._track_bounds = None
+
+    def _find_unipuck(self, region):
+        if region is None:
+            return UnipuckLocator(self._frame_img).find_location()
+
+        region_img, roi = region
+        puck = UnipuckLocator(region_img).find_location()
+        if puck is not None:
+            puck.translate(Point(roi[0], roi[1]))
+        return puck
+
+    def _locate_all_barcodes_in_image(self, region=None):
+        if region is None:
+            barcodes = DataMatrix.locate_all_barcodes_in_image(self._frame_img, self.barcode_sizes)
+        else:
+            region_img, roi = region
+            barcodes = DataMatrix.locate_all_barcodes_in_region(self._frame_img, region_img, Point(roi[0], roi[1]),
+                                                                self.barcode_sizes)
         #TODO: log this
         if len(barcodes) == 0:
             raise NoBarcodesDetectedError()
@@ -102,14 +257,14 @@ class GeometryScanner:
         return geometry
 
     def _initialize_plate_from_barcodes(self):
-        for bc in self._barcodes:
-            bc.perform_read()
+        with self._spans.span("read"):
+            self._executor.read_barcodes(self._barcodes, self._spans)
 
         if self._any_valid_barcodes():
             slot_scanner = self._create_slot_scanner()
             self._plate = Plate(self.plate_type)
-            self._plate_scan = PlateScanner(self._plate, self._is_single_image)
-            self._plate_scan.new_frame(self._geometry, self._barcodes, slot_scanner)
+            self._plate_scan = PlateScanner(self._plate, self._executor, self._is_single_image)
+            self._plate_scan.new_frame(self._geometry, self._barcodes, slot_scanner, self._spans)
 
 
     def _merge_frame_into_plate(self):
@@ -117,13 +272,13 @@ class GeometryScanner:
         # be fairly sure we are dealing with the same plate. Copy all of the barcodes that we read in the
         # previous plate over to their slot in the new plate. Then read any that we haven't already read.
         slot_scanner = self._create_slot_scanner()
-        self._plate_scan.new_frame(self._geometry, self._barcodes, slot_scanner)
+        self._plate_scan.new_frame(self._geometry, self._barcodes, slot_scanner, self._spans)
 
     def _any_valid_barcodes(self):
         return any([bc.is_read() and bc.is_valid() for bc in self._barcodes])
 
     def _create_slot_scanner(self):
-        slot_scanner = SlotScanner(self._frame_img, self._barcodes)
+        slot_scanner = SlotScanner(self._frame_img, self._barcodes, spans=self._spans)
         return slot_scanner
 
     def _find_common_barcode(self, geometry, barcodes):
@@ -149,7 +304,9 @@ class GeometryScanner:
                 continue
 
             # Read the barcode
-            new_bc.perform_read()
+            if not new_bc.is_read():
+                new_bc.perform_read()
+                self._spans.count_read(new_bc)
 
             if not new_bc.is_valid():
                 continue
@@ -1,6 +1,7 @@
 import random
 
 from dls_barcode.plate.slot import Slot
+from ..span_recorder import NULL_RECORDER
 
 
 class BadGeometryException(Exception):
@@ -10,13 +11,14 @@ class BadGeometryException(Exception):
 class PlateScanner:
     FRAMES_BEFORE_DEEP = 3
 
-    def __init__(self, plate, single_frame=False):
+    def __init__(self, plate, executor, single_frame=False):
         self._plate = plate
+        self._executor = executor
 
         self._frame_num = -1
         self._force_deep_scan = single_frame
 
-    def new_frame(self, geometry, barcodes, slot_scanner):
+    def new_frame(self, geometry, barcodes, slot_scanner, spans=NULL_RECORDER):
         """ Merge the set of barcodes from a new scan into the plate. The new set comes from a new image
         of the same plate, so will almost certainly contain many of the same barcodes. Actually reading a
         barcode is relatively expensive; we iterate through each slot in the plate and only attempt to
@@ -26,15 +28,36 @@ class PlateScanner:
         object and update the slot position with the actual position of the center of the barcode. The
         position is likely to be similar to, but not exactly the same as, the bound's center. This info
         is retained as it allows us to properly calculate the geometry for future frames.
+
+        The reads and the deeper slot scans for all of the slots are handed to the executor together so
+        that they can be performed in parallel. The time taken by each of these is recorded by the spans
+        recorder.
         """
         self._frame_num += 1
         self._plate.set_geometry(geometry)
 
-        # Fill each slot with the correct barcodes
-        for slot in self._plate.slots():
-            self._new_slot_frame(barcodes, slot, slot_scanner)
+        # Match each slot with the barcode (if any) from the new set that is in the slot position
+        slot_barcodes = [self._new_slot_frame(barcodes, slot) for slot in self._plate.slots()]
+
+        # If we haven't already found the barcode data for a slot, try to read it from the new barcode
+        to_read = [(slot, bc) for slot, bc in zip(self._plate.slots(), slot_barcodes)
+                   if slot.state() != Slot.VALID and bc]
+        with spans.span("read"):
+            self._executor.read_barcodes([bc for _, bc in to_read], spans)
+        for slot, barcode in to_read:
+            slot.set_barcode(barcode)
+
+        # If the barcode still hasn't been read, try a deeper slot scan
+        with spans.span("empty"):
+            to_scan = [slot for slot in self._plate.slots() if self._needs_slot_scan(slot, slot_scanner)]
+        if to_scan and self._should_do_deep_scan():
+            with spans.span("slot_scan"):
+                found = self._executor.scan_slots(to_scan, slot_scanner, self._force_deep_scan)
+            spans.count("slot scans", len(to_scan))
+            for slot, barcode in zip(to_scan, found):
+                slot.set_barcode(barcode)
 
-    def _new_slot_frame(self, barcodes, slot, slot_scanner):
+    def _new_slot_frame(self, barcodes, slot):
         slot.new_frame()
 
         # Find the barcode from the new set that is in the slot position
@@ -45,14 +68,7 @@ class PlateScanner:
         # otherwise use the slot center position (from geometry) as an approximation
         position = barcode.center() if barcode else bounds.center()
         slot.set_barcode_position(position)
-
-        # If we haven't already found this barcode data, try to read it from the new barcode
-        if slot.state() != Slot.VALID and barcode:
-            barcode.perform_read()
-            slot.set_barcode(barcode)
-
-        # If the barcode still hasn't been read, try a deeper slot scan
-        self._slot_scan(slot, slot_scanner)
+        return barcode
 
     @staticmethod
     def _find_matching_barcode(slot_bounds, barcodes):
@@ -61,26 +77,35 @@ class PlateScanner:
                 return bc
         return None
 
-    def _slot_scan(self, slot, slot_scanner):
+    @staticmethod
+    def _needs_slot_scan(slot, slot_scanner):
         # If the slot barcode has already been read correctly, skip it
         if slot.state() == Slot.VALID:
-            return
+            return False
 
         # Check for empty slot
         if slot_scanner.is_slot_empty(slot):
             slot.set_empty()
-            return
+            return False
 
         # Clear any previous (empty/unread) result
         slot.set_no_result()
-
-        if self._should_do_deep_scan():
-            self._perform_deep_contour_slot_scan(slot, slot_scanner, self._force_deep_scan)
-            self._perform_square_slot_scan(slot, slot_scanner)
+        return True
 
     def _should_do_deep_scan(self):
         return self._force_deep_scan or self._frame_num > self.FRAMES_BEFORE_DEEP
 
+    @staticmethod
+    def deep_slot_scan(slot, slot_scanner, force_all):
+        """ Try to find and read the barcode in an unresolved slot using the deep contour and then the
+        square locators. Returns the valid barcode that was found, or None.
+        """
+        with slot_scanner.spans.span("deep_contour"):
+            PlateScanner._perform_deep_contour_slot_scan(slot, slot_scanner, force_all)
+        with slot_scanner.spans.span("square"):
+            PlateScanner._perform_square_slot_scan(slot, slot_scanner)
+        return slot.barcode()
+
     @staticmethod
     def _perform_deep_contour_slot_scan(slot, slot_scanner, force_all):
         if slot.state() != Slot.VALID:
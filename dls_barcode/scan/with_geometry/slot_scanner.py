@@ -8,7 +8,8 @@ import numpy as np
 
 from dls_barcode.datamatrix import DataMatrix, Locator
 from dls_barcode.plate.slot import Slot
-from dls_util.image import Image, Color
+from dls_util.image import Color
+from ..span_recorder import NULL_RECORDER
 
 
 class SlotScanner:
@@ -16,11 +17,12 @@ class SlotScanner:
     DEBUG = False
     DEBUG_DIR = "./debug"
 
-    def __init__(self, image, barcodes):
+    def __init__(self, image, barcodes, radius_avg=None, spans=NULL_RECORDER):
         self.image = image
         self.barcodes = barcodes
+        self.spans = spans
 
-        self.radius_avg = self._calculate_average_radius()
+        self.radius_avg = self._calculate_average_radius() if radius_avg is None else radius_avg
         self.side_avg = self.radius_avg * (2 / math.sqrt(2))
         self.brightness_threshold = None
 
@@ -41,6 +43,7 @@ class SlotScanner:
 
     def wiggles_read(self, barcode, locate_type="NORMAL"):
         barcode.perform_read(DataMatrix.DIAG_WIGGLES)
+        self.spans.count_read(barcode)
 
         self._DEBUG_WIGGLES_READ(barcode, locate_type, self.side_avg)
 
@@ -132,7 +135,7 @@ class SlotScanner:
         else:
             result = "_FAIL"
 
-        slot_img = Image(barcode._image).to_alpha()
+        slot_img = barcode._image.to_alpha()
 
         self._DEBUG_SAVE_IMAGE(slot_img, locate_type + result, side_length - 1)
 
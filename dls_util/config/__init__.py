@@ -1,4 +1,10 @@
 from .config import Config
-from .dialog import ConfigDialog
 from .item import *
-from .control import *
+
+try:
+    from .dialog import ConfigDialog
+    from .control import *
+except ImportError:
+    # The dialog and the controls need PyQt4; the rest of the config can be used without it (e.g. by the
+    # batch scanner)
+    pass
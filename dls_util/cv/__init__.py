@@ -1,2 +1,3 @@
 from .circle_detector import CircleDetector
 from .camera_stream import CameraStream
+from .replay_stream import ReplayStream
@@ -0,0 +1,136 @@
+from __future__ import division
+
+import glob
+import os
+import random
+import time
+
+import cv2 as opencv
+
+IMAGE_EXTENSIONS = [".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"]
+
+
+class ReplayStream:
+    """ Stands in for a CameraStream, replaying a recorded session - a video file, or a sequence of images
+    (a directory of them or a glob pattern, in name order) - instead of capturing from a camera. Frames
+    are returned at the specified rate (as a camera would deliver them), optionally with some random
+    jitter in the time between them, and the recording can be looped. Once a recording that isn't looped
+    has been replayed, get_frame() returns None (again at the frame rate).
+    """
+    def __init__(self, source, fps=10, jitter=0.0, loop=True):
+        """ The jitter is the fraction of the frame interval by which the time between frames may vary. """
+        self._source = source
+        self._files = self._find_images(source)
+        self._video = None
+        if not self._files:
+            self._video = self._open_video(source)
+
+        self._interval = 1.0 / fps if fps > 0 else 0
+        self._jitter = max(jitter, 0.0)
+        self._loop = loop
+
+        self._index = 0
+        self._next_time = None
+        self._finished = False
+        self._frame_shape = None
+
+    def get_frame(self):
+        self._wait_for_next_frame()
+        if self._finished:
+            return None
+
+        frame = self._read_frame()
+        if frame is None and self._loop and self._index > 0:
+            self._rewind()
+            frame = self._read_frame()
+
+        if frame is None:
+            self._finished = True
+        else:
+            self._frame_shape = frame.shape
+        return frame
+
+    def is_finished(self):
+        """ True once all of the frames have been replayed (which only happens if they aren't looped). """
+        return self._finished
+
+    def num_frames(self):
+        """ The number of frames in one replay of the recording. """
+        if self._video is None:
+            return len(self._files)
+        return int(self._video.get(opencv.CAP_PROP_FRAME_COUNT))
+
+    def release_resources(self):
+        if self._video is not None:
+            self._video.release()
+
+    def get_width(self):
+        return self._get_frame_shape()[1]
+
+    def get_height(self):
+        return self._get_frame_shape()[0]
+
+    def _wait_for_next_frame(self):
+        now = time.time()
+        if self._next_time is None:
+            self._next_time = now
+        elif now < self._next_time:
+            time.sleep(self._next_time - now)
+        elif now > self._next_time + self._interval:
+            # Whatever called this has fallen behind; frames that weren't taken are missed (as they would
+            # be from a camera) rather than being delivered in a burst to catch up
+            self._next_time = now
+
+        jitter = random.uniform(-self._jitter, self._jitter) if self._jitter else 0
+        self._next_time += self._interval * (1 + jitter)
+
+    def _read_frame(self):
+        if self._video is not None:
+            read_ok, frame = self._video.read()
+            self._index += 1
+            return frame if read_ok else None
+
+        # Skip any files that can't be read as images
+        while self._index < len(self._files):
+            frame = opencv.imread(self._files[self._index], opencv.IMREAD_COLOR)
+            self._index += 1
+            if frame is not None:
+                return frame
+        return None
+
+    def _rewind(self):
+        self._index = 0
+        if self._video is not None:
+            self._video.release()
+            self._video = self._open_video(self._source)
+
+    def _get_frame_shape(self):
+        if self._frame_shape is None:
+            if self._files:
+                frame = opencv.imread(self._files[0], opencv.IMREAD_COLOR)
+                self._frame_shape = frame.shape if frame is not None else (0, 0)
+            else:
+                self._frame_shape = (int(self._video.get(opencv.CAP_PROP_FRAME_HEIGHT)),
+                                     int(self._video.get(opencv.CAP_PROP_FRAME_WIDTH)))
+        return self._frame_shape
+
+    @staticmethod
+    def _find_images(source):
+        if os.path.isdir(source):
+            files = [os.path.join(source, name) for name in os.listdir(source)]
+        elif os.path.isfile(source):
+            files = [source] if ReplayStream._is_image(source) else []
+        else:
+            files = glob.glob(source)
+        return sorted(file for file in files if ReplayStream._is_image(file) and os.path.isfile(file))
+
+    @staticmethod
+    def _is_image(filename):
+        return os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS
+
+    @staticmethod
+    def _open_video(source):
+        video = opencv.VideoCapture(source)
+        if not video.isOpened():
+            raise IOError("Cannot replay '{}': it isn't a video file or a directory/pattern of images".format(source))
+        return video
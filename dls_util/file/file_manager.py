@@ -14,12 +14,20 @@ class FileManager:
         with open(file_path, 'w') as file:
             file.writelines(lines)
 
+    def append_lines(self, file_path, lines):
+        """Like write_lines, but adds the lines to the end of the file"""
+        with open(file_path, 'a') as file:
+            file.writelines(lines)
+
     def is_file(self, path):
         return os.path.isfile(path)
 
     def is_dir(self, path):
         return os.path.isdir(path)
 
+    def list_dir(self, path):
+        return os.listdir(path)
+
     def make_dir(self, path):
         os.makedirs(path)
 
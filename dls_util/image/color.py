@@ -1,7 +1,5 @@
 from random import randint
 
-from PyQt4.QtGui import QColor
-
 
 class Color:
     SEP = ","
@@ -37,6 +35,7 @@ class Color:
         return int(round(0.3*self.r + 0.6*self.g + 0.1*self.b))
 
     def to_qt(self):
+        from PyQt4.QtGui import QColor
         return QColor(self.r, self.g, self.b, self.a)
 
     def to_hex(self):
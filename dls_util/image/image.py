@@ -2,9 +2,6 @@ import cv2 as opencv
 import math
 import numpy as np
 
-from PyQt4 import QtCore
-from PyQt4.QtGui import QImage, QPixmap
-
 from dls_util.shape import Point
 
 
@@ -27,6 +24,24 @@ class Image:
         # All draw requests will be offset by this amount
         self.draw_offset = Point(0, 0)
 
+        # Summed-area table, built the first time a rectangle sum is requested. A sub image shares the
+        # table of the image it was cut from (at the given offset) rather than building its own, for as long
+        # as that image's img is the one that the sub image was cut from (its generation is the same).
+        self._integral = None
+        self._integral_parent = None
+        self._integral_parent_generation = 0
+        self._integral_offset = (0, 0)
+        self._generation = 0
+
+    def __getstate__(self):
+        # The summed-area table is only a cache, so leave it (and the image it might belong to) behind when
+        # the image is pickled, e.g. to be sent to another process
+        state = self.__dict__.copy()
+        state["_integral"] = None
+        state["_integral_parent"] = None
+        state["_integral_offset"] = (0, 0)
+        return state
+
     def size(self):
         return self.size()
 
@@ -45,9 +60,13 @@ class Image:
         blank_image = np.full((height, width, channels), value, np.uint8)
         return Image(img=blank_image)
 
-    def save_as(self, filename):
-        """ Write the image to the specified file. """
-        opencv.imwrite(filename, self.img)
+    def save_as(self, filename, params=None):
+        """ Write the image to the specified file. The format is chosen from the file extension; params is an
+        optional list of OpenCV encoding options (e.g. [cv2.IMWRITE_JPEG_QUALITY, 90]). """
+        if params:
+            opencv.imwrite(filename, self.img, params)
+        else:
+            opencv.imwrite(filename, self.img)
 
     def popup(self):
         """Pop up a window to display an image until a key is pressed (blocking)."""
@@ -87,6 +106,42 @@ class Image:
         rotated = opencv.warpAffine(self.img, matrix, (self.width, self.height))
         return Image(rotated)
 
+    def rotate_region(self, radians, center, x1, y1, x2, y2):
+        """ Return the region (x1, y1) to (x2, y2), exclusive, of the image that rotate() would produce for
+        the same angle and center, without rotating the rest of the image. The region must lie within the
+        image.
+
+        The source position of each pixel is calculated in the same fixed-point arithmetic that warpAffine
+        uses internally (before it calls remap), so the result is exactly the same as rotating the whole
+        image and then cutting out the region.
+        """
+        degrees = radians * 180 / math.pi
+        m = opencv.getRotationMatrix2D(center.tuple(), degrees, 1.0).ravel()
+
+        # Invert the transform, as warpAffine does
+        d = m[0] * m[4] - m[1] * m[3]
+        d = 1. / d if d != 0 else 0
+        a11, a12, a21, a22 = m[4] * d, -m[1] * d, -m[3] * d, m[0] * d
+        b1 = -a11 * m[2] - a12 * m[5]
+        b2 = -a21 * m[2] - a22 * m[5]
+
+        ys = np.arange(y1, y2, dtype=np.float64)
+        xs = np.arange(x1, x2, dtype=np.float64)
+        x0 = np.rint((a12 * ys + b1) * _AB_SCALE).astype(np.int64) + _ROUND_DELTA
+        y0 = np.rint((a22 * ys + b2) * _AB_SCALE).astype(np.int64) + _ROUND_DELTA
+        x_delta = np.rint(a11 * xs * _AB_SCALE).astype(np.int64)
+        y_delta = np.rint(a21 * xs * _AB_SCALE).astype(np.int64)
+
+        x = (x0[:, None] + x_delta[None, :]) >> (_AB_BITS - _INTER_BITS)
+        y = (y0[:, None] + y_delta[None, :]) >> (_AB_BITS - _INTER_BITS)
+
+        xy = np.dstack([x >> _INTER_BITS, y >> _INTER_BITS])
+        xy = np.clip(xy, -32768, 32767).astype(np.int16)
+        fraction = ((y & (_INTER_TAB_SIZE - 1)) * _INTER_TAB_SIZE + (x & (_INTER_TAB_SIZE - 1))).astype(np.uint16)
+
+        rotated = opencv.remap(self.img, xy, fraction, opencv.INTER_LINEAR)
+        return Image(rotated)
+
     def rotate_no_clip(self, angle):
         """Rotate the image about its center point, but expand the frame of the image
         so that the whole rotated shape will be visible without any being cropped.
@@ -105,10 +160,7 @@ class Image:
 
     def crop_image(self, center, radius):
         cropped, _ = self.sub_image(center, radius)
-        self.img = cropped.img
-        size = self.img.shape
-        self.width = size[1]
-        self.height = size[0]
+        self._replace_img(cropped.img)
 
     def crop_image_to_rectangle(self, rect):
         xstart = int(max(rect[0], 0))
@@ -117,10 +169,17 @@ class Image:
         yend = int(min(rect[3], self.height))
 
         sub = self.img[ystart:yend, xstart:xend]
-        self.img = sub
+        self._replace_img(sub)
+
+    def _replace_img(self, img):
+        """ Replace the image with a different one (e.g. a crop of it). The sub images that were cut from the
+        old image no longer share its summed-area table. """
+        self.img = img
         size = self.img.shape
         self.width = size[1]
         self.height = size[0]
+        self._generation += 1
+        self._discard_integral()
 
     def paste(self, src, x_off, y_off):
         """ Paste the source image onto the target one at the specified position.
@@ -147,6 +206,7 @@ class Image:
         sy2 = y2 - y_off
 
         # Perform paste
+        self._discard_integral()
         target = self.img
         source = src.img
         alpha = 3
@@ -176,8 +236,11 @@ class Image:
         yend = int(min(center.y + radius, height))
         roi_rect = [xstart, ystart, xend, yend]
 
-        sub = self.img[ystart:yend, xstart:xend]
-        return Image(sub), roi_rect
+        sub = Image(self.img[ystart:yend, xstart:xend])
+        sub._integral_parent = self
+        sub._integral_parent_generation = self._generation
+        sub._integral_offset = (xstart, ystart)
+        return sub, roi_rect
 
     ############################
     # Colour Space Conversions
@@ -218,6 +281,10 @@ class Image:
 
     def to_qt_pixmap(self, scale=None):
         """ Convert the image into a QT pixmap that can be displayed in QT GUI elements. """
+        # Qt is only imported when it is needed, so that images can be processed without it (e.g. in batch scans)
+        from PyQt4 import QtCore
+        from PyQt4.QtGui import QImage, QPixmap
+
         bytes_per_line = 3 * self.width
         img = self.to_color().img
         rgb = opencv.cvtColor(img, opencv.COLOR_BGR2RGB)
@@ -234,31 +301,37 @@ class Image:
     ############################
     def draw_rectangle(self, roi, color, thickness=2):
         """ Draw the specified rectangle on the image (in place). """
+        self._discard_integral()
         top_left = self._format_point(Point(roi[0], roi[1]))
         bottom_right = self._format_point(Point(roi[2], roi[3]))
         opencv.rectangle(self.img, top_left.tuple(), bottom_right.tuple(), color.bgra(), thickness=thickness)
 
     def draw_circle(self, circle, color, thickness=2):
         """ Draw the specified circle on the image (in place). """
+        self._discard_integral()
         center = self._format_point(circle.center())
         opencv.circle(self.img, center.tuple(), int(circle.radius()), color.bgra(), thickness=thickness)
 
     def draw_dot(self, center, color, thickness=5):
         """ Draw the specified dot on the image (in place). """
+        self._discard_integral()
         center = self._format_point(center)
         opencv.circle(self.img, center.tuple(), radius=0, color=color.bgra(), thickness=thickness)
 
     def draw_feature_outline(self, outline, color, thickness=5):
+        self._discard_integral()
         opencv.drawContours(self.img, [outline], -1, color=color.bgra(), thickness=thickness)
 
     def draw_line(self, p1, p2, color, thickness=2):
         """ Draw the specified line on the image (in place). """
+        self._discard_integral()
         p1 = self._format_point(p1)
         p2 = self._format_point(p2)
         opencv.line(self.img, p1.tuple(), p2.tuple(), color.bgra(), thickness=thickness)
 
     def draw_text(self, text, position, color, centered=False, scale=1.5, thickness=3):
         """ Draw the specified text on the image (in place). """
+        self._discard_integral()
         if centered:
             text_size = opencv.getTextSize(text, opencv.FONT_HERSHEY_SIMPLEX, fontScale=scale, thickness=thickness)[0]
             text_size = Point(-text_size[0]/2.0, text_size[1]/2.0)
@@ -280,5 +353,65 @@ class Image:
         x1, y1 = int(round(center.x - width / 2)), int(round(center.y - height / 2))
         x2, y2 = int(round(x1 + width)), int(round(y1 + height))
 
-        brightness = np.sum(self.img[y1:y2, x1:x2]) / (width * height)
+        brightness = self.rectangle_sums(x1, y1, x2, y2) / (width * height)
         return brightness
+
+    def rectangle_sums(self, x1, y1, x2, y2):
+        """ Return the sum of the pixel values (over all channels) in the rectangle(s) with top-left corner
+        (x1, y1) and bottom-right corner (x2, y2), exclusive. The coordinates may be integers or integer arrays
+        (for many rectangles at once); each rectangle is clipped to the image in the same way as the slice
+        img[y1:y2, x1:x2] would be. Each sum is a single lookup in the summed-area table of the image.
+        """
+        x1, x2 = _slice_bounds(np.asarray(x1), np.asarray(x2), self.width)
+        y1, y2 = _slice_bounds(np.asarray(y1), np.asarray(y2), self.height)
+
+        integral, (x_off, y_off) = self._summed_area_table()
+        x1, x2, y1, y2 = x1 + x_off, x2 + x_off, y1 + y_off, y2 + y_off
+
+        sums = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+        if sums.ndim > x1.ndim:
+            sums = np.sum(sums, axis=-1)
+        return sums
+
+    def _summed_area_table(self):
+        """ Return the summed-area table that covers this image, and the offset of this image within it. """
+        if self._integral_parent is not None and \
+                self._integral_parent._generation != self._integral_parent_generation:
+            # The image this was cut from has been replaced, so its table no longer covers this image
+            self._integral_parent = None
+            self._integral_offset = (0, 0)
+
+        if self._integral_parent is not None:
+            integral, (x_off, y_off) = self._integral_parent._summed_area_table()
+            return integral, (x_off + self._integral_offset[0], y_off + self._integral_offset[1])
+
+        if self._integral is None:
+            self._integral = opencv.integral(self.img, sdepth=opencv.CV_64F)
+        return self._integral, (0, 0)
+
+    def _discard_integral(self):
+        """ Called whenever the image is modified so that the summed-area table is rebuilt when next needed. """
+        if self._integral_parent is not None:
+            self._integral_parent._discard_integral()
+
+        self._integral = None
+        self._integral_parent = None
+        self._integral_offset = (0, 0)
+
+
+# Fixed-point precision used by OpenCV's warpAffine for bilinear interpolation
+_INTER_BITS = 5
+_INTER_TAB_SIZE = 1 << _INTER_BITS
+_AB_BITS = 10
+_AB_SCALE = 1 << _AB_BITS
+_ROUND_DELTA = _AB_SCALE // _INTER_TAB_SIZE // 2
+
+
+def _slice_bounds(starts, stops, size):
+    """ Normalize slice start/stop indices for an axis of the specified size in the same way that Python does
+    for a basic slice (negative indices count from the end, and the result is clipped to the axis). Empty
+    slices are returned with stop == start.
+    """
+    starts = np.where(starts < 0, starts + size, starts).clip(0, size)
+    stops = np.where(stops < 0, stops + size, stops).clip(0, size)
+    return starts, np.maximum(starts, stops)
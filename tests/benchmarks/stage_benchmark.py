@@ -0,0 +1,289 @@
+""" Benchmarks the scanning pipeline over the test image corpus (the puck images in tests/test-resources and
+its blue_stand and Tray directories): every image is scanned (as a single image, with a new
+GeometryScanner) while the time spent in each of the main stages is recorded. Reports the wall time and
+throughput of each stage and of the whole scan, and how many barcodes were read, and compares them with a
+stored baseline, flagging any stage that has got slower and any drop in the number of barcodes read.
+
+Run from the top project directory:
+
+    python -m tests.benchmarks.stage_benchmark             compare with tests/benchmarks/baseline.json
+    python -m tests.benchmarks.stage_benchmark --save      write the results as the new baseline
+
+The exit code is 1 if there are regressions. Timings depend on the machine, so the baseline should be
+generated on the machine that the benchmark is run on; the read counts don't.
+"""
+from __future__ import division, print_function
+
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+from functools import wraps
+
+from dls_barcode.datamatrix import DataMatrix, Locator
+from dls_barcode.datamatrix.locate.locate_square import SquareLocator
+from dls_barcode.datamatrix.read.reedsolo import ReedSolomonDecoder
+from dls_barcode.geometry.unipuck_calculator import UnipuckCalculator
+from dls_barcode.geometry.unipuck_locator import UnipuckLocator
+from dls_barcode.scan import GeometryScanner
+from dls_util.image import Image
+
+TEST_IMG_DIR = 'tests/test-resources/'
+CORPUS = ['puck*.png', 'blue_stand/*.png', 'Tray/*.png']
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+PLATE_TYPE = "Unipuck"
+BARCODE_SIZES = [14]
+
+# The stages that are timed: (name, class, method). The time of a stage includes any stages that it calls.
+STAGES = [
+    ("scan_next_frame", GeometryScanner, "scan_next_frame"),
+    ("locate_shallow", Locator, "locate_shallow"),
+    ("locate_deep", Locator, "locate_deep"),
+    ("square_locate", SquareLocator, "locate"),
+    ("unipuck_locate", UnipuckLocator, "find_location"),
+    ("unipuck_alignment", UnipuckCalculator, "perform_alignment"),
+    ("datamatrix_read", DataMatrix, "perform_read"),
+    ("reed_solomon_decode", ReedSolomonDecoder, "decode"),
+]
+END_TO_END_STAGE = "scan_next_frame"
+
+# A stage is flagged as slower if its time per image is more than this fraction, and more than this many
+# seconds, above the baseline (see compare)
+DEFAULT_TOLERANCE = 0.25
+MIN_TIME_CHANGE = 0.002
+
+
+class StageTimer:
+    """ Wraps the methods of the stages so that the number of calls to each, and the total time spent in
+    them, are recorded. A call of a stage from inside another call of the same stage isn't counted again. """
+    def __init__(self):
+        self.calls = {}
+        self.times = {}
+        self.reads = 0
+        self.valid_reads = 0
+        self._originals = []
+        self._depth = {}
+
+    def __enter__(self):
+        for name, cls, method in STAGES:
+            original = cls.__dict__[method]
+            self._originals.append((cls, method, original))
+            setattr(cls, method, self._timed(name, original))
+        self.reset()
+        return self
+
+    def __exit__(self, *args):
+        for cls, method, original in self._originals:
+            setattr(cls, method, original)
+        self._originals = []
+
+    def reset(self):
+        self.calls = dict((name, 0) for name, _, _ in STAGES)
+        self.times = dict((name, 0.0) for name, _, _ in STAGES)
+        self._depth = dict((name, 0) for name, _, _ in STAGES)
+        self.reads = 0
+        self.valid_reads = 0
+
+    def _timed(self, name, function):
+        timer = self
+
+        @wraps(function)
+        def timed(obj, *args, **kwargs):
+            timer._depth[name] += 1
+            start = time.perf_counter()
+            try:
+                return function(obj, *args, **kwargs)
+            finally:
+                timer._depth[name] -= 1
+                if timer._depth[name] == 0:
+                    timer.times[name] += time.perf_counter() - start
+                    timer.calls[name] += 1
+                    if name == "datamatrix_read":
+                        timer.reads += 1
+                        timer.valid_reads += int(obj.is_valid())
+
+        return timed
+
+
+def load_corpus():
+    files = []
+    for pattern in CORPUS:
+        files.extend(sorted(glob.glob(os.path.join(TEST_IMG_DIR, pattern))))
+
+    names = [os.path.relpath(file, TEST_IMG_DIR).replace(os.sep, '/') for file in files]
+    images = [Image.from_file(file).to_grayscale() for file in files]
+    return names, images
+
+
+def run_benchmark(names, images, repeat):
+    """ Scan all of the images, the specified number of times, and return the results (using the fastest
+    of the runs for each time). """
+    stage_times = None
+    image_times = [float('inf')] * len(images)
+    image_results = []
+
+    # The first scan includes one-off costs (e.g. building lookup tables), which shouldn't be timed
+    GeometryScanner(PLATE_TYPE, BARCODE_SIZES).scan_next_frame(images[0].copy(), is_single_image=True)
+
+    with StageTimer() as timer:
+        for run in range(repeat):
+            timer.reset()
+            image_results = []
+            for i, image in enumerate(images):
+                # Scan a copy, as a camera frame would be new, so that nothing cached on the image by an
+                # earlier run (e.g. its summed-area table) is reused
+                image = image.copy()
+                start = time.perf_counter()
+                result = GeometryScanner(PLATE_TYPE, BARCODE_SIZES).scan_next_frame(image, is_single_image=True)
+                image_times[i] = min(image_times[i], time.perf_counter() - start)
+
+                plate = result.plate()
+                image_results.append({
+                    "aligned": plate is not None,
+                    "located": len(result.barcodes()),
+                    "valid": plate.num_valid_barcodes() if plate is not None else 0})
+
+            if stage_times is None:
+                stage_times = dict(timer.times)
+            else:
+                stage_times = dict((name, min(stage_times[name], timer.times[name])) for name in stage_times)
+            calls, reads, valid_reads = dict(timer.calls), timer.reads, timer.valid_reads
+
+    num_images = len(images)
+    stages = {}
+    for name, _, _ in STAGES:
+        stages[name] = {
+            "calls": calls[name],
+            "total_time": round(stage_times[name], 4),
+            "time_per_image": round(stage_times[name] / num_images, 5),
+            "calls_per_second": round(calls[name] / stage_times[name], 1) if stage_times[name] else None}
+
+    total_time = sum(image_times)
+    images_summary = {}
+    for name, image_time, image_result in zip(names, image_times, image_results):
+        images_summary[name] = dict(image_result, time=round(image_time, 4))
+
+    return {
+        "machine": {"platform": platform.platform(), "processor": platform.processor(),
+                    "python": platform.python_version()},
+        "repeat": repeat,
+        "stages": stages,
+        "images": images_summary,
+        "totals": {
+            "images": num_images,
+            "aligned": sum(r["aligned"] for r in image_results),
+            "located": sum(r["located"] for r in image_results),
+            "valid": sum(r["valid"] for r in image_results),
+            "reads": reads,
+            "valid_reads": valid_reads,
+            "read_rate": round(valid_reads / reads, 4) if reads else None,
+            "total_time": round(total_time, 4),
+            "images_per_second": round(num_images / total_time, 2)}}
+
+
+def compare(results, baseline, tolerance):
+    """ Return the list of regressions (as messages) of the results against the baseline. """
+    regressions = []
+
+    # The speed of the whole machine varies from run to run (by more than the tolerance on a busy one), so
+    # each stage is compared after allowing for the typical change of all of the stages. The whole scan is
+    # compared without allowing for it, so that a change that slows every stage is still caught.
+    times = []
+    for name, stage in results["stages"].items():
+        base = baseline["stages"].get(name)
+        if base is not None and base["time_per_image"]:
+            times.append((name, stage["time_per_image"], base["time_per_image"]))
+
+    ratios = sorted(now / before for _, now, before in times)
+    machine_factor = ratios[len(ratios) // 2] if ratios else 1.0
+
+    for name, now, before in times:
+        if name == END_TO_END_STAGE:
+            expected = before
+        else:
+            expected = before * machine_factor
+        if now > expected * (1 + tolerance) and now - expected > MIN_TIME_CHANGE:
+            regressions.append("{} is slower: {:.1f} ms per image (baseline {:.1f} ms{})".format(
+                name, 1000 * now, 1000 * before,
+                "" if expected == before else ", {:.1f} ms allowing for the machine".format(1000 * expected)))
+
+    totals, base_totals = results["totals"], baseline["totals"]
+    for key in ["aligned", "valid", "valid_reads"]:
+        if totals[key] < base_totals[key]:
+            regressions.append("Fewer {}: {} (baseline {})".format(key.replace("_", " "), totals[key], base_totals[key]))
+
+    for name, image in sorted(results["images"].items()):
+        base = baseline["images"].get(name)
+        if base is not None and image["valid"] < base["valid"]:
+            regressions.append("{}: {} barcodes read (baseline {})".format(name, image["valid"], base["valid"]))
+
+    return regressions
+
+
+def report(results, baseline):
+    print("{:<22}{:>8}{:>12}{:>16}{:>14}".format("Stage", "Calls", "Time (s)", "ms per image", "Calls/s"))
+    for name, _, _ in STAGES:
+        stage = results["stages"][name]
+        line = "{:<22}{:>8}{:>12.3f}{:>16.2f}{:>14}".format(name, stage["calls"], stage["total_time"],
+                                                             1000 * stage["time_per_image"],
+                                                             stage["calls_per_second"] or "-")
+        if baseline is not None and name in baseline["stages"]:
+            before = baseline["stages"][name]["time_per_image"]
+            if before:
+                line += "   {:+.0%} vs baseline".format(stage["time_per_image"] / before - 1)
+        print(line)
+
+    totals = results["totals"]
+    print("\n{images} images ({aligned} aligned) in {total_time:.2f} s: {images_per_second} images/s".format(**totals))
+    print("{located} finder patterns located, {valid} slot barcodes read; {valid_reads} of {reads} datamatrix "
+          "reads valid ({read_rate:.1%})".format(**totals))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stages of the scan over the test images.")
+    parser.add_argument("-b", "--baseline", default=DEFAULT_BASELINE, help="The baseline file (default=%(default)s)")
+    parser.add_argument("-s", "--save", action="store_true", help="Save the results as the baseline")
+    parser.add_argument("-n", "--repeat", type=int, default=3,
+                        help="The number of times to scan the images; the fastest times are used (default=%(default)s)")
+    parser.add_argument("-t", "--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="The fraction by which a stage can be slower than the baseline (default=%(default)s)")
+    parser.add_argument("-o", "--output", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    names, images = load_corpus()
+    results = run_benchmark(names, images, max(args.repeat, 1))
+
+    baseline = None
+    if not args.save and os.path.isfile(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    report(results, baseline)
+
+    for filename in [args.output, args.baseline if args.save else None]:
+        if filename is not None:
+            with open(filename, "w") as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+                file.write("\n")
+            print("Results written to {}".format(filename))
+
+    if baseline is None:
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nREGRESSIONS against {}:".format(args.baseline))
+        for regression in regressions:
+            print("  " + regression)
+        return 1
+
+    print("\nNo regressions against {}".format(args.baseline))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,50 @@
+""" Compares the coarse-to-fine (pyramid) contour locator with the full resolution one over all of the
+test images: the number of finder patterns located, the number of barcodes that can then be read and the
+time taken to locate them. Run from the top project directory.
+"""
+import glob
+import sys
+import time
+
+from dls_barcode.datamatrix import DataMatrix, Locator
+from dls_util.image import Image
+
+TEST_IMG_DIR = 'tests/test-resources/'
+SCALE = float(sys.argv[1]) if len(sys.argv) > 1 else Locator.PYRAMID_SCALE
+
+files = sorted(glob.glob(TEST_IMG_DIR + '**/*.png', recursive=True))
+images = [Image.from_file(f).to_grayscale() for f in files]
+
+
+def run(pyramid_mode):
+    Locator.PYRAMID_MODE = pyramid_mode
+    Locator.PYRAMID_SCALE = SCALE
+
+    num_located = 0
+    read = []
+    locate_time = 0
+    for image in images:
+        start = time.time()
+        barcodes = DataMatrix.locate_all_barcodes_in_image(image, [14])
+        locate_time += time.time() - start
+
+        num_located += len(barcodes)
+        for barcode in barcodes:
+            barcode.perform_read()
+        read.append(set(bc.data() for bc in barcodes if bc.is_valid()))
+
+    return num_located, read, locate_time
+
+
+full_located, full_read, full_time = run(False)
+pyramid_located, pyramid_read, pyramid_time = run(True)
+
+num_full_read = sum(len(r) for r in full_read)
+num_pyramid_read = sum(len(r) for r in pyramid_read)
+num_common = sum(len(a & b) for a, b in zip(full_read, pyramid_read))
+
+print("{} images ({} at least {} pixels wide), pyramid scale {}".format(
+    len(images), len([i for i in images if i.width >= Locator.PYRAMID_MIN_WIDTH]), Locator.PYRAMID_MIN_WIDTH, SCALE))
+print("Full resolution: {} located, {} read, {:.2f}s".format(full_located, num_full_read, full_time))
+print("Pyramid:         {} located, {} read, {:.2f}s".format(pyramid_located, num_pyramid_read, pyramid_time))
+print("Recall: {:.1%} of the barcodes read at full resolution".format(num_common / max(num_full_read, 1)))
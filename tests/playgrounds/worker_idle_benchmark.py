@@ -0,0 +1,113 @@
+""" Measures how much CPU the capture and scanner worker processes use while they are idle (waiting for a
+command or a frame), and how long they take to wake up and respond when one arrives. Neither a camera nor
+any real scanning is needed: both workers are run with those parts stubbed out. Run from the top project
+directory.
+"""
+import multiprocessing
+import resource
+import sys
+import time
+
+import numpy as np
+from mock import MagicMock
+
+from dls_barcode.camera.capture_command import CaptureCommand
+from dls_barcode.camera.capture_worker import CaptureWorker
+from dls_barcode.camera.frame_ring import FrameRing
+from dls_barcode.camera.scanner_worker import ScannerWorker
+from dls_barcode.camera.stream_action import StreamAction
+
+IDLE_TIME = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+NUM_WAKE_UPS = 20
+CAMERA = 0
+
+
+class IdleStream:
+    """ A camera stream that is slow to produce a frame and has nothing to release. """
+    def get_frame(self):
+        time.sleep(0.1)
+        return None
+
+    def release_resources(self):
+        pass
+
+
+class IdleCaptureWorker(CaptureWorker):
+    def __init__(self, response_queue):
+        CaptureWorker.__init__(self, {})
+        self._streams = {CAMERA: IdleStream()}
+        self._response_queue = response_queue
+
+    def _run_capture(self, stream, *args):
+        self._response_queue.put(time.time())
+
+
+class IdleScannerWorker(ScannerWorker):
+    def __init__(self, response_queue):
+        self._response_queue = response_queue
+
+    def _create_scanner(self, cam_position, config):
+        self._scanner = MagicMock()
+
+    def _process_frame(self, frame, *args):
+        self._response_queue.put(time.time())
+
+
+def run_capture_worker(response_queue, queues):
+    IdleCaptureWorker(response_queue).run(*queues)
+
+
+def run_scanner_worker(response_queue, queues):
+    IdleScannerWorker(response_queue).run(*queues)
+
+
+def measure(target, queues, wake_up_queue, wake_up_message, kill_queue):
+    """ Return the CPU time per second used by the worker while idle, the mean/max wake-up latency, and the
+    time it takes to stop once killed. """
+    response_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=target, args=(response_queue, queues))
+
+    cpu_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+    process.start()
+    time.sleep(IDLE_TIME)
+
+    latencies = []
+    for _ in range(NUM_WAKE_UPS):
+        sent = time.time()
+        wake_up_queue.put(wake_up_message())
+        latencies.append(response_queue.get(timeout=10) - sent)
+        time.sleep(0.05)
+
+    killed = time.time()
+    kill_queue.put(None)
+    process.join()
+    kill_latency = time.time() - killed
+    cpu_end = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    cpu = (cpu_end.ru_utime + cpu_end.ru_stime) - (cpu_start.ru_utime + cpu_start.ru_stime)
+    elapsed = IDLE_TIME + NUM_WAKE_UPS * 0.05
+    return cpu / elapsed, np.mean(latencies), np.max(latencies), kill_latency
+
+
+def report(name, result):
+    cpu, mean_latency, max_latency, kill_latency = result
+    print("{}: idle CPU {:.1f}% of a core; wake-up latency mean {:.2f} ms, max {:.2f} ms; stopped {:.0f} ms after "
+          "kill".format(name, 100 * cpu, 1000 * mean_latency, 1000 * max_latency, 1000 * kill_latency))
+
+
+if __name__ == '__main__':
+    # Capture worker waiting for a start command
+    command_queue, kill_queue = multiprocessing.Queue(), multiprocessing.Queue()
+    queues = (None, None, None, None, None, command_queue, kill_queue)
+    result = measure(run_capture_worker, queues, command_queue, lambda: CaptureCommand(StreamAction.START, CAMERA),
+                     kill_queue)
+    report("Capture worker", result)
+
+    # Scanner worker waiting for a frame
+    task_queue, kill_queue = multiprocessing.Queue(), multiprocessing.Queue()
+    ring = FrameRing(16)
+    frame = np.zeros((4, 4), dtype=np.uint8)
+    queues = (task_queue, ring, None, None, None, kill_queue, MagicMock(), None)
+    result = measure(run_scanner_worker, queues, task_queue, lambda: ring.put(frame), kill_queue)
+    report("Scanner worker", result)
+    ring.close()
@@ -0,0 +1,80 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from dls_barcode.batch import find_images, scan_image, write_results, CSV_COLUMNS
+
+TEST_IMG = os.path.join("tests", "test-resources", "puck1_11.png")
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self._directory, "sub"))
+        for name in ["b.png", "a.JPG", "notes.txt", os.path.join("sub", "c.png")]:
+            open(os.path.join(self._directory, name), "w").close()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _path(self, *names):
+        return os.path.join(self._directory, *names)
+
+    def test_find_images_includes_image_files_of_directories_and_patterns_in_order(self):
+        # Act
+        files = find_images([self._path("notes.txt"), self._directory, self._path("*.png")])
+
+        # Assert
+        self.assertEqual(files, [self._path("notes.txt"), self._path("a.JPG"), self._path("b.png")])
+
+    def test_find_images_only_includes_subdirectories_when_recursive(self):
+        # Act
+        files = find_images([self._directory], recursive=True)
+        pattern_files = find_images([self._path("**", "*.png")], recursive=True)
+
+        # Assert
+        self.assertEqual(files, [self._path("a.JPG"), self._path("b.png"), self._path("sub", "c.png")])
+        self.assertEqual(pattern_files, [self._path("b.png"), self._path("sub", "c.png")])
+
+    def test_scan_image_reports_error_for_unreadable_image(self):
+        # Act
+        result = scan_image(self._path("b.png"), "Unipuck", [14])
+
+        # Assert
+        self.assertEqual(result["error"], "Could not read image")
+        self.assertEqual(result["barcodes"], [])
+
+    def test_scan_image_reads_barcodes_of_each_slot(self):
+        # Act
+        result = scan_image(TEST_IMG, "Unipuck", [14])
+
+        # Assert
+        self.assertIsNone(result["error"])
+        self.assertEqual(len(result["barcodes"]), 16)
+        self.assertEqual(result["barcodes"][0], "DF150E0101")
+        self.assertEqual(result["valid"] + result["empty"] + result["unread"], 16)
+        self.assertIsNotNone(result["geometry"])
+
+    def test_results_are_written_as_json_lines_or_csv(self):
+        # Arrange
+        results = [{"file": "a.png", "plate_type": "Unipuck", "valid": 1, "empty": 1, "unread": 0,
+                    "barcodes": ["ABC", "DEF"], "geometry": "1:2:3:0.5", "error": None, "load_time": 0.1,
+                    "scan_time": 0.2},
+                   {"file": "b.png", "plate_type": "Unipuck", "valid": 0, "empty": 0, "unread": 0, "barcodes": [],
+                    "geometry": None, "error": "Could not read image", "load_time": 0.0, "scan_time": 0.0}]
+        json_output, csv_output = io.StringIO(), io.StringIO()
+
+        # Act
+        num_plates = write_results(results, json_output, "json")
+        write_results(results, csv_output, "csv")
+
+        # Assert
+        self.assertEqual(num_plates, 1)
+        self.assertEqual([json.loads(line) for line in json_output.getvalue().splitlines()], results)
+        self.assertEqual(csv_output.getvalue().splitlines(),
+                         [",".join(CSV_COLUMNS), 'a.png,Unipuck,1,1,0,"ABC,DEF",1:2:3:0.5,,0.1,0.2',
+                          "b.png,Unipuck,0,0,0,,,Could not read image,0.0,0.0"])
@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+
+from dls_barcode.camera.frame_change_detector import FrameChangeDetector
+
+
+class TestFrameChangeDetector(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self._frame = random.randint(0, 256, (240, 320, 3)).astype(np.uint8)
+
+    def test_no_frame_is_unchanged_until_there_is_a_reference(self):
+        # Arrange
+        detector = FrameChangeDetector(8)
+
+        # Act
+        unchanged = detector.is_unchanged(self._frame)
+
+        # Assert
+        self.assertFalse(unchanged)
+
+    def test_frame_with_camera_noise_is_unchanged(self):
+        # Arrange
+        detector = FrameChangeDetector(8)
+        detector.set_reference(self._frame)
+        noise = np.random.RandomState(1).normal(0, 8, self._frame.shape)
+        noisy = np.clip(self._frame + noise, 0, 255).astype(np.uint8)
+
+        # Act
+        unchanged = detector.is_unchanged(noisy)
+
+        # Assert
+        self.assertTrue(unchanged)
+
+    def test_small_change_to_part_of_the_frame_is_detected(self):
+        # Arrange
+        detector = FrameChangeDetector(8)
+        detector.set_reference(self._frame)
+        changed = self._frame.copy()
+        changed[100:112, 150:162] = 0
+
+        # Act
+        unchanged = detector.is_unchanged(changed)
+
+        # Assert
+        self.assertFalse(unchanged)
+
+    def test_frame_of_a_different_size_has_changed(self):
+        # Arrange
+        detector = FrameChangeDetector(8)
+        detector.set_reference(self._frame)
+
+        # Act
+        unchanged = detector.is_unchanged(self._frame[:120, :160])
+
+        # Assert
+        self.assertFalse(unchanged)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import multiprocessing
+import pickle
+import unittest
+
+import numpy as np
+
+from dls_barcode.camera.frame_ring import FrameRing, FrameRef
+
+
+def _frame(value, shape=(12, 16, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def _read_in_other_process(ring, message, result_queue):
+    with ring.frame(message) as frame:
+        result_queue.put(None if frame is None else int(frame.sum()))
+    ring.close()
+
+
+class TestFrameRing(unittest.TestCase):
+
+    def setUp(self):
+        self._ring = FrameRing(12 * 16 * 3)
+
+    def tearDown(self):
+        self._ring.close()
+
+    def test_frame_is_read_back_from_its_reference(self):
+        source = np.arange(12 * 16 * 3, dtype=np.uint8).reshape(12, 16, 3)
+
+        message = self._ring.put(source)
+
+        self.assertIsInstance(message, FrameRef)
+        with self._ring.frame(message) as frame:
+            self.assertTrue(np.array_equal(frame, source))
+
+    def test_reference_is_small_when_pickled(self):
+        message = self._ring.put(_frame(1))
+
+        self.assertLess(len(pickle.dumps(message)), 256)
+
+    def test_frame_is_not_available_once_its_slot_is_reused(self):
+        old = self._ring.put(_frame(1))
+        for i in range(3):
+            self._ring.put(_frame(2 + i))
+
+        with self._ring.frame(old) as frame:
+            self.assertIsNone(frame)
+
+    def test_slot_is_not_reused_while_its_frame_is_being_read(self):
+        message = self._ring.put(_frame(7))
+
+        with self._ring.frame(message) as frame:
+            others = [self._ring.put(_frame(9)) for _ in range(4)]
+
+            self.assertTrue(np.all(frame == 7))
+            self.assertTrue(all(m.slot != message.slot for m in others))
+
+    def test_frame_too_big_for_the_slots_is_passed_as_a_copy(self):
+        source = _frame(3, (20, 20, 3))
+
+        message = self._ring.put(source)
+        source[:] = 0
+
+        with self._ring.frame(message) as frame:
+            self.assertTrue(np.all(frame == 3))
+
+    def test_frame_is_read_in_another_process(self):
+        message = self._ring.put(_frame(2))
+        result_queue = multiprocessing.Queue()
+
+        process = multiprocessing.Process(target=_read_in_other_process, args=(self._ring, message, result_queue))
+        process.start()
+        process.join()
+
+        self.assertEqual(result_queue.get(timeout=5), 2 * 12 * 16 * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from mock import MagicMock
 from dls_barcode.config.camera_config import CameraConfig
 
 class TestCameraConfig(unittest.TestCase):
@@ -15,4 +16,19 @@ class TestCameraConfig(unittest.TestCase):
         # Assert
         self.assertEqual(cfg.camera_number, number)
         self.assertEqual(cfg.width, width)
-        self.assertEqual(cfg.height, height)
\ No newline at end of file
+        self.assertEqual(cfg.height, height)
+    def test_camera_is_replayed_only_if_the_replay_source_is_set(self):
+        # Arrange
+        source = MagicMock()
+        source.value.return_value = ""
+
+        # Act
+        cfg = CameraConfig(3, 100, 200, source)
+        no_replay_cfg = CameraConfig(3, 100, 200)
+        is_replay_without_source = cfg.is_replay()
+        source.value.return_value = "session/*.png"
+
+        # Assert
+        self.assertFalse(is_replay_without_source)
+        self.assertFalse(no_replay_cfg.is_replay())
+        self.assertTrue(cfg.is_replay())
@@ -0,0 +1,104 @@
+import unittest
+
+import cv2
+from mock import MagicMock, call
+
+from dls_barcode.data_store.image_writer import ImageEncoding, ImageWriter
+
+
+class TestImageEncoding(unittest.TestCase):
+
+    def test_params_match_the_format(self):
+        self.assertEqual(ImageEncoding(png_compression=5).params(), [cv2.IMWRITE_PNG_COMPRESSION, 5])
+        self.assertEqual(ImageEncoding(ImageEncoding.JPEG, quality=80).params(), [cv2.IMWRITE_JPEG_QUALITY, 80])
+        self.assertEqual(ImageEncoding(ImageEncoding.WEBP, quality=80).params(), [cv2.IMWRITE_WEBP_QUALITY, 80])
+        self.assertEqual(ImageEncoding(ImageEncoding.WEBP).extension(), ".webp")
+
+    def test_settings_out_of_range_are_clamped_and_unknown_format_is_png(self):
+        # Act
+        encoding = ImageEncoding("bmp", png_compression=12, quality=0, scale=150)
+
+        # Assert
+        self.assertEqual(encoding.format, ImageEncoding.PNG)
+        self.assertEqual(encoding.png_compression, 9)
+        self.assertEqual(encoding.quality, 1)
+        self.assertEqual(encoding.scale, 1.0)
+
+    def test_write_scales_image_before_saving_it(self):
+        # Arrange
+        image = MagicMock()
+        encoding = ImageEncoding(ImageEncoding.JPEG, scale=50)
+
+        # Act
+        encoding.write(image, "a.jpg")
+
+        # Assert
+        image.rescale.assert_called_once_with(0.5)
+        image.rescale.return_value.save_as.assert_called_once_with("a.jpg", params=encoding.params())
+        image.save_as.assert_not_called()
+
+
+class TestImageWriter(unittest.TestCase):
+
+    def setUp(self):
+        self._file_manager = MagicMock()
+        self._writer = ImageWriter(self._file_manager)
+
+    def tearDown(self):
+        self._writer.close()
+
+    def test_images_are_written_in_order_and_callback_is_called_for_each(self):
+        # Arrange
+        encoding = MagicMock()
+        callback = MagicMock()
+        images = [MagicMock() for _ in range(20)]
+
+        # Act
+        for i, image in enumerate(images):
+            self._writer.write(image, "file{}".format(i), encoding, callback)
+        self._writer.flush()
+
+        # Assert
+        self.assertEqual(encoding.write.call_args_list, [call(image, "file{}".format(i)) for i, image in enumerate(images)])
+        self.assertEqual(callback.call_args_list, [call("file{}".format(i), None) for i in range(len(images))])
+
+    def test_callback_is_given_error_if_image_cannot_be_written(self):
+        # Arrange
+        encoding = MagicMock()
+        error = IOError()
+        encoding.write.side_effect = error
+        callback = MagicMock()
+
+        # Act
+        self._writer.write(MagicMock(), "file", encoding, callback)
+        self._writer.flush()
+
+        # Assert
+        callback.assert_called_once_with("file", error)
+
+    def test_remove_deletes_file_after_it_has_been_written(self):
+        # Arrange
+        encoding = MagicMock()
+        self._file_manager.is_file.side_effect = lambda filename: encoding.write.called
+
+        # Act
+        self._writer.write(MagicMock(), "file", encoding)
+        self._writer.remove("file")
+        self._writer.close()
+
+        # Assert
+        self._file_manager.remove.assert_called_once_with("file")
+
+    def test_lines_are_got_when_the_file_is_written(self):
+        # Arrange
+        encoding = MagicMock()
+        get_lines = MagicMock(side_effect=lambda: [str(encoding.write.call_count)])
+
+        # Act
+        self._writer.write_lines("file.csv", get_lines)
+        self._writer.write(MagicMock(), "file", encoding)
+        self._writer.write_lines("file.csv", get_lines)
+        self._writer.flush()
+
+        # Assert
+        self.assertEqual(self._file_manager.write_lines.call_args_list, [call("file.csv", ["0"]), call("file.csv", ["1"])])
@@ -109,6 +109,20 @@ class TestRecord(unittest.TestCase):
         self.assertEquals(r.num_unread_slots, 1)
         self.assertEquals(r.num_valid_barcodes, 3)
 
+    def test_image_scale_is_read_back_from_string_and_defaults_to_full_size(self):
+        # Arrange
+        str = "f59c92c1;1494238920.0;test.png;None;DLSL-010,DLSL-011,DLSL-012;1569:1106:70-2307:1073:68-1944:1071:68"
+
+        # Act
+        r = Record.from_string(str)
+        r.image_scale = 0.5
+        scaled = Record.from_string(r.to_string())
+        r = Record.from_string(str)
+
+        # Assert
+        self.assertEqual(r.image_scale, 1.0)
+        self.assertEqual(scaled.image_scale, 0.5)
+
     def _create_mock_plate(self, plate_type, barcodes, geometry):
         mock_plate = MagicMock()
         mock_plate.type = plate_type
@@ -235,31 +235,97 @@ class TestStore(unittest.TestCase):
         # Arrange
         store = self._create_store()
         holder_barcode = "ABAB"
-        self._file_manager.write_lines.assert_not_called()
+        self._file_manager.append_lines.assert_not_called()
 
         # Act
         store.merge_record(holder_barcode, self._plate, self._holder_img, self._pins_img)
 
         # Assert
-        self._file_manager.write_lines.assert_called()
-        ((filename_used, record_lines_used), kwargs) = self._file_manager.write_lines.call_args_list[0]
+        self._file_manager.append_lines.assert_called()
+        ((filename_used, record_lines_used), kwargs) = self._file_manager.append_lines.call_args_list[0]
         self.assertEquals(filename_used, self._expected_store_file)
+        self.assertEquals(record_lines_used, [store.records[0].to_string() + "\n"])
         self.assertIn(holder_barcode, record_lines_used[0])
+        for (filename_used, _), kwargs in self._file_manager.write_lines.call_args_list:
+            self.assertNotEqual(filename_used, self._expected_store_file)
 
-    def test_given_a_store_when_merging_a_record_then_store_is_saved_to_csv_file(self):
+    def test_given_an_image_writer_when_merging_a_record_then_csv_file_is_rewritten_by_it(self):
         # Arrange
-        store = self._create_store()
+        image_writer = MagicMock()
+        store = Store(self._directory, self._store_capacity, self._file_manager, image_writer)
         holder_barcode = "HELLO"
-        self._file_manager.write_lines.assert_not_called()
 
         # Act
         store.merge_record(holder_barcode, self._plate, self._holder_img, self._pins_img)
 
         # Assert
-        self._file_manager.write_lines.assert_called()
-        ((filename_used, record_lines_used), kwargs) = self._file_manager.write_lines.call_args_list[1]
+        self._file_manager.write_lines.assert_not_called()
+        image_writer.write_lines.assert_called_once()
+        ((filename_used, get_lines), kwargs) = image_writer.write_lines.call_args
         self.assertEquals(filename_used, self._expected_csv_file)
-        self.assertIn(holder_barcode, record_lines_used[0])
+        self.assertIn(holder_barcode, get_lines()[0])
+
+    def test_given_an_image_writer_when_a_record_is_merged_then_csv_file_lists_current_records_most_recent_first(self):
+        # Arrange
+        capacity = 4
+        self._store_capacity.value.return_value = capacity
+        self._file_manager.read_lines.return_value = self._get_record_strings()
+        image_writer = MagicMock()
+        store = Store(self._directory, self._store_capacity, self._file_manager, image_writer)
+        latest_holder_barcode = store.records[0].holder_barcode
+
+        # Act
+        store.merge_record(latest_holder_barcode, self._plate, self._holder_img, self._pins_img)
+        store.merge_record("HELLO", self._plate, self._holder_img, self._pins_img)
+
+        # Assert
+        ((filename_used, get_lines), kwargs) = image_writer.write_lines.call_args
+        csv_lines = get_lines()
+        self.assertEquals(len(csv_lines), capacity)
+        for r, csv_line in zip(store.records, csv_lines):
+            self.assertIn(r.to_csv_string(), csv_line)
+
+    def test_given_an_image_writer_csv_file_is_rewritten_once_for_all_changes_made_before_the_rewrite_starts(self):
+        # Arrange
+        capacity = 4
+        self._store_capacity.value.return_value = capacity
+        self._file_manager.read_lines.return_value = self._get_record_strings()
+        image_writer = MagicMock()
+        store = Store(self._directory, self._store_capacity, self._file_manager, image_writer)
+
+        # Act
+        store.merge_record(store.records[0].holder_barcode, self._plate, self._holder_img, self._pins_img)
+        store.merge_record("HELLO", self._plate, self._holder_img, self._pins_img)
+        ((filename_used, get_lines), kwargs) = image_writer.write_lines.call_args
+        get_lines()
+        store.delete_records([store.records[0]])
+
+        # Assert
+        self.assertEquals(image_writer.write_lines.call_count, 2)
+
+    def test_given_no_image_writer_csv_file_is_only_rewritten_when_the_store_is_compacted(self):
+        # Arrange
+        capacity = 4
+        self._store_capacity.value.return_value = capacity
+        self._file_manager.read_lines.return_value = self._get_record_strings()
+        store = self._create_store()
+
+        # Act
+        for i in range(50):
+            store.merge_record("holder{}".format(i), self._plate, self._holder_img, self._pins_img)
+            if self._file_manager.write_lines.called:
+                break
+
+        # Assert
+        ((store_file, store_lines), kwargs) = self._file_manager.write_lines.call_args_list[0]
+        ((csv_file, csv_lines), kwargs) = self._file_manager.write_lines.call_args_list[1]
+        self.assertEquals(store_file, self._expected_store_file)
+        self.assertEquals(csv_file, self._expected_csv_file)
+        self.assertEquals(self._file_manager.write_lines.call_count, 2)
+        # Most recent first
+        self.assertEquals(len(csv_lines), capacity)
+        for r, csv_line in zip(store.records, csv_lines):
+            self.assertIn(r.to_csv_string(), csv_line)
 
     def test_given_a_non_empty_store_of_size_equal_to_capacity_when_a_new_record_is_merged_then_oldest_record_is_deleted(self):
         # Arrange
@@ -321,37 +387,91 @@ class TestStore(unittest.TestCase):
         store = self._create_store()
         records_to_delete = [r for r in store.records if r.id == ID1 or r.id == ID3]
         self.assertTrue(records_to_delete)
-        self._file_manager.write_lines.assert_not_called()
+        self._file_manager.append_lines.assert_not_called()
 
         # Act
         store.delete_records(records_to_delete)
 
         # Assert
-        self._file_manager.write_lines.assert_called()
-        ((filename_used, record_lines_used), kwargs) = self._file_manager.write_lines.call_args_list[0]
+        self._file_manager.append_lines.assert_called_once()
+        ((filename_used, record_lines_used), kwargs) = self._file_manager.append_lines.call_args
         self.assertEquals(filename_used, self._expected_store_file)
-        self.assertEquals(len(record_lines_used), store.size())
-        for r, l in zip(store.records, record_lines_used):
-            self.assertIn(r.to_string(), l)
+        self.assertEquals(len(record_lines_used), len(records_to_delete))
+        for r, l in zip(records_to_delete, record_lines_used):
+            self.assertIn(r.id, l)
 
-    def test_when_records_are_deleted_then_csv_file_is_updated(self):
+        # Reloading the store from the file with the lines added gives the same records
+        self._file_manager.read_lines.return_value = self._get_record_strings() + record_lines_used
+        self.assertEquals([r.id for r in self._create_store().records], [r.id for r in store.records])
+
+    def test_when_store_is_compacted_then_store_file_is_rewritten_with_current_records(self):
         # Arrange
+        capacity = 4
+        self._store_capacity.value.return_value = capacity
         self._file_manager.read_lines.return_value = self._get_record_strings()
         store = self._create_store()
-        records_to_delete = [r for r in store.records if r.id == ID1 or r.id == ID3]
-        self.assertTrue(records_to_delete)
         self._file_manager.write_lines.assert_not_called()
 
         # Act
-        store.delete_records(records_to_delete)
+        for i in range(50):
+            store.merge_record("holder{}".format(i), self._plate, self._holder_img, self._pins_img)
+            store_writes = [c for c in self._file_manager.write_lines.call_args_list
+                            if c[0][0] == self._expected_store_file]
+            if store_writes:
+                break
 
         # Assert
-        self._file_manager.write_lines.assert_called()
-        ((filename_used, record_lines_used), kwargs) = self._file_manager.write_lines.call_args_list[1]
-        self.assertEquals(filename_used, self._expected_csv_file)
+        self.assertTrue(store_writes)
+        self.assertGreater(i, 0) # not compacted on every change
+        ((store_file, store_lines), kwargs) = store_writes[-1]
+        self.assertEquals(len(store_lines), capacity)
+        # Oldest first, as the records are added to the file
+        for r, store_line in zip(reversed(store.records), store_lines):
+            self.assertIn(r.to_string(), store_line)
+
+    def test_deleted_and_replaced_records_in_store_file_are_not_loaded(self):
+        # Arrange
+        lines = self._get_record_strings()
+        lines.append("DELETED;" + ID1)
+        lines.append(lines[2].replace("DLSL-003", "DLSL-033"))
+        self._file_manager.read_lines.return_value = lines
+
+        # Act
+        store = self._create_store()
+
+        # Assert
+        self.assertEquals([r.id for r in store.records], [ID0, ID2, ID3])
+        self.assertEquals(store.get_record_by_id(ID2).holder_barcode, "DLSL-033")
+        self.assertIsNone(store.get_record_by_id(ID1))
+
+    def test_store_file_is_compacted_when_loaded_if_it_contains_deleted_records(self):
+        # Arrange
+        lines = self._get_record_strings() + ["DELETED;" + ID1]
+        self._file_manager.read_lines.return_value = lines
+
+        # Act
+        store = self._create_store()
+
+        # Assert
+        ((filename_used, record_lines_used), kwargs) = self._file_manager.write_lines.call_args_list[0]
+        self.assertEquals(filename_used, self._expected_store_file)
         self.assertEquals(len(record_lines_used), store.size())
-        for r, l in zip(store.records, record_lines_used):
-            self.assertIn(r.to_csv_string(), l)
+
+    def test_records_can_be_looked_up_by_holder_barcode(self):
+        # Arrange
+        rec_strings = self._get_record_strings()
+        rec_strings.append("id4;1494238900.0;test.png;None;DLSL-002,DLSL-009;1569:1106:70-2307:1073:68-1944:1071:68")
+        self._file_manager.read_lines.return_value = rec_strings
+        store = self._create_store()
+
+        # Act
+        records = store.records_for_holder("DLSL-002")
+        store.delete_records([store.get_record_by_id(ID1)])
+
+        # Assert
+        self.assertEquals([r.id for r in records], [ID1, "id4"])
+        self.assertEquals([r.id for r in store.records_for_holder("DLSL-002")], ["id4"])
+        self.assertEquals(store.records_for_holder("unknown"), [])
 
     def test_given_a_non_empty_store_when_capacity_is_reduced_then_records_are_truncated_at_next_merge(self):
         # Arrange
@@ -398,6 +518,40 @@ class TestStore(unittest.TestCase):
         self.assertNotIn(record_to_delete, store.records)
         self.assertNotIn(expected_truncated_record, store.records)
 
+    def test_given_an_image_writer_when_merging_a_record_then_the_image_is_written_in_the_background(self):
+        # Arrange
+        self._file_manager.is_file.return_value = False
+        image_writer = MagicMock()
+        store = Store(self._directory, self._store_capacity, self._file_manager, image_writer)
+
+        # Act
+        store.merge_record("ABC", self._plate, self._holder_img, self._pins_img)
+
+        # Assert
+        self._pins_img_copy.save_as.assert_not_called()
+        (image, filename, encoding, callback), kwargs = image_writer.write.call_args
+        self.assertEqual(image, self._pins_img_copy)
+        self.assertEqual(store.records[0].image_path, filename)
+        self.assertIn(filename, store._pending_images)
+
+        callback(filename, None)
+        self.assertNotIn(filename, store._pending_images)
+
+    def test_when_record_with_pending_image_is_deleted_then_the_writer_removes_the_image(self):
+        # Arrange
+        self._file_manager.is_file.return_value = False
+        image_writer = MagicMock()
+        store = Store(self._directory, self._store_capacity, self._file_manager, image_writer)
+        store.merge_record("ABC", self._plate, self._holder_img, self._pins_img)
+        record = store.records[0]
+
+        # Act
+        store.delete_records([record])
+
+        # Assert
+        image_writer.remove.assert_called_once_with(record.image_path)
+        self._file_manager.remove.assert_not_called()
+
     def _create_store(self):
         return Store(self._directory, self._store_capacity, self._file_manager)
 
@@ -0,0 +1,145 @@
+import os
+import unittest
+
+from mock import MagicMock, patch
+
+from dls_barcode.data_store.thumbnail_cache import ThumbnailCache, THUMBNAIL_SIZE
+from dls_util.image import Color
+
+
+class TestThumbnailCache(unittest.TestCase):
+
+    def setUp(self):
+        self._file_manager = MagicMock()
+        self._file_manager.is_file.return_value = False
+        self._directory = os.path.join("a_path", "thumb_dir")
+
+        self._options = self._create_options(crop=True)
+        self._record = self._create_record("id0", width=2 * THUMBNAIL_SIZE, height=THUMBNAIL_SIZE)
+
+    @staticmethod
+    def _create_options(crop):
+        options = MagicMock()
+        options.image_puck.value.return_value = True
+        options.image_pins.value.return_value = True
+        options.image_crop.value.return_value = crop
+        options.col_ok.return_value = Color.Green()
+        options.col_bad.return_value = Color.Red()
+        options.col_empty.return_value = Color.Grey()
+        return options
+
+    @staticmethod
+    def _create_record(id, width, height):
+        record = MagicMock()
+        record.id = id
+        image = MagicMock()
+        image.width = width
+        image.height = height
+        record.marked_image.return_value = image
+        return record
+
+    def test_thumbnail_is_scaled_down_and_saved_to_thumbnail_directory(self):
+        # Arrange
+        cache = ThumbnailCache(self._directory, self._file_manager)
+        image = self._record.marked_image.return_value
+
+        # Act
+        thumbnail = cache.marked_image(self._record, self._options)
+
+        # Assert
+        image.rescale.assert_called_once_with(0.5)
+        self.assertEqual(thumbnail, image.rescale.return_value)
+        filename = thumbnail.save_as.call_args[0][0]
+        self.assertEqual(os.path.dirname(filename), self._directory)
+        self.assertTrue(os.path.basename(filename).startswith("id0_"))
+
+    def test_thumbnail_is_only_rendered_once_for_the_same_options(self):
+        # Arrange
+        cache = ThumbnailCache(self._directory, self._file_manager)
+
+        # Act
+        first = cache.marked_image(self._record, self._options)
+        second = cache.marked_image(self._record, self._create_options(crop=True))
+        cache.marked_image(self._record, self._create_options(crop=False))
+
+        # Assert
+        self.assertEqual(first, second)
+        self.assertEqual(self._record.marked_image.call_count, 2)
+
+    def test_thumbnail_is_loaded_from_file_if_it_is_not_in_memory(self):
+        # Arrange
+        cache = ThumbnailCache(self._directory, self._file_manager, capacity=1)
+        cache.marked_image(self._record, self._options)
+        cache.marked_image(self._create_record("id1", 10, 10), self._options)
+        self._file_manager.is_file.return_value = True
+
+        # Act
+        with patch("dls_barcode.data_store.thumbnail_cache.Image.from_file") as from_file:
+            thumbnail = cache.marked_image(self._record, self._options)
+
+        # Assert
+        self.assertEqual(thumbnail, from_file.return_value)
+        self.assertEqual(self._record.marked_image.call_count, 1)
+
+    def test_add_renders_thumbnail_from_the_supplied_image(self):
+        # Arrange
+        cache = ThumbnailCache(self._directory, self._file_manager)
+        image = MagicMock()
+
+        # Act
+        cache.add(self._record, image, self._options)
+
+        # Assert
+        self._record.marked_image.assert_called_once_with(self._options, image)
+
+    def test_remove_deletes_thumbnail_files_of_the_record_only(self):
+        # Arrange
+        self._file_manager.is_dir.return_value = True
+        self._file_manager.list_dir.return_value = ["id0_a.png", "id0_b.png", "id01_a.png"]
+        cache = ThumbnailCache(self._directory, self._file_manager)
+        cache.marked_image(self._record, self._options)
+        self._file_manager.is_file.return_value = True
+
+        # Act
+        cache.remove(self._record)
+
+        # Assert
+        removed = [args[0] for args, kwargs in self._file_manager.remove.call_args_list]
+        self.assertIn(os.path.join(self._directory, "id0_a.png"), removed)
+        self.assertIn(os.path.join(self._directory, "id0_b.png"), removed)
+        self.assertNotIn(os.path.join(self._directory, "id01_a.png"), removed)
+        self._file_manager.is_file.return_value = False
+        cache.marked_image(self._record, self._options)
+        self.assertEqual(self._record.marked_image.call_count, 2)
+
+    def test_thumbnail_directory_is_only_listed_once(self):
+        # Arrange
+        self._file_manager.is_dir.return_value = True
+        self._file_manager.list_dir.return_value = ["id0_a.png", "id1_a.png", "id2_a.png"]
+        cache = ThumbnailCache(self._directory, self._file_manager)
+        self._file_manager.is_file.return_value = True
+
+        # Act
+        for id in ["id0", "id1", "id2"]:
+            cache.remove(self._create_record(id, width=10, height=10))
+
+        # Assert
+        self._file_manager.list_dir.assert_called_once_with(self._directory)
+        removed = [args[0] for args, kwargs in self._file_manager.remove.call_args_list]
+        self.assertEqual(removed, [os.path.join(self._directory, id + "_a.png") for id in ["id0", "id1", "id2"]])
+
+    def test_given_an_image_writer_thumbnails_are_written_and_removed_by_it(self):
+        # Arrange
+        image_writer = MagicMock()
+        cache = ThumbnailCache(self._directory, self._file_manager, image_writer=image_writer)
+
+        # Act
+        thumbnail = cache.marked_image(self._record, self._options)
+        cache.remove(self._record)
+
+        # Assert
+        thumbnail.save_as.assert_not_called()
+        filename = image_writer.write.call_args[0][1]
+        self.assertEqual(image_writer.write.call_args[0][0], thumbnail)
+        image_writer.remove.assert_called_once_with(filename)
+        self._file_manager.remove.assert_not_called()
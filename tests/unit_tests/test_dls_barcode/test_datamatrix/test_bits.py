@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+
+from dls_barcode.datamatrix.read import DatamatrixBitReader
+from dls_util.image import Image
+
+
+class TestDatamatrixBitReader(unittest.TestCase):
+
+    def test_window_averages_match_average_of_each_window(self):
+        arr = np.arange(100, dtype=np.uint8).reshape(10, 10)
+        points = np.array([[[1, 1], [5, 4]], [[8, 8], [3, 6]]])
+
+        averages = DatamatrixBitReader._window_averages(Image(arr), points)
+
+        for (y, x), average in np.ndenumerate(averages):
+            px, py = points[y, x]
+            expected = int(np.sum(arr[py-1:py+2, px-1:px+2]) / 9)
+            self.assertEqual(average, expected)
+
+    def test_window_averages_clip_windows_at_the_image_edge_like_a_slice(self):
+        arr = np.full((10, 10), 90, dtype=np.uint8)
+        points = np.array([[[9, 9], [0, 5], [5, 10]]])
+
+        averages = DatamatrixBitReader._window_averages(Image(arr), points)
+
+        self.assertEqual(averages[0, 0], int(np.sum(arr[8:11, 8:11]) / 9))
+        self.assertEqual(averages[0, 1], int(np.sum(arr[4:7, -1:2]) / 9))
+        self.assertEqual(averages[0, 2], int(np.sum(arr[9:12, 4:7]) / 9))
+
+    def test_border_errors_is_zero_for_a_perfect_border_at_any_mid_threshold(self):
+        n = 10
+        samples = np.full((n, n), 128)
+        samples[0, :] = 0
+        samples[:, 0] = 0
+        samples[::2, -1] = 0
+        samples[-1, ::2] = 0
+
+        errors = DatamatrixBitReader._border_errors(samples)
+
+        self.assertEqual(len(errors), 256)
+        self.assertEqual(errors[0], 2*n + n)
+        self.assertTrue(all(errors[1:129] == 0))
+        self.assertEqual(errors[129], n)
+
+    def test_smart_minimum_returns_index_half_way_between_outermost_minima(self):
+        data = np.array([5, 3, 1, 2, 1, 1, 4])
+
+        index, least = DatamatrixBitReader._smart_minimum(data)
+
+        self.assertEqual(index, 4)
+        self.assertEqual(least, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
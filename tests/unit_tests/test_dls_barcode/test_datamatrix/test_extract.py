@@ -0,0 +1,34 @@
+import unittest
+
+import numpy as np
+
+from dls_barcode.datamatrix.read.extract import DatamatrixByteExtractor, placement_map
+from dls_barcode.datamatrix.read.size_table import DatamatrixSizeTable
+
+
+class TestDatamatrixByteExtractor(unittest.TestCase):
+
+    def test_placement_map_covers_every_codeword_of_each_size_within_the_array(self):
+        for size in DatamatrixSizeTable.valid_sizes():
+            n = size - 2
+            rows, cols = placement_map((n, n))
+
+            self.assertGreaterEqual(rows.shape[0], sum(DatamatrixSizeTable.CAPACITY[size]))
+            self.assertEqual(rows.shape[1], 8)
+            self.assertTrue(np.all((rows >= 0) & (rows < n) & (cols >= 0) & (cols < n)))
+
+    def test_extract_bytes_packs_the_bits_of_each_byte_msb_first(self):
+        bits = np.zeros((8, 8), dtype=bool)
+        rows, cols = placement_map(bits.shape)
+        bits[rows[0, 0], cols[0, 0]] = True
+        bits[rows[1, 7], cols[1, 7]] = True
+
+        data = DatamatrixByteExtractor.extract_bytes(bits)
+
+        self.assertEqual(len(data), rows.shape[0])
+        self.assertEqual(data[:3], [128, 1, 0])
+        self.assertTrue(all(isinstance(b, int) for b in data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import threading
+import unittest
+from mock import MagicMock
+
+import numpy as np
+
+from dls_barcode.datamatrix.finder_pattern import FinderPattern
+from dls_barcode.datamatrix.locate import locate_contour
+from dls_barcode.datamatrix.locate.locate_contour import ContourLocator
+from dls_util.image import Image
+from dls_util.shape import Point
+
+
+def _fp(x, y, size=20):
+    return FinderPattern(Point(x, y), Point(size, 0), Point(0, size))
+
+
+class TestContourLocator(unittest.TestCase):
+
+    def test_longest_pair_indices_returns_longest_edge_first(self):
+        vertices = np.array([[0, 0], [10, 0], [10, 3], [4, 3], [4, 30], [0, 30]])
+        edges = ContourLocator._polygons_to_edges(vertices)
+
+        i, j = ContourLocator._longest_pair_indices(edges)
+
+        self.assertEqual((i, j), (5, 3))
+
+    def test_pyramid_maps_patterns_found_in_each_region_back_to_image_coordinates(self):
+        image = Image(np.zeros((400, 600), dtype=np.uint8))
+        locator = ContourLocator()
+        # One candidate in the half size image at (100, 50) -> (200, 100) in the full image
+        locator._locate = MagicMock(side_effect=[[_fp(90, 40)], [_fp(40, 40)]])
+
+        fps = locator.locate_datamatrices_pyramid(image, 35, 16, 3, scale=0.5)
+
+        # Region of radius 20*sqrt(2)*1.2 + 35//2 + 1 around the candidate starts at (148, 48)
+        self.assertEqual(len(fps), 1)
+        self.assertEqual(fps[0].corner.tuple(), (148 + 40, 48 + 40))
+        self.assertEqual(locator._locate.call_args_list[0][0][0].img.shape, (200, 300))
+        self.assertEqual(locator._locate.call_args_list[0][0][1], 17)
+
+    def test_pyramid_discards_duplicate_and_distant_patterns(self):
+        image = Image(np.zeros((400, 600), dtype=np.uint8))
+        locator = ContourLocator()
+        candidates = [_fp(90, 40), _fp(92, 42)]
+        roi_fps = [[_fp(40, 40), _fp(0, 0, 2)], [_fp(36, 36)]]
+        locator._locate = MagicMock(side_effect=[candidates] + roi_fps)
+
+        fps = locator.locate_datamatrices_pyramid(image, 35, 16, 3, scale=0.5)
+
+        self.assertEqual(len(fps), 1)
+
+    def test_downscaled_image_is_reused_for_the_same_image(self):
+        image = Image(np.zeros((400, 600), dtype=np.uint8))
+        locator = ContourLocator()
+
+        small = locator._downscale(image, 0.5)
+
+        self.assertIs(locator._downscale(image, 0.5), small)
+        self.assertIsNot(locator._downscale(image, 0.25), small)
+
+    def test_thresholds_are_the_same_as_adaptive_threshold_for_each_value_of_C(self):
+        image = Image(np.random.RandomState(0).randint(0, 256, (60, 80)).astype(np.uint8))
+
+        thresholds = ContourLocator._do_thresholds(image, 35, [16, 8, 0, 4, 20, 2.5])
+
+        for c, threshold in thresholds.items():
+            expected = ContourLocator._do_threshold(image, 35, c)
+            self.assertTrue(np.array_equal(threshold.img, expected.img))
+
+    def test_sweep_returns_patterns_ordered_by_morph_size_then_C(self):
+        image = Image(np.zeros((60, 80), dtype=np.uint8))
+        locator = ContourLocator()
+        locator._locate_in_threshold = MagicMock(side_effect=lambda thresh, ms: [(thresh, ms)])
+        thresholds = ContourLocator._do_thresholds(image, 35, [16, 8])
+
+        fps = locator.locate_datamatrices_sweep(image, 35, [16, 8], [3, 2])
+
+        self.assertEqual([ms for _, ms in fps], [3, 3, 2, 2])
+        for (thresh, _), c in zip(fps, [16, 8, 16, 8]):
+            self.assertTrue(np.array_equal(thresh.img, thresholds[c].img))
+
+    def test_passes_are_run_serially_when_limited_to_one_thread(self):
+        locate_contour.set_max_threads(1)
+        self.addCleanup(locate_contour.set_max_threads, None)
+
+        threads = locate_contour._map_in_threads(lambda _: threading.current_thread(), [1, 2, 3])
+
+        self.assertEqual(threads, [threading.current_thread()] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+
+from dls_barcode.datamatrix.locate.locate_square import SquareLocator
+from dls_util.image import Image
+
+
+def _square_image():
+    img = np.full((60, 60), 255, dtype=np.uint8)
+    img[18:42, 18:42] = 0
+    img[18:42, 18:21] = 40
+    img[39:42, 18:42] = 40
+    return Image(img)
+
+
+class TestSquareLocator(unittest.TestCase):
+
+    def test_locate_gives_the_same_result_when_the_same_image_is_searched_again(self):
+        image = _square_image()
+        locator = SquareLocator()
+
+        first = locator.locate(image, 24)
+        second = locator.locate(image, 24)
+
+        self.assertEqual(first.c1.tuple(), second.c1.tuple())
+        self.assertEqual(first.c2.tuple(), second.c2.tuple())
+
+    def test_metrics_are_cleared_for_each_search(self):
+        image = _square_image()
+        locator = SquareLocator()
+        locator.locate(image, 24)
+        locator.metric_cache[('stale',)] = 0
+
+        locator.locate(image, 24)
+
+        self.assertNotIn(('stale',), locator.metric_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 
 from dls_barcode.datamatrix.read import ReedSolomonDecoder, ReedSolomonError
+from dls_barcode.datamatrix.read.reedsolo import DATAMATRIX_FIELD
 
 
 """
@@ -45,11 +46,42 @@ class TestReedSolo(unittest.TestCase):
             corrected = decoder.decode(case, num_ecc_bytes)
             self.assertEquals(msg_bytes, corrected)
 
+    def test_number_of_corrected_symbols_is_recorded(self):
+        decoder = ReedSolomonDecoder()
+        decoder.decode(msg_bytes_correctable[2], num_ecc_bytes)
+        self.assertEqual(decoder.num_corrections(), 3)
+
+        decoder.decode(msg_bytes_encoded, num_ecc_bytes)
+        self.assertEqual(decoder.num_corrections(), 0)
+
     def test_uncorrectable_barcode(self):
         decoder = ReedSolomonDecoder()
         for case in msg_bytes_uncorrectable:
             self.assertRaises(ReedSolomonError, decoder.decode, case, num_ecc_bytes)
 
+    def test_erasures_are_corrected(self):
+        decoder = ReedSolomonDecoder()
+        case = msg_bytes_encoded[:]
+        case[3] = -1
+        case[12] = -1
+        corrected = decoder.decode(case, num_ecc_bytes)
+        self.assertEquals(msg_bytes, corrected)
+
+    def test_syndromes_of_uncorrupted_message_are_zero(self):
+        syndromes = DATAMATRIX_FIELD.syndromes(bytearray(msg_bytes_encoded), 10)
+        self.assertEqual(len(syndromes), 10)
+        self.assertFalse(syndromes.any())
+
+    def test_syndromes_of_corrupted_message_are_not_zero(self):
+        syndromes = DATAMATRIX_FIELD.syndromes(bytearray(msg_bytes_correctable[0]), 10)
+        self.assertTrue(syndromes.any())
+
+    def test_multiplication_table_matches_log_tables(self):
+        gf = DATAMATRIX_FIELD
+        for x, y in [(0, 5), (7, 0), (1, 200), (3, 7), (255, 255), (45, 129)]:
+            expected = 0 if x == 0 or y == 0 else gf.exp((gf._log[x] + gf._log[y]) % 255)
+            self.assertEqual(gf.mul(x, y), expected)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -2,6 +2,8 @@ import unittest
 from mock import MagicMock
 import math
 
+import numpy as np
+
 from dls_barcode.geometry.unipuck import Unipuck
 from dls_util.shape import Point
 
@@ -83,3 +85,18 @@ class TestUnipuck(unittest.TestCase):
         slot6 = slot_bounds[5]
         self.assertTrue(slot6.center().x == 0)
 
+    def test_translate_moves_the_puck_its_feature_and_its_slots_by_the_offset(self):
+        border = np.array([[[10, 20]], [[30, 40]]], np.int32)
+        uni = Unipuck(Point(100, 200), 50, 0.5, Point(120, 160), border)
+        slot_center = uni.slot_center(5)
+
+        uni.translate(Point(7, -3))
+
+        self.assertEqual((uni.center().x, uni.center().y), (107, 197))
+        self.assertEqual(uni.radius(), 50)
+        self.assertEqual(uni.angle(), 0.5)
+        self.assertEqual((uni._feature_center.x, uni._feature_center.y), (127, 157))
+        self.assertEqual(uni._feature_boarder.tolist(), [[[17, 17]], [[37, 37]]])
+        self.assertEqual(uni._feature_boarder.dtype, np.int32)
+        self.assertAlmostEqual(uni.slot_center(5).x, slot_center.x + 7, delta=1)
+        self.assertAlmostEqual(uni.slot_center(5).y, slot_center.y - 3, delta=1)
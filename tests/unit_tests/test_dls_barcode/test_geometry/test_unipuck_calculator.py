@@ -1,8 +1,14 @@
+import math
 import unittest
 from mock import MagicMock
 
+import numpy as np
+
 from dls_barcode.geometry.exception import GeometryAlignmentError
-from dls_barcode.geometry.unipuck_calculator import UnipuckCalculator, _partition, calculate_centroid, _center_minimiser
+from dls_barcode.geometry.unipuck import Unipuck
+from dls_barcode.geometry.unipuck_calculator import UnipuckCalculator, _partition, calculate_centroid, _center_minimiser, \
+    _fit_layers_center
+from dls_util.shape import Point
 
 
 class TestUnipuckCalculator(unittest.TestCase):
@@ -107,6 +113,26 @@ class TestUnipuckCalculator(unittest.TestCase):
         e = _center_minimiser(center, layers)
         self.assertGreater(e, 0)
 
+    # test _find_puck_center
+    def test_find_puck_center_when_one_side_of_puck_is_empty(self):
+        puck = Unipuck(Point(400, 300), 250, 0.3)
+        pin_centers = [puck.slot_center(n) for n in [2, 3, 4, 8, 9, 10, 11, 12, 13]]
+
+        center = UnipuckCalculator._find_puck_center(pin_centers)
+
+        self.assertLessEqual(center.distance_to(Point(400, 300)), 1.5)
+
+    def test_fit_layers_center_minimises_center_minimiser(self):
+        points = np.array([[10.0, 1.0], [1.0, 9.5], [-10.0, 0.0], [0.5, -10.0], [20.0, 2.0], [-1.0, 21.0], [-20.0, 0.0]])
+        layers = np.array([0, 0, 0, 0, 1, 1, 1])
+        point_layers = [[Point(*p) for p in points[layers == k]] for k in (0, 1)]
+
+        center = _fit_layers_center(points, layers)
+
+        cost = _center_minimiser(center, point_layers)
+        for dx, dy in [(0.01, 0), (-0.01, 0), (0, 0.01), (0, -0.01)]:
+            self.assertLess(cost, _center_minimiser(center + [dx, dy], point_layers))
+
     # test _calculate_puck_size
     def test_calculate_puck_size_based_on_seven_pin_centers(self):
         puck_center = MagicMock()
@@ -120,49 +146,30 @@ class TestUnipuckCalculator(unittest.TestCase):
 
 
     # test _determine_puck_orientation
-    #a better test coverage could be added
-    def test_determine_puck_orientation_returns_0_when_empty_pin_centers_mock_passed(self):
-        puck = MagicMock()
-        puck.angle.return_value = 10
-        puck.radius.return_value = 12
-        pin_centers = MagicMock()
-        pin_centers.__len__.return_value = 16 #has to be a number - division by 0
+    def test_determine_puck_orientation_finds_angle_between_coarse_increments(self):
+        truth = Unipuck(Point(400, 300), 250, math.radians(37.3))
+        pin_centers = [truth.slot_center(n) for n in [1, 2, 4, 6, 7, 9, 12, 15]]
+        puck = Unipuck(Point(400, 300), 250)
 
-        calculator = self._create_unipuck_calculator()
-        orientation = calculator._determine_puck_orientation(puck, pin_centers)
-        self.assertEqual(puck.set_rotation.call_count, 181) #always checks 180 positions of the puck
-        self.assertEqual(orientation, 0)
-
-    # test _shortest_sq_distance
-    def test_shortest_sq_distance_distance_larger_than_slot_radius(self):
-        number_of_puck_slots = 3
-        slot_radius = 3
-        puck = MagicMock()
-        puck.num_slots.return_value = number_of_puck_slots
-        puck.slot_radius.return_value = slot_radius
-
-        point = MagicMock()
-        point.distance_to_sq.side_effect = [16, 10, 25] #distacne of a point to different slot centers
-        #side_effect can also be any iterable object
-
-        sq_dist = UnipuckCalculator._shortest_sq_distance(puck, point)
-        self.assertEqual(sq_dist, 10)
-        self.assertEqual(point.distance_to_sq.call_count, number_of_puck_slots)
-
-    def test_shortest_sq_distance_distance_smaller_than_slot_radius(self):
-        number_of_puck_slots = 3
-        slot_radius = 3
-        puck = MagicMock()
-        puck.num_slots.return_value = number_of_puck_slots
-        puck.slot_radius.return_value = slot_radius
-
-        point = MagicMock()
-        point.distance_to_sq.side_effect = [4, 6, 10]
-
-        sq_dist = UnipuckCalculator._shortest_sq_distance(puck, point)
-        self.assertEqual(sq_dist, 4)
-        self.assertEqual(point.distance_to_sq.call_count, 1) #stops after the first slot
+        orientation = UnipuckCalculator._determine_puck_orientation(puck, pin_centers)
+
+        self.assertAlmostEqual(math.degrees(orientation), 37.3, delta=0.3)
+        self.assertEqual(puck.angle(), 0) # the puck itself is not rotated
+
+    def test_determine_puck_orientation_is_between_0_and_2pi(self):
+        truth = Unipuck(Point(400, 300), 250, math.radians(-0.6))
+        pin_centers = [truth.slot_center(n) for n in range(1, 17)]
+
+        orientation = UnipuckCalculator._determine_puck_orientation(Unipuck(Point(400, 300), 250), pin_centers)
 
+        self.assertAlmostEqual(math.degrees(orientation), 359.4, delta=0.3)
+
+    def test_determine_puck_orientation_raises_error_when_points_do_not_fit_template(self):
+        pin_centers = [Point(400 + 10 * i, 300) for i in range(8)]
+
+        with self.assertRaises(GeometryAlignmentError) as cm:
+            UnipuckCalculator._determine_puck_orientation(Unipuck(Point(400, 300), 250), pin_centers)
+        self.assertEqual("Unable to determine Unipuck orientation", str(cm.exception))
 
     def _create_unipuck_calculator(self):
         return UnipuckCalculator(self._slot_centers)
@@ -0,0 +1,76 @@
+import unittest
+
+from mock import MagicMock, ANY, call
+
+from dls_barcode.gui.record_table_model import RecordTableModel, FETCH_BATCH_SIZE
+
+
+class TestRecordTableModel(unittest.TestCase):
+
+    def setUp(self):
+        self._store = MagicMock()
+        self._store.records = self._records(range(FETCH_BATCH_SIZE + 50, 0, -1))
+
+    @staticmethod
+    def _records(ids):
+        records = []
+        for id in ids:
+            record = MagicMock()
+            record.id = "id{}".format(id)
+            records.append(record)
+        return records
+
+    def _create_model(self):
+        model = RecordTableModel(self._store, MagicMock())
+        model.beginInsertRows = MagicMock()
+        model.beginRemoveRows = MagicMock()
+        model.endInsertRows = MagicMock()
+        model.endRemoveRows = MagicMock()
+        return model
+
+    def _row_ids(self, model):
+        return [model.record(row).id for row in range(model.rowCount())]
+
+    def test_only_first_batch_of_records_is_loaded_until_more_are_fetched(self):
+        # Act
+        model = self._create_model()
+
+        # Assert
+        self.assertEqual(model.rowCount(), FETCH_BATCH_SIZE)
+        self.assertTrue(model.canFetchMore())
+        self.assertIsNone(model.record(FETCH_BATCH_SIZE))
+
+        model.fetchMore()
+        self.assertEqual(self._row_ids(model), [record.id for record in self._store.records])
+        self.assertFalse(model.canFetchMore())
+        model.beginInsertRows.assert_called_once_with(ANY, FETCH_BATCH_SIZE, FETCH_BATCH_SIZE + 49)
+
+    def test_refresh_inserts_row_for_new_record_only(self):
+        # Arrange
+        model = self._create_model()
+        new_record = self._records(["new"])[0]
+        self._store.records = [new_record] + self._store.records
+
+        # Act
+        model.refresh()
+
+        # Assert
+        self.assertEqual(model.record(0), new_record)
+        self.assertEqual(model.rowCount(), FETCH_BATCH_SIZE + 1)
+        model.beginInsertRows.assert_called_once_with(ANY, 0, 0)
+        model.beginRemoveRows.assert_not_called()
+
+    def test_refresh_removes_rows_of_deleted_records_in_ranges(self):
+        # Arrange
+        model = self._create_model()
+        deleted = [1, 2, 5, FETCH_BATCH_SIZE + 10]
+        self._store.records = [record for i, record in enumerate(self._store.records) if i not in deleted]
+
+        # Act
+        model.refresh()
+
+        # Assert
+        self.assertEqual(model.beginRemoveRows.call_args_list,
+                         [call(ANY, 5, 5), call(ANY, 1, 2)])
+        model.fetchMore()
+        self.assertEqual(self._row_ids(model), [record.id for record in self._store.records])
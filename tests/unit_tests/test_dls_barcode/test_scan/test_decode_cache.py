@@ -0,0 +1,102 @@
+import unittest
+from mock import MagicMock
+
+import numpy as np
+
+from dls_barcode.scan.open.decode_cache import DecodeCache
+from dls_util.image import Image
+from dls_util.shape import Point
+
+READ_RESULT = ("DATA", True, False, "", 3, 1)
+
+
+class TestDecodeCache(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        modules = random.randint(0, 2, (14, 14)).astype(np.uint8) * 255
+        self._frame = np.full((200, 200), 128, np.uint8)
+        self._frame[50:106, 50:106] = np.kron(modules, np.ones((4, 4), np.uint8))
+
+    @staticmethod
+    def _barcode(x=78, y=78, radius=40, valid=True):
+        barcode = MagicMock()
+        barcode.center.return_value = Point(x, y)
+        barcode.radius.return_value = radius
+        barcode.is_valid.return_value = valid
+        barcode.read_result.return_value = READ_RESULT
+        return barcode
+
+    def _cache_with_read(self, max_age=DecodeCache.DEFAULT_MAX_AGE):
+        cache = DecodeCache(max_age)
+        cache.new_frame()
+        cache.add(self._barcode(), Image(self._frame))
+        cache.new_frame()
+        return cache
+
+    def test_unchanged_barcode_in_the_same_place_is_given_the_previous_read(self):
+        # Arrange
+        cache = self._cache_with_read()
+        noise = np.random.RandomState(1).normal(0, 4, self._frame.shape)
+        frame = np.clip(self._frame + noise, 0, 255).astype(np.uint8)
+        barcode = self._barcode(x=79, y=77)
+
+        # Act
+        reused = cache.read(barcode, Image(frame))
+
+        # Assert
+        self.assertTrue(reused)
+        barcode.set_read_result.assert_called_once_with(("DATA", True, False, "", 0, 0))
+
+    def test_different_barcode_in_the_same_place_is_not_given_the_previous_read(self):
+        # Arrange
+        cache = self._cache_with_read()
+        frame = self._frame.copy()
+        frame[50:106, 50:106] = 255 - frame[50:106, 50:106]
+        barcode = self._barcode()
+
+        # Act
+        reused = cache.read(barcode, Image(frame))
+
+        # Assert
+        self.assertFalse(reused)
+        barcode.set_read_result.assert_not_called()
+
+    def test_barcode_that_has_moved_is_not_given_the_previous_read(self):
+        # Arrange
+        cache = self._cache_with_read()
+
+        # Act
+        reused = cache.read(self._barcode(x=88), Image(self._frame))
+
+        # Assert
+        self.assertFalse(reused)
+
+    def test_read_is_forgotten_once_it_is_too_old(self):
+        # Arrange
+        cache = self._cache_with_read(max_age=3)
+        cache.new_frame()
+
+        # Act
+        reused_before = cache.read(self._barcode(), Image(self._frame))
+        cache.new_frame()
+        reused_after = cache.read(self._barcode(), Image(self._frame))
+
+        # Assert
+        self.assertTrue(reused_before)
+        self.assertFalse(reused_after)
+        self.assertEqual(len(cache), 0)
+
+    def test_failed_read_is_not_remembered(self):
+        # Arrange
+        cache = DecodeCache()
+
+        # Act
+        cache.add(self._barcode(valid=False), Image(self._frame))
+
+        # Assert
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from mock import MagicMock, patch
+
+from dls_barcode.scan.with_geometry.decode_executor import DecodeExecutor, _init_worker
+
+
+class TestDecodeExecutor(unittest.TestCase):
+
+    def _barcode(self, is_read):
+        barcode = MagicMock()
+        barcode.is_read.return_value = is_read
+        return barcode
+
+    def test_read_barcodes_reads_only_unread_barcodes(self):
+        executor = DecodeExecutor(1)
+        unread, read = self._barcode(False), self._barcode(True)
+
+        executor.read_barcodes([unread, read])
+
+        unread.perform_read.assert_called_once_with()
+        read.perform_read.assert_not_called()
+
+    def test_single_worker_executor_is_not_parallel(self):
+        self.assertFalse(DecodeExecutor(1).is_parallel())
+        self.assertFalse(DecodeExecutor(0).is_parallel())
+        self.assertTrue(DecodeExecutor(3).is_parallel())
+
+    def test_parallel_executor_reads_serially_without_a_frame(self):
+        executor = DecodeExecutor(4)
+        barcodes = [self._barcode(False), self._barcode(False)]
+
+        executor.read_barcodes(barcodes)
+
+        for barcode in barcodes:
+            barcode.perform_read.assert_called_once_with()
+        self.assertIsNone(executor._pool)
+
+    @patch("dls_barcode.scan.with_geometry.decode_executor.PlateScanner")
+    def test_scan_slots_returns_result_of_deep_scan_for_each_slot_in_order(self, plate_scanner):
+        executor = DecodeExecutor(1)
+        slots = [MagicMock(), MagicMock()]
+        slot_scanner = MagicMock()
+        plate_scanner.deep_slot_scan.side_effect = ["bc1", None]
+
+        found = executor.scan_slots(slots, slot_scanner, True)
+
+        self.assertEqual(found, ["bc1", None])
+        plate_scanner.deep_slot_scan.assert_any_call(slots[0], slot_scanner, True)
+        plate_scanner.deep_slot_scan.assert_any_call(slots[1], slot_scanner, True)
+
+    @patch("dls_barcode.scan.with_geometry.decode_executor.SlotScanner")
+    @patch("dls_barcode.scan.with_geometry.decode_executor.locate_contour")
+    def test_worker_processes_locate_serially(self, locate_contour, slot_scanner):
+        _init_worker(False, None)
+
+        locate_contour.set_max_threads.assert_called_once_with(1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+from mock import MagicMock
+
+import numpy as np
+
+from dls_barcode.plate import Slot
+from dls_barcode.scan.no_barcodes_detected_error import NoBarcodesDetectedError
+from dls_barcode.scan.with_geometry.geometry_scanner import GeometryScanner
+from dls_util.image import Image
+from dls_util.shape import Circle, Point
+
+
+class TestGeometryScanner(unittest.TestCase):
+
+    def setUp(self):
+        self._scanner = GeometryScanner("Unipuck", [14])
+        self._scanner._frame_result = MagicMock()
+
+        self._slots = []
+        for i in range(4):
+            slot = MagicMock()
+            slot.state.return_value = Slot.VALID
+            slot.barcode_data.return_value = "data" + str(i)
+            self._slots.append(slot)
+
+        self._plate = MagicMock()
+        self._plate.is_full_valid.return_value = True
+        self._plate.slots.return_value = self._slots
+        self._scanner._plate = self._plate
+
+    def _read_results(self, *data):
+        barcodes = []
+        for d in data:
+            if d is None:
+                barcodes.append(None)
+            else:
+                barcode = MagicMock()
+                barcode.data.return_value = d
+                barcodes.append(barcode)
+        self._scanner._read_barcode_at_slot = MagicMock(side_effect=barcodes)
+        return barcodes
+
+    def test_previous_plate_is_not_confirmed_when_incomplete(self):
+        self._plate.is_full_valid.return_value = False
+        self._read_results()
+
+        self.assertFalse(self._scanner._is_previous_plate_confirmed())
+        self._scanner._read_barcode_at_slot.assert_not_called()
+
+    def test_previous_plate_is_confirmed_by_matching_reads_of_spread_out_slots(self):
+        barcodes = self._read_results("data0", "data2")
+
+        self.assertTrue(self._scanner._is_previous_plate_confirmed())
+
+        read_slots = [c[0][0] for c in self._scanner._read_barcode_at_slot.call_args_list]
+        self.assertEqual(read_slots, [self._slots[0], self._slots[2]])
+        self._scanner._frame_result.set_barcodes.assert_called_once_with(barcodes)
+        self._scanner._frame_result.set_geometry.assert_called_once_with(self._plate.geometry())
+
+    def test_previous_plate_is_confirmed_when_only_some_slots_can_be_read(self):
+        self._read_results(None, "data2")
+
+        self.assertTrue(self._scanner._is_previous_plate_confirmed())
+
+    def test_previous_plate_is_not_confirmed_when_no_slots_can_be_read(self):
+        self._read_results(None, None)
+
+        self.assertFalse(self._scanner._is_previous_plate_confirmed())
+
+    def test_previous_plate_is_not_confirmed_when_a_slot_has_different_data(self):
+        self._read_results("data0", "other")
+
+        self.assertFalse(self._scanner._is_previous_plate_confirmed())
+
+
+class TestGeometryScannerTracking(unittest.TestCase):
+
+    def setUp(self):
+        self._scanner = GeometryScanner("Unipuck", [14], track_puck=True)
+        self._scanner._frame_img = Image(np.zeros((1200, 1600), np.uint8))
+        self._scanner._track_bounds = Circle(Point(500, 400), 100)
+
+    @staticmethod
+    def _geometry(x, y, radius):
+        geometry = MagicMock()
+        geometry.center.return_value = Point(x, y)
+        geometry.radius.return_value = radius
+        return geometry
+
+    def test_region_searched_is_around_the_puck_as_last_seen(self):
+        region_img, roi = self._scanner._tracking_region()
+
+        self.assertEqual(roi, [370, 270, 630, 530])
+        self.assertEqual((region_img.width, region_img.height), (260, 260))
+
+    def test_whole_frame_is_searched_when_the_puck_is_not_tracked(self):
+        scanner = GeometryScanner("Unipuck", [14])
+        scanner._update_tracking(self._geometry(500, 400, 100))
+
+        self.assertIsNone(scanner._track_bounds)
+        self.assertIsNone(scanner._tracking_region())
+
+    def test_whole_frame_is_searched_after_a_number_of_tracked_frames(self):
+        self._scanner._tracked_frames = GeometryScanner.TRACKING_FRAMES
+
+        self.assertIsNone(self._scanner._tracking_region())
+
+    def test_whole_frame_is_searched_for_a_single_image(self):
+        self._scanner._is_single_image = True
+
+        self.assertIsNone(self._scanner._tracking_region())
+
+    def test_puck_is_inside_region_unless_it_crosses_an_edge_that_is_not_the_frame_edge(self):
+        self._scanner._geometry = self._geometry(510, 395, 105)
+        self.assertTrue(self._scanner._is_puck_inside([370, 270, 630, 530]))
+
+        self._scanner._geometry = self._geometry(540, 400, 100)
+        self.assertFalse(self._scanner._is_puck_inside([370, 270, 630, 530]))
+
+        self._scanner._geometry = self._geometry(90, 400, 100)
+        self.assertTrue(self._scanner._is_puck_inside([0, 270, 260, 530]))
+
+    def test_puck_found_in_region_counts_as_a_tracked_frame(self):
+        self._scanner._locate_puck_in = MagicMock()
+        self._scanner._geometry = self._geometry(505, 400, 100)
+
+        self._scanner._locate_puck()
+
+        self._scanner._locate_puck_in.assert_called_once()
+        self.assertIsNotNone(self._scanner._locate_puck_in.call_args[0][0])
+        self.assertEqual(self._scanner._tracked_frames, 1)
+
+    def test_whole_frame_is_searched_when_the_puck_is_lost_from_the_region(self):
+        self._scanner._locate_puck_in = MagicMock(side_effect=[NoBarcodesDetectedError(), None])
+        self._scanner._tracked_frames = 3
+
+        self._scanner._locate_puck()
+
+        self.assertEqual(self._scanner._locate_puck_in.call_count, 2)
+        self.assertIsNone(self._scanner._locate_puck_in.call_args[0][0])
+        self.assertEqual(self._scanner._tracked_frames, 0)
+
+    def test_puck_that_has_moved_out_of_the_region_is_searched_for_in_the_whole_frame(self):
+        self._scanner._locate_puck_in = MagicMock()
+        self._scanner._geometry = self._geometry(600, 400, 100)
+
+        self._scanner._locate_puck()
+
+        self.assertEqual(self._scanner._locate_puck_in.call_count, 2)
+        self.assertIsNone(self._scanner._locate_puck_in.call_args[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from mock import MagicMock, patch
+
+from dls_barcode.scan.open.known_barcodes import KnownBarcodes
+from dls_barcode.scan.open.open_scan_result import OpenScanResult
+
+
+class TestKnownBarcodes(unittest.TestCase):
+
+    def test_barcode_is_only_new_the_first_time_it_is_added(self):
+        # Arrange
+        known = KnownBarcodes()
+
+        # Act
+        added = [known.add("a"), known.add("b"), known.add("a")]
+
+        # Assert
+        self.assertEqual(added, [True, True, False])
+        self.assertTrue(known.contains("a"))
+        self.assertFalse(known.contains("c"))
+        self.assertEqual(len(known), 2)
+
+    def test_least_recently_seen_barcode_is_forgotten_when_capacity_is_exceeded(self):
+        # Arrange
+        known = KnownBarcodes(capacity=2)
+        known.add("a")
+        known.add("b")
+        known.add("a")
+
+        # Act
+        known.add("c")
+
+        # Assert
+        self.assertTrue(known.contains("a"))
+        self.assertFalse(known.contains("b"))
+        self.assertTrue(known.contains("c"))
+
+    def test_barcode_was_known_at_a_version_if_it_was_added_by_then(self):
+        # Arrange
+        known = KnownBarcodes()
+        known.add("a")
+        version = known.version()
+
+        # Act
+        known.add("b")
+        known.add("a")
+
+        # Assert
+        self.assertTrue(known.contains("a", version))
+        self.assertFalse(known.contains("b", version))
+        self.assertTrue(known.contains("b"))
+
+    @patch("dls_barcode.scan.open.known_barcodes.time")
+    def test_barcodes_not_seen_for_the_lifetime_expire_with_ttl_policy(self, mock_time):
+        # Arrange
+        known = KnownBarcodes(policy=KnownBarcodes.TTL, lifetime=10)
+        mock_time.time.return_value = 100.0
+        known.add("a")
+        known.add("b")
+        mock_time.time.return_value = 105.0
+        known.add("a")
+
+        # Act
+        mock_time.time.return_value = 112.0
+        known.expire()
+
+        # Assert
+        self.assertTrue(known.contains("a"))
+        self.assertFalse(known.contains("b"))
+
+    @patch("dls_barcode.scan.open.known_barcodes.time")
+    def test_barcodes_do_not_expire_with_lru_policy(self, mock_time):
+        # Arrange
+        known = KnownBarcodes(policy=KnownBarcodes.LRU, lifetime=10)
+        mock_time.time.return_value = 100.0
+        known.add("a")
+
+        # Act
+        mock_time.time.return_value = 1000.0
+        known.expire()
+
+        # Assert
+        self.assertTrue(known.contains("a"))
+
+
+class TestOpenScanResult(unittest.TestCase):
+
+    @staticmethod
+    def _barcode(data):
+        barcode = MagicMock()
+        barcode.is_valid.return_value = True
+        barcode.data.return_value = data
+        return barcode
+
+    def test_new_barcodes_are_those_not_known_before_the_frame_was_scanned(self):
+        # Arrange
+        known = KnownBarcodes()
+        known.add("old")
+        result = OpenScanResult(1)
+        result.set_known_barcodes(known)
+        barcodes = [self._barcode("old"), self._barcode("new")]
+        result.set_barcodes(barcodes)
+
+        # Act
+        known.add("new")
+        new = result.new_barcodes()
+
+        # Assert
+        self.assertEqual(new, [barcodes[1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
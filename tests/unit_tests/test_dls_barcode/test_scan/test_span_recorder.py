@@ -0,0 +1,87 @@
+import unittest
+
+from mock import MagicMock
+
+from dls_barcode.scan.span_recorder import SpanRecorder, SpanWindow, NULL_RECORDER
+
+
+class TestSpanRecorder(unittest.TestCase):
+
+    @staticmethod
+    def _record_frame(recorder):
+        with recorder.span("plate"):
+            with recorder.span("read"):
+                pass
+            with recorder.span("read"):
+                pass
+        with recorder.span("locate"):
+            pass
+
+    @staticmethod
+    def _barcode(read_attempts, num_corrections):
+        barcode = MagicMock()
+        barcode.read_attempts.return_value = read_attempts
+        barcode.num_corrections.return_value = num_corrections
+        return barcode
+
+    def test_nested_spans_are_recorded_under_their_path_after_the_enclosing_span(self):
+        # Arrange
+        recorder = SpanRecorder()
+
+        # Act
+        self._record_frame(recorder)
+
+        # Assert
+        self.assertEqual(list(recorder.durations().keys()), ["plate", "plate/read", "locate"])
+        self.assertGreaterEqual(recorder.durations()["plate"], recorder.durations()["plate/read"])
+        self.assertEqual(recorder.calls()["plate/read"], 2)
+        self.assertEqual(recorder.calls()["plate"], 1)
+
+    def test_reads_are_counted_with_wiggles_and_corrections(self):
+        # Arrange
+        recorder = SpanRecorder()
+
+        # Act
+        recorder.count_read(self._barcode(read_attempts=1, num_corrections=2))
+        recorder.count_read(self._barcode(read_attempts=3, num_corrections=0))
+
+        # Assert
+        self.assertEqual(recorder.counts(), {"reads": 2, "wiggles": 2, "corrections": 2})
+
+    def test_null_recorder_records_nothing(self):
+        # Act
+        self._record_frame(NULL_RECORDER)
+        NULL_RECORDER.count_read(self._barcode(read_attempts=2, num_corrections=1))
+
+        # Assert
+        self.assertFalse(NULL_RECORDER.is_enabled())
+        self.assertEqual(NULL_RECORDER.durations(), {})
+        self.assertEqual(NULL_RECORDER.counts(), {})
+        self.assertEqual(NULL_RECORDER.summary(), [])
+
+    def test_window_combines_the_most_recent_frames_only(self):
+        # Arrange
+        window = SpanWindow(size=2)
+        recorders = []
+        for i in range(3):
+            recorder = SpanRecorder()
+            self._record_frame(recorder)
+            recorder.count("reads", i)
+            recorders.append(recorder)
+
+        # Act
+        for recorder in recorders:
+            window.add(recorder)
+        window.add(NULL_RECORDER)
+        combined = window.combined()
+
+        # Assert
+        self.assertEqual(window.num_frames(), 2)
+        self.assertAlmostEqual(combined.durations()["plate"],
+                               recorders[1].durations()["plate"] + recorders[2].durations()["plate"])
+        self.assertEqual(combined.calls()["plate/read"], 4)
+        self.assertEqual(combined.counts(), {"reads": 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+from mock import patch
+
+from dls_util.cv.replay_stream import ReplayStream
+
+
+class TestReplayStream(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        for i in range(3):
+            frame = np.full((20, 30, 3), i, np.uint8)
+            cv2.imwrite(os.path.join(self._directory, "frame{}.png".format(i)), frame)
+        open(os.path.join(self._directory, "notes.txt"), "w").close()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    @staticmethod
+    def _frame_values(stream, num_frames):
+        frames = [stream.get_frame() for _ in range(num_frames)]
+        return [None if frame is None else int(frame[0, 0, 0]) for frame in frames]
+
+    def test_images_of_directory_are_replayed_in_name_order(self):
+        # Arrange
+        stream = ReplayStream(self._directory, fps=0, loop=False)
+
+        # Act
+        values = self._frame_values(stream, 4)
+
+        # Assert
+        self.assertEqual(stream.num_frames(), 3)
+        self.assertEqual(values, [0, 1, 2, None])
+        self.assertTrue(stream.is_finished())
+        self.assertEqual((stream.get_width(), stream.get_height()), (30, 20))
+
+    def test_looped_images_start_again_at_the_end(self):
+        # Arrange
+        stream = ReplayStream(os.path.join(self._directory, "*.png"), fps=0, loop=True)
+
+        # Act
+        values = self._frame_values(stream, 5)
+
+        # Assert
+        self.assertEqual(values, [0, 1, 2, 0, 1])
+        self.assertFalse(stream.is_finished())
+
+    def test_frames_are_delivered_at_the_frame_rate(self):
+        # Arrange
+        stream = ReplayStream(self._directory, fps=10)
+        # The second frame is asked for early; the third late, but by less than the frame interval
+        times = [100.0, 100.02, 100.25]
+
+        # Act
+        with patch("dls_util.cv.replay_stream.time") as mock_time:
+            mock_time.time.side_effect = times
+            self._frame_values(stream, 3)
+
+        # Assert
+        self.assertEqual(mock_time.sleep.call_count, 1)
+        self.assertAlmostEqual(mock_time.sleep.call_args[0][0], 0.08)
+
+    def test_a_source_that_is_not_a_recording_is_an_error(self):
+        with self.assertRaises(IOError):
+            ReplayStream(os.path.join(self._directory, "missing", "*.png"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import pickle
 import unittest
 import numpy as np
 
@@ -232,4 +233,83 @@ class TestImage(unittest.TestCase):
         self.assertEquals(width, 1)
         self.assertEquals(height, 1)
 
-    #def test_calculate_brightness
\ No newline at end of file
+    #def test_calculate_brightness
+    #test rectangle_sums
+    def test_rectangle_sums_match_sum_of_slice(self):
+        image = Image(img=np.arange(48, dtype=np.uint8).reshape(6, 8))
+        rectangles = [(1, 1, 4, 3), (0, 0, 8, 6), (-2, 1, 3, 4), (6, 4, 10, 9), (5, 5, 2, 2)]
+
+        for x1, y1, x2, y2 in rectangles:
+            self.assertEquals(image.rectangle_sums(x1, y1, x2, y2), np.sum(image.img[y1:y2, x1:x2]))
+
+    def test_rectangle_sums_for_many_rectangles_at_once(self):
+        image = Image(img=np.arange(48, dtype=np.uint8).reshape(6, 8))
+        x1, y1 = np.array([0, 2, 4]), np.array([1, 0, 3])
+
+        sums = image.rectangle_sums(x1, y1, x1 + 3, y1 + 2)
+
+        for i in range(3):
+            self.assertEquals(sums[i], np.sum(image.img[y1[i]:y1[i]+2, x1[i]:x1[i]+3]))
+
+    def test_rectangle_sums_of_sub_image_are_relative_to_sub_image(self):
+        image = Image(img=np.arange(100, dtype=np.uint8).reshape(10, 10))
+        sub_image, roi = image.sub_image(Point(6, 5), 3)
+
+        self.assertEquals(sub_image.rectangle_sums(1, 2, 4, 5), np.sum(sub_image.img[2:5, 1:4]))
+
+    def test_rectangle_sums_are_updated_when_image_is_drawn_on(self):
+        image = Image.blank(10, 10, 3, 0)
+        self.assertEquals(image.rectangle_sums(0, 0, 10, 10), 0)
+
+        image.draw_dot(Point(5, 5), Color.White(), thickness=1)
+
+        self.assertEquals(image.rectangle_sums(0, 0, 10, 10), np.sum(image.img))
+        self.assertGreater(image.rectangle_sums(0, 0, 10, 10), 0)
+
+    def test_rectangle_sums_of_sub_image_are_unchanged_when_parent_image_is_cropped(self):
+        image = Image(img=np.arange(100, dtype=np.uint8).reshape(10, 10))
+        sub_image, roi = image.sub_image(Point(6, 5), 3)
+        expected = np.sum(sub_image.img[2:5, 1:4])
+
+        image.crop_image_to_rectangle([4, 4, 10, 10])
+
+        self.assertEquals(image.rectangle_sums(0, 0, 2, 2), np.sum(image.img[0:2, 0:2]))
+        self.assertEquals(sub_image.rectangle_sums(1, 2, 4, 5), expected)
+
+    def test_summed_area_table_is_kept_when_points_are_formatted(self):
+        image = Image(img=np.arange(100, dtype=np.uint8).reshape(10, 10))
+        image.rectangle_sums(0, 0, 2, 2)
+
+        image._format_point(Point(1, 1))
+
+        self.assertIsNotNone(image._integral)
+
+    def test_calculate_brightness_is_average_over_region(self):
+        image = Image(img=np.full((10, 10), 40, dtype=np.uint8))
+        image.img[4:6, 4:6] = 200
+
+        brightness = image.calculate_brightness(Point(5, 5), 2, 2)
+
+        self.assertEquals(brightness, 200)
+
+    #test rotate_region
+    def test_rotate_region_matches_region_of_rotated_image(self):
+        np.random.seed(3)
+        image = Image(img=np.random.randint(0, 256, (60, 80)).astype(np.uint8))
+        cases = [(0.3, Point(40, 30), 25, 15, 55, 45), (-1.2, Point(37.5, 21), 0, 0, 80, 60), (2.9, Point(10, 50), 3, 40, 20, 58)]
+
+        for angle, center, x1, y1, x2, y2 in cases:
+            region = image.rotate_region(angle, center, x1, y1, x2, y2)
+            expected = image.rotate(angle, center).img[y1:y2, x1:x2]
+            self.assertTrue(np.array_equal(region.img, expected))
+
+    def test_pickled_sub_image_leaves_parent_and_summed_area_table_behind(self):
+        image = Image(img=np.arange(100, dtype=np.uint8).reshape(10, 10))
+        sub_image, roi = image.sub_image(Point(6, 5), 3)
+        sub_image.rectangle_sums(0, 0, 2, 2)
+
+        copy = pickle.loads(pickle.dumps(sub_image))
+
+        self.assertIsNone(copy._integral_parent)
+        self.assertIsNone(copy._integral)
+        self.assertEquals(copy.rectangle_sums(1, 2, 4, 5), np.sum(sub_image.img[2:5, 1:4]))